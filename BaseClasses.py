@@ -1,11 +1,12 @@
 from __future__ import annotations
 
-import copy
+import contextlib
 import itertools
 import functools
 import logging
 import random
 import secrets
+import threading
 import typing  # this can go away when Python 3.8 support is dropped
 from argparse import Namespace
 from collections import Counter, deque
@@ -17,6 +18,7 @@ from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Named
 import NetUtils
 import Options
 import Utils
+from rule_builder import Rule, RuleDependencies
 
 if typing.TYPE_CHECKING:
     from worlds import AutoWorld
@@ -48,6 +50,64 @@ class ThreadBarrierProxy:
                                "Please use multiworld.per_slot_randoms[player] or randomize ahead of output.")
 
 
+class SphereAnalysis(NamedTuple):
+    """Result of collecting every filled location of a MultiWorld sphere by sphere, see MultiWorld.analyze_spheres.
+    Only MultiWorld.get_spheres is based on it, other sweeps collect fewer locations."""
+    placements: List[Tuple[Optional[Location], Item, ItemClassification]]
+    """what the analysis was done for, with precollected items listed as placed at None"""
+    spheres: List[Set[Location]]
+    """the reachable spheres, in order"""
+    unreachable: Set[Location]
+    """filled locations not in any sphere"""
+
+
+class GenerationCancelled(Exception):
+    """Raised inside a generation whose GenerationProgress was cancelled."""
+
+
+class GenerationProgress:
+    """Receives the progress of a generation, see MultiWorld.progress.
+    Generation reports to it between stages and while filling, so cancelling it from another thread
+    makes the generation raise GenerationCancelled at the next report."""
+    stage: str = ""
+    """the stage currently running, usually the name of the World method being called for every world"""
+    fill: Optional[Tuple[str, int, int]] = None
+    """name, placed and total items of the fill step currently running"""
+
+    def __init__(self) -> None:
+        self._cancelled = threading.Event()
+        self._cancel_lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        with self._cancel_lock:
+            self._cancelled.set()
+
+    def check_cancelled(self) -> None:
+        if self._cancelled.is_set():
+            raise GenerationCancelled(f"Generation was cancelled during {self.stage or 'setup'}.")
+
+    @contextlib.contextmanager
+    def unless_cancelled(self) -> Iterator[None]:
+        """Raises GenerationCancelled if cancelled, otherwise runs the block with cancel waiting for it to finish,
+        so a result committed in it is either kept by a generation that was not cancelled, or never committed."""
+        with self._cancel_lock:
+            self.check_cancelled()
+            yield
+
+    def report_stage(self, stage: str) -> None:
+        self.check_cancelled()
+        self.stage = stage
+        self.fill = None
+
+    def report_fill(self, name: str, placed: int, total: int) -> None:
+        self.check_cancelled()
+        self.fill = name, placed, total
+
+
 class MultiWorld():
     debug_types = False
     player_name: Dict[int, str]
@@ -71,6 +131,10 @@ class MultiWorld():
     progression_balancing: Dict[int, Options.ProgressionBalancing]
     completion_condition: Dict[int, Callable[[CollectionState], bool]]
     indirect_connections: Dict[Region, Set[Entrance]]
+    recorded_indirect_connections: Dict[Region, Set[Entrance]]
+    sphere_analysis: Optional[SphereAnalysis]
+    """memoized by analyze_spheres, for get_spheres"""
+    progress: GenerationProgress
     exclude_locations: Dict[int, Options.ExcludeLocations]
     priority_locations: Dict[int, Options.PriorityLocations]
     start_inventory: Dict[int, Options.StartInventory]
@@ -154,6 +218,10 @@ class MultiWorld():
         self.early_items = {player: {} for player in self.player_ids}
         self.local_early_items = {player: {} for player in self.player_ids}
         self.indirect_connections = {}
+        self.recorded_indirect_connections = {}
+        self.sphere_analysis = None
+        self._sphere_analysis_lock = threading.Lock()
+        self.progress = GenerationProgress()
         self.start_inventory_from_pool: Dict[int, Options.StartInventoryPool] = {}
 
         for player in range(1, players + 1):
@@ -465,16 +533,13 @@ class MultiWorld():
             if self.has_beaten_game(self.state):
                 return True
             state = CollectionState(self)
-        prog_locations = {location for location in self.get_locations() if location.item
-                          and location.item.advancement and location not in state.locations_checked}
+        prog_locations = PendingLocations(location for location in self.get_locations() if location.item
+                                          and location.item.advancement and location not in state.locations_checked)
 
         while prog_locations:
-            sphere: Set[Location] = set()
             # build up spheres of collection radius.
             # Everything in each sphere is independent from each other in dependencies and only depends on lower spheres
-            for location in prog_locations:
-                if location.can_reach(state):
-                    sphere.add(location)
+            sphere = prog_locations.pop_reachable(state)
 
             if not sphere:
                 # ran out of places and did not finish yet, quit
@@ -482,13 +547,46 @@ class MultiWorld():
 
             for location in sphere:
                 state.collect(location.item, True, location)
-            prog_locations -= sphere
 
             if self.has_beaten_game(state):
                 return True
 
         return False
 
+    def _get_placements(self) -> List[Tuple[Optional[Location], Item, ItemClassification]]:
+        placements: List[Tuple[Optional[Location], Item, ItemClassification]] = [
+            (None, item, item.classification) for items in self.precollected_items.values() for item in items]
+        placements += [(location, location.item, location.item.classification) for location in self.get_locations()
+                       if location.item]
+        return placements
+
+    def analyze_spheres(self) -> SphereAnalysis:
+        """
+        Collects every filled location sphere by sphere, starting from an empty CollectionState.
+        The result is memoized for get_spheres, until an item gets placed, swapped, reclassified or precollected.
+        Sweeps over only some locations, like can_beat_game, fulfills_accessibility and the spoiler playthrough, can't
+        reuse it: every item collected counts by its name, filler included, so the items they leave out can make less
+        reachable than the analysis found.
+        """
+        with self._sphere_analysis_lock:
+            placements = self._get_placements()
+            if self.sphere_analysis and self.sphere_analysis.placements == placements:
+                return self.sphere_analysis
+
+            state = CollectionState(self)
+            locations = PendingLocations(self.get_filled_locations())
+            spheres: List[Set[Location]] = []
+            while locations:
+                sphere = locations.pop_reachable(state)
+                if not sphere:
+                    break
+                spheres.append(sphere)
+                for location in sphere:
+                    state.collect(location.item, True, location)
+
+            self.sphere_analysis = SphereAnalysis(placements, spheres, set(locations))
+            return self.sphere_analysis
+
     def get_spheres(self) -> Iterator[Set[Location]]:
         """
         yields a set of locations for each logical sphere
@@ -497,27 +595,17 @@ class MultiWorld():
         locations is followed by an empty set, and then a set of all of the
         unreachable locations.
         """
-        state = CollectionState(self)
-        locations = set(self.get_filled_locations())
-
-        while locations:
-            sphere: Set[Location] = set()
-
-            for location in locations:
-                if location.can_reach(state):
-                    sphere.add(location)
-            yield sphere
-            if not sphere:
-                if locations:
-                    yield locations  # unreachable locations
-                break
-
-            for location in sphere:
-                state.collect(location.item, True, location)
-            locations -= sphere
+        analysis = self.analyze_spheres()
+        for sphere in analysis.spheres:
+            yield sphere.copy()
+        if analysis.unreachable:
+            yield set()
+            yield analysis.unreachable.copy()
 
     def fulfills_accessibility(self, state: Optional[CollectionState] = None):
-        """Check if accessibility rules are fulfilled with current or supplied state."""
+        """Check if accessibility rules are fulfilled with current or supplied state.
+        Sweeps on its own instead of using analyze_spheres, as it skips excluded locations, and the non-progression
+        locations of players without full location accessibility."""
         if not state:
             state = CollectionState(self)
         players: Dict[str, Set[int]] = {
@@ -582,75 +670,495 @@ class MultiWorld():
 PathValue = Tuple[str, Optional["PathValue"]]
 
 
+class ProgItemsCounter(Counter):
+    """Counter of a player's logically relevant items in a CollectionState.
+    Remembers which item names went up or down since that player's reachable regions were last updated."""
+    increased: Set[str]
+    decreased: Set[str]
+    tracking: bool
+    """True once the player's blocked entrances were tested against this counter, so only changes need a retest."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        self.increased = set()
+        self.decreased = set()
+        self.tracking = False
+        super().__init__(*args, **kwargs)
+
+    def __setitem__(self, key: str, value: int) -> None:
+        if value < self.get(key, 0):
+            self.decreased.add(key)
+        else:
+            self.increased.add(key)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        self.decreased.add(key)
+        super().__delitem__(key)
+
+    def copy(self) -> ProgItemsCounter:
+        ret = self.__class__(self)
+        ret.increased = self.increased.copy()
+        ret.decreased = self.decreased.copy()
+        ret.tracking = self.tracking
+        return ret
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> ProgItemsCounter:
+        return self.copy()
+
+    def clear(self) -> None:
+        self.decreased.update(self)
+        super().clear()
+
+    def pop(self, key: str, *default: int) -> int:
+        self.decreased.add(key)
+        return super().pop(key, *default)
+
+    def popitem(self) -> Tuple[str, int]:
+        key, value = super().popitem()
+        self.decreased.add(key)
+        return key, value
+
+    def setdefault(self, key: str, default: int = 0) -> int:
+        self.increased.add(key)
+        return super().setdefault(key, default)
+
+    def update(self, iterable=None, /, **kwds) -> None:
+        if not self and isinstance(iterable, Mapping):
+            # Counter.update bypasses __setitem__ when filling an empty Counter from a mapping
+            self.increased.update(iterable)
+        self.increased.update(kwds)
+        super().update(iterable, **kwds)
+
+
+class CopyOnWriteDict(dict):
+    """Per-player mapping of a CollectionState, whose values may be shared with copies of that state.
+    Looking up a shared value copies it first, so the value handed out can be mutated freely.
+    Read-only paths in CollectionState look at values through _peek instead, which never copies."""
+    owned: Set[int]
+    """keys whose values are not shared with any other CopyOnWriteDict"""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.owned = set()
+
+    def __getitem__(self, key: int) -> Any:
+        value = dict.__getitem__(self, key)
+        if key not in self.owned:
+            value = value.copy()
+            dict.__setitem__(self, key, value)
+            self.owned.add(key)
+        return value
+
+    def __setitem__(self, key: int, value: Any) -> None:
+        dict.__setitem__(self, key, value)
+        self.owned.add(key)
+
+    def get(self, key: int, default: Any = None) -> Any:
+        return self[key] if key in self else default
+
+    def copy(self) -> CopyOnWriteDict:
+        """Returns a mapping that shares all values with this one, until either looks one up."""
+        self.owned = set()
+        return self.__class__(self)
+
+
+_peek: Callable[[Dict[int, Any], int], Any] = dict.__getitem__
+"""Looks up a value of a CopyOnWriteDict without taking ownership of it. The value must not be mutated."""
+
+
+class _CopyOnWriteAttribute:
+    """Container attribute of CollectionState that copies of the state share until it is looked up.
+    The container is stored under the attribute name with a leading underscore, for read-only access."""
+
+    def __set_name__(self, owner: Type[CollectionState], name: str) -> None:
+        self.name = name
+        self.private_name = "_" + name
+
+    def __get__(self, state: Optional[CollectionState], owner: Optional[Type[CollectionState]] = None) -> Any:
+        if state is None:
+            return self
+        value = getattr(state, self.private_name)
+        if self.name in state.shared_attributes:
+            state.shared_attributes.remove(self.name)
+            value = value.copy()
+            setattr(state, self.private_name, value)
+        return value
+
+    def __set__(self, state: CollectionState, value: Any) -> None:
+        state.shared_attributes.discard(self.name)
+        setattr(state, self.private_name, value)
+
+
+class AccessDependencies:
+    """What an Entrance's access_rule was seen reading while CollectionState.update_reachable_regions tested it.
+    Collected across every test of the same rule, so the result can only change if one of these changes."""
+    __slots__ = ("rule", "items", "regions", "complete")
+
+    rule: Optional[Callable[[CollectionState], bool]]
+    items: Set[str]
+    """item names of the entrance's player"""
+    regions: Set[Region]
+    """regions of the entrance's player, other than the entrance's parent region"""
+    complete: bool
+    """False if the rule read something that can't be tracked, like another player's items or custom state"""
+
+    def __init__(self, rule: Optional[Callable[[CollectionState], bool]]) -> None:
+        self.rule = rule
+        self.items = set()
+        self.regions = set()
+        self.complete = True
+
+    def affected_by(self, entrance: Entrance, item_names: Set[str]) -> bool:
+        """Returns True if changes to item_names, or a different access_rule, may change the entrance's result."""
+        return self.rule != entrance.access_rule or not self.complete or not self.items.isdisjoint(item_names)
+
+
+class _AccessRecorder:
+    """Stands in for a CollectionState's prog_items and reachable_regions while that state's
+    update_reachable_regions tests one player's entrances, recording what each access rule reads."""
+    player: int
+    reads: AccessDependencies
+    """dependencies of the entrance currently under test"""
+
+    def __init__(self, state: CollectionState, player: int) -> None:
+        self.state = state
+        self.player = player
+        self.reads = AccessDependencies(None)
+        self.prog_items = _RecordingDict(self, state.prog_items,
+                                         _RecordingItems(self, _peek(state.prog_items, player)))
+        self.reachable_regions = _RecordingDict(self, state.reachable_regions,
+                                                _RecordingRegions(self, state.reachable_regions[player]))
+
+    def attach(self) -> None:
+        state = self.state
+        state.prog_items, state.reachable_regions = self.prog_items, self.reachable_regions
+        state.access_recorder = self
+
+    def detach(self) -> None:
+        state = self.state
+        state.prog_items, state.reachable_regions = self.prog_items.source, self.reachable_regions.source
+        state.access_recorder = None
+
+    def can_reach(self, entrance: Entrance) -> bool:
+        """Tests the entrance like Entrance.can_reach and merges what its access_rule read into its dependencies."""
+        rule = entrance.access_rule
+        if isinstance(rule, Rule) and rule.dependencies.complete:
+            # a declarative rule knows what it reads, no need to record it
+            if entrance.access_dependencies is None or entrance.access_dependencies.rule != rule:
+                self.set_dependencies(entrance, rule.dependencies)
+            self.detach()
+            try:
+                return entrance.can_reach(self.state)
+            finally:
+                self.attach()
+
+        self.reads = reads = AccessDependencies(rule)
+        try:
+            return entrance.can_reach(self.state)
+        finally:
+            reads.regions.discard(entrance.parent_region)
+            dependencies = entrance.access_dependencies
+            if dependencies is None or dependencies.rule != reads.rule:
+                entrance.access_dependencies = reads
+                new_regions = reads.regions
+            else:
+                new_regions = reads.regions - dependencies.regions
+                dependencies.items |= reads.items
+                dependencies.regions |= new_regions
+                dependencies.complete &= reads.complete
+            for region in new_regions:
+                self.state.multiworld.recorded_indirect_connections.setdefault(region, set()).add(entrance)
+
+    def set_dependencies(self, entrance: Entrance, rule_dependencies: RuleDependencies) -> None:
+        """Sets the dependencies of an entrance with a declarative access rule, which can't change between tests."""
+        player = self.player
+        get_region = self.state.multiworld.get_region
+        dependencies = AccessDependencies(entrance.access_rule)
+        dependencies.items.update(rule_dependencies.items.get(player, ()))
+        dependencies.regions.update(get_region(name, player) for name in rule_dependencies.regions.get(player, ()))
+        dependencies.regions.discard(entrance.parent_region)
+        dependencies.complete = rule_dependencies.items.keys() <= {player} and \
+            rule_dependencies.regions.keys() <= {player}
+        entrance.access_dependencies = dependencies
+        for region in dependencies.regions:
+            self.state.multiworld.recorded_indirect_connections.setdefault(region, set()).add(entrance)
+
+    def untrackable(self) -> None:
+        self.reads.complete = False
+
+
+class _RecordingDict(dict):
+    """Per-player mapping that hands out the recording view for the recorder's player.
+    Looking up any other player marks the rule under test as untrackable."""
+
+    def __init__(self, recorder: _AccessRecorder, source: Dict[int, Any], view: Any) -> None:
+        super().__init__({recorder.player: view})
+        self.recorder = recorder
+        self.source = source
+
+    def __missing__(self, player: int) -> Any:
+        self.recorder.untrackable()
+        return _peek(self.source, player)
+
+    def get(self, player: int, default: Any = None) -> Any:
+        return self[player] if player in self.source else default
+
+    def __contains__(self, player: object) -> bool:
+        return player in self.source
+
+    def __iter__(self) -> Iterator[int]:
+        self.recorder.untrackable()
+        return iter(self.source)
+
+    def __len__(self) -> int:
+        return len(self.source)
+
+    def keys(self):
+        return self.source.keys()
+
+    def values(self):
+        self.recorder.untrackable()
+        return self.source.values()
+
+    def items(self):
+        self.recorder.untrackable()
+        return self.source.items()
+
+
+class _RecordingItems:
+    """Recording view of the recorder's player's item Counter."""
+
+    def __init__(self, recorder: _AccessRecorder, counter: Counter[str]) -> None:
+        self.recorder = recorder
+        self.counter = counter
+
+    def __getitem__(self, item: str) -> int:
+        self.recorder.reads.items.add(item)
+        return self.counter.get(item, 0)
+
+    def get(self, item: str, default: Any = None) -> Any:
+        self.recorder.reads.items.add(item)
+        return self.counter.get(item, default)
+
+    def __contains__(self, item: str) -> bool:
+        self.recorder.reads.items.add(item)
+        return item in self.counter
+
+    def __iter__(self) -> Iterator[str]:
+        self.recorder.untrackable()
+        return iter(self.counter)
+
+    def __len__(self) -> int:
+        self.recorder.untrackable()
+        return len(self.counter)
+
+    def __getattr__(self, name: str) -> Any:
+        self.recorder.untrackable()
+        return getattr(self.counter, name)
+
+
+class _RecordingRegions:
+    """Recording view of the recorder's player's reachable region set."""
+
+    def __init__(self, recorder: _AccessRecorder, regions: Set[Region]) -> None:
+        self.recorder = recorder
+        self.regions = regions
+
+    def __contains__(self, region: Region) -> bool:
+        self.recorder.reads.regions.add(region)
+        return region in self.regions
+
+    def __iter__(self) -> Iterator[Region]:
+        self.recorder.untrackable()
+        return iter(self.regions)
+
+    def __len__(self) -> int:
+        self.recorder.untrackable()
+        return len(self.regions)
+
+    def __getattr__(self, name: str) -> Any:
+        self.recorder.untrackable()
+        return getattr(self.regions, name)
+
+
 class CollectionState():
     prog_items: Dict[int, Counter[str]]
     multiworld: MultiWorld
     reachable_regions: Dict[int, Set[Region]]
     blocked_connections: Dict[int, Set[Entrance]]
-    events: Set[Location]
-    path: Dict[Union[Region, Entrance], PathValue]
-    locations_checked: Set[Location]
+    shared_regions: Set[int]
+    """players whose reachable_regions and blocked_connections sets are shared with a copy of this state.
+    update_reachable_regions copies them before changing them, anything else should replace them instead."""
+    # shared with copies until looked up, see _CopyOnWriteAttribute
+    events: Set[Location] = _CopyOnWriteAttribute()
+    path: Dict[Union[Region, Entrance], PathValue] = _CopyOnWriteAttribute()
+    locations_checked: Set[Location] = _CopyOnWriteAttribute()
+    shared_attributes: Set[str]
     stale: Dict[int, bool]
+    access_recorder: Optional[_AccessRecorder]
     additional_init_functions: List[Callable[[CollectionState, MultiWorld], None]] = []
     additional_copy_functions: List[Callable[[CollectionState, CollectionState], CollectionState]] = []
 
     def __init__(self, parent: MultiWorld):
-        self.prog_items = {player: Counter() for player in parent.get_all_ids()}
+        self.prog_items = CopyOnWriteDict((player, ProgItemsCounter()) for player in parent.get_all_ids())
         self.multiworld = parent
         self.reachable_regions = {player: set() for player in parent.get_all_ids()}
         self.blocked_connections = {player: set() for player in parent.get_all_ids()}
+        self.shared_regions = set()
+        self.shared_attributes = set()
         self.events = set()
         self.path = {}
         self.locations_checked = set()
         self.stale = {player: True for player in parent.get_all_ids()}
+        self.access_recorder = None
         for function in self.additional_init_functions:
             function(self, parent)
         for items in parent.precollected_items.values():
             for item in items:
                 self.collect(item, True)
 
+    def tracks_reachability(self, player: int) -> bool:
+        """Returns True if reachable regions of this player are updated incrementally from item changes."""
+        return isinstance(_peek(self.prog_items, player), ProgItemsCounter) and \
+            self.multiworld.worlds[player].incremental_reachability
+
     def update_reachable_regions(self, player: int):
         self.stale[player] = False
+        recorder = self.access_recorder
+        if recorder:
+            # an access rule under test asked for regions of a stale player, what it depends on is not trackable
+            recorder.untrackable()
+            if recorder.player != player:
+                recorder.detach()
+                try:
+                    self.update_reachable_regions(player)
+                finally:
+                    recorder.attach()
+            return
+
         reachable_regions = self.reachable_regions[player]
         blocked_connections = self.blocked_connections[player]
-        queue = deque(self.blocked_connections[player])
         start = self.multiworld.get_region("Menu", player)
+        tracked = self.tracks_reachability(player)
+        if tracked:
+            prog_items: ProgItemsCounter = _peek(self.prog_items, player)
+            if prog_items.increased or prog_items.decreased or not prog_items.tracking:
+                # the changes are consumed below
+                prog_items = self.prog_items[player]
+            if prog_items.decreased and not (prog_items.tracking and start in reachable_regions and
+                                             self._keeps_reachable_regions(player, prog_items.decreased)):
+                # some region may have become unreachable, start over
+                reachable_regions = self.reachable_regions[player] = set()
+                blocked_connections = self.blocked_connections[player] = set()
+                self.shared_regions.discard(player)
+                prog_items.tracking = False
+            if prog_items.tracking and start in reachable_regions:
+                # only retest what may have been unblocked by the items collected since the last update
+                increased = prog_items.increased
+                queue = deque(connection for connection in blocked_connections
+                              if connection.access_dependencies is None
+                              or connection.access_dependencies.affected_by(connection, increased))
+            else:
+                queue = deque(blocked_connections)
+            prog_items.increased.clear()
+            prog_items.decreased.clear()
+            prog_items.tracking = True
+        else:
+            queue = deque(blocked_connections)
+        if not queue and start in reachable_regions:
+            return
 
-        # init on first call - this can't be done on construction since the regions don't exist yet
-        if start not in reachable_regions:
-            reachable_regions.add(start)
-            blocked_connections.update(start.exits)
-            queue.extend(start.exits)
-
-        # run BFS on all connections, and keep track of those blocked by missing items
-        while queue:
-            connection = queue.popleft()
-            new_region = connection.connected_region
-            if new_region in reachable_regions:
-                blocked_connections.remove(connection)
-            elif connection.can_reach(self):
-                assert new_region, f"tried to search through an Entrance \"{connection}\" with no Region"
-                reachable_regions.add(new_region)
-                blocked_connections.remove(connection)
-                blocked_connections.update(new_region.exits)
-                queue.extend(new_region.exits)
-                self.path[new_region] = (new_region.name, self.path.get(connection, None))
-
-                # Retry connections if the new region can unblock them
-                for new_entrance in self.multiworld.indirect_connections.get(new_region, set()):
-                    if new_entrance in blocked_connections and new_entrance not in queue:
-                        queue.append(new_entrance)
+        if player in self.shared_regions:
+            self.shared_regions.remove(player)
+            reachable_regions = self.reachable_regions[player] = reachable_regions.copy()
+            blocked_connections = self.blocked_connections[player] = blocked_connections.copy()
+        if tracked:
+            recorder = _AccessRecorder(self, player)
+            recorder.attach()
+        try:
+            # init on first call - this can't be done on construction since the regions don't exist yet
+            if start not in reachable_regions:
+                reachable_regions.add(start)
+                blocked_connections.update(start.exits)
+                queue.extend(start.exits)
+
+            # run BFS on all connections, and keep track of those blocked by missing items
+            while queue:
+                connection = queue.popleft()
+                new_region = connection.connected_region
+                if new_region in reachable_regions:
+                    blocked_connections.remove(connection)
+                elif recorder.can_reach(connection) if recorder else connection.can_reach(self):
+                    assert new_region, f"tried to search through an Entrance \"{connection}\" with no Region"
+                    reachable_regions.add(new_region)
+                    blocked_connections.remove(connection)
+                    blocked_connections.update(new_region.exits)
+                    queue.extend(new_region.exits)
+                    self.path[new_region] = (new_region.name, self.path.get(connection, None))
+
+                    # Retry connections if the new region can unblock them
+                    for indirect_connections in (self.multiworld.indirect_connections,
+                                                 self.multiworld.recorded_indirect_connections):
+                        for new_entrance in indirect_connections.get(new_region, ()):
+                            if new_entrance in blocked_connections and new_entrance not in queue:
+                                queue.append(new_entrance)
+        finally:
+            if recorder:
+                recorder.detach()
+
+    def _keeps_reachable_regions(self, player: int, decreased: Set[str]) -> bool:
+        """Retests the passed entrances of the player that may depend on the decreased item names.
+        Returns True if all of them still pass, meaning no region became unreachable."""
+        reachable_regions = self.reachable_regions[player]
+        blocked_connections = self.blocked_connections[player]
+        recorder = _AccessRecorder(self, player)
+        recorder.attach()
+        try:
+            for region in reachable_regions:
+                for exit_ in region.exits:
+                    dependencies = exit_.access_dependencies
+                    # entrances that were never tested did not make any region reachable
+                    if dependencies and exit_ not in blocked_connections and \
+                            dependencies.affected_by(exit_, decreased) and not recorder.can_reach(exit_):
+                        return False
+            return True
+        finally:
+            recorder.detach()
 
     def copy(self) -> CollectionState:
-        ret = CollectionState(self.multiworld)
-        ret.prog_items = copy.deepcopy(self.prog_items)
-        ret.reachable_regions = {player: copy.copy(self.reachable_regions[player]) for player in
-                                 self.reachable_regions}
-        ret.blocked_connections = {player: copy.copy(self.blocked_connections[player]) for player in
-                                   self.blocked_connections}
-        ret.events = copy.copy(self.events)
-        ret.path = copy.copy(self.path)
-        ret.locations_checked = copy.copy(self.locations_checked)
+        """Returns a copy of this state. Per-player containers are shared between both until one of them needs to
+        change them, so a copy only costs as much as the players it goes on to change."""
+        recorder = self.access_recorder
+        if recorder:
+            # an access rule under test copies the whole state, what it depends on is not trackable
+            recorder.untrackable()
+            recorder.detach()
+            try:
+                return self.copy()
+            finally:
+                recorder.attach()
+
+        ret = CollectionState.__new__(CollectionState)
+        ret.multiworld = self.multiworld
+        if not isinstance(self.prog_items, CopyOnWriteDict):
+            # replaced from outside, from now on it has to notice its counters being looked up
+            self.prog_items = CopyOnWriteDict(self.prog_items)
+        ret.prog_items = self.prog_items.copy()
+        ret.reachable_regions = self.reachable_regions.copy()
+        ret.blocked_connections = self.blocked_connections.copy()
+        self.shared_regions = set(self.reachable_regions)
+        ret.shared_regions = set(self.reachable_regions)
+        self.shared_attributes = {"events", "path", "locations_checked"}
+        ret.shared_attributes = {"events", "path", "locations_checked"}
+        ret._events = self._events
+        ret._path = self._path
+        ret._locations_checked = self._locations_checked
+        # values changed from outside without collect or remove get picked up by updating, which is cheap if
+        # nothing changed
+        ret.stale = {player: True for player in self.stale}
+        ret.access_recorder = None
+        for function in self.additional_init_functions:
+            function(ret, self.multiworld)
         for function in self.additional_copy_functions:
             ret = function(self, ret)
         return ret
@@ -685,45 +1193,48 @@ class CollectionState():
             locations = self.multiworld.get_filled_locations()
         reachable_events = True
         # since the loop has a good chance to run more than once, only filter the events once
-        locations = {location for location in locations if location.advancement and location not in self.events and
-                     not key_only or getattr(location.item, "locked_dungeon_item", False)}
+        pending = PendingLocations(location for location in locations if location.advancement and
+                                   location not in self._events and
+                                   not key_only or getattr(location.item, "locked_dungeon_item", False))
         while reachable_events:
-            reachable_events = {location for location in locations if location.can_reach(self)}
-            locations -= reachable_events
+            reachable_events = pending.pop_reachable(self)
             for event in reachable_events:
                 self.events.add(event)
                 assert isinstance(event.item, Item), "tried to collect Event with no Item"
                 self.collect(event.item, True, event)
 
     # item name related
+    # counts are looked up with get, as Counter.__missing__ is a lot slower than a hit for items not in the state
     def has(self, item: str, player: int, count: int = 1) -> bool:
-        return self.prog_items[player][item] >= count
+        return _peek(self.prog_items, player).get(item, 0) >= count
 
     def has_all(self, items: Iterable[str], player: int) -> bool:
         """Returns True if each item name of items is in state at least once."""
-        return all(self.prog_items[player][item] for item in items)
+        return all(map(_peek(self.prog_items, player).get, items))
 
     def has_any(self, items: Iterable[str], player: int) -> bool:
         """Returns True if at least one item name of items is in state at least once."""
-        return any(self.prog_items[player][item] for item in items)
+        return any(map(_peek(self.prog_items, player).get, items))
 
     def has_all_counts(self, item_counts: Mapping[str, int], player: int) -> bool:
         """Returns True if each item name is in the state at least as many times as specified."""
-        return all(self.prog_items[player][item] >= count for item, count in item_counts.items())
+        player_prog_items = _peek(self.prog_items, player)
+        return all(player_prog_items.get(item, 0) >= count for item, count in item_counts.items())
 
     def has_any_count(self, item_counts: Mapping[str, int], player: int) -> bool:
         """Returns True if at least one item name is in the state at least as many times as specified."""
-        return any(self.prog_items[player][item] >= count for item, count in item_counts.items())
+        player_prog_items = _peek(self.prog_items, player)
+        return any(player_prog_items.get(item, 0) >= count for item, count in item_counts.items())
 
     def count(self, item: str, player: int) -> int:
-        return self.prog_items[player][item]
+        return _peek(self.prog_items, player).get(item, 0)
 
     def has_from_list(self, items: Iterable[str], player: int, count: int) -> bool:
         """Returns True if the state contains at least `count` items matching any of the item names from a list."""
         found: int = 0
-        player_prog_items = self.prog_items[player]
+        player_prog_items = _peek(self.prog_items, player)
         for item_name in items:
-            found += player_prog_items[item_name]
+            found += player_prog_items.get(item_name, 0)
             if found >= count:
                 return True
         return False
@@ -732,28 +1243,43 @@ class CollectionState():
         """Returns True if the state contains at least `count` items matching any of the item names from a list.
         Ignores duplicates of the same item."""
         found: int = 0
-        player_prog_items = self.prog_items[player]
+        player_prog_items = _peek(self.prog_items, player)
         for item_name in items:
-            found += player_prog_items[item_name] > 0
+            found += player_prog_items.get(item_name, 0) > 0
             if found >= count:
                 return True
         return False
 
     def count_from_list(self, items: Iterable[str], player: int) -> int:
         """Returns the cumulative count of items from a list present in state."""
-        return sum(self.prog_items[player][item_name] for item_name in items)
+        player_prog_items = _peek(self.prog_items, player)
+        return sum(player_prog_items.get(item_name, 0) for item_name in items)
     
     def count_from_list_unique(self, items: Iterable[str], player: int) -> int:
         """Returns the cumulative count of items from a list present in state. Ignores duplicates of the same item."""
-        return sum(self.prog_items[player][item_name] > 0 for item_name in items)
+        player_prog_items = _peek(self.prog_items, player)
+        return sum(player_prog_items.get(item_name, 0) > 0 for item_name in items)
 
     # item name group related
+    def _group_counts(self, item_name_group: str, player: int) -> Iterator[int]:
+        """Yields the counts of the items of an item group, skipping items the state may not contain.
+        Groups tend to be a lot larger than the items collected so far, so this walks whichever is smaller.
+        Lazy, so has_group and has_group_unique stop looking up items once they reach their count."""
+        group = self.multiworld.worlds[player].item_name_groups[item_name_group]
+        player_prog_items = _peek(self.prog_items, player)
+        # while recording, the names have to be looked up one by one for the recorder to see them
+        if not self.access_recorder and len(player_prog_items) < len(group):
+            return (count for item_name, count in player_prog_items.items() if item_name in group)
+        return (player_prog_items.get(item_name, 0) for item_name in group)
+
     def has_group(self, item_name_group: str, player: int, count: int = 1) -> bool:
         """Returns True if the state contains at least `count` items present in a specified item group."""
+        if count <= 0:
+            # _group_counts may skip the whole group, walking it would meet the count with its first item
+            return bool(self.multiworld.worlds[player].item_name_groups[item_name_group])
         found: int = 0
-        player_prog_items = self.prog_items[player]
-        for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]:
-            found += player_prog_items[item_name]
+        for item_count in self._group_counts(item_name_group, player):
+            found += item_count
             if found >= count:
                 return True
         return False
@@ -762,30 +1288,24 @@ class CollectionState():
         """Returns True if the state contains at least `count` items present in a specified item group.
         Ignores duplicates of the same item.
         """
+        if count <= 0:
+            # _group_counts may skip the whole group, walking it would meet the count with its first item
+            return bool(self.multiworld.worlds[player].item_name_groups[item_name_group])
         found: int = 0
-        player_prog_items = self.prog_items[player]
-        for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]:
-            found += player_prog_items[item_name] > 0
+        for item_count in self._group_counts(item_name_group, player):
+            found += item_count > 0
             if found >= count:
                 return True
         return False
 
     def count_group(self, item_name_group: str, player: int) -> int:
         """Returns the cumulative count of items from an item group present in state."""
-        player_prog_items = self.prog_items[player]
-        return sum(
-            player_prog_items[item_name]
-            for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]
-        )
+        return sum(self._group_counts(item_name_group, player))
 
     def count_group_unique(self, item_name_group: str, player: int) -> int:
         """Returns the cumulative count of items from an item group present in state.
         Ignores duplicates of the same item."""
-        player_prog_items = self.prog_items[player]
-        return sum(
-            player_prog_items[item_name] > 0
-            for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]
-        )
+        return sum(item_count > 0 for item_count in self._group_counts(item_name_group, player))
 
     # Item related
     def collect(self, item: Item, event: bool = False, location: Optional[Location] = None) -> bool:
@@ -808,14 +1328,104 @@ class CollectionState():
     def remove(self, item: Item):
         changed = self.multiworld.worlds[item.player].remove(self, item)
         if changed:
-            # invalidate caches, nothing can be trusted anymore now
-            self.reachable_regions[item.player] = set()
-            self.blocked_connections[item.player] = set()
+            if not self.tracks_reachability(item.player):
+                # invalidate caches, nothing can be trusted anymore now
+                self.reachable_regions[item.player] = set()
+                self.blocked_connections[item.player] = set()
+                self.shared_regions.discard(item.player)
+            # otherwise update_reachable_regions only retests entrances that depend on the removed items
             self.stale[item.player] = True
 
 
+class PendingLocations:
+    """Locations to repeatedly find the reachable ones of, while a state collects items, like during a sweep.
+    A location whose declarative access rule failed is set aside until something the rule reads has changed."""
+    candidates: Set[Location]
+    rule_candidates: Set[Location]
+    """candidates with a declarative access rule that knows all it reads"""
+    waiting: Set[Location]
+    waiting_items: Dict[Tuple[int, str], Tuple[Optional[int], Set[Location]]]
+    """locations waiting for the count of an item to change, with the count, by player and item name"""
+    waiting_regions: Dict[Tuple[int, str], Tuple[Optional[bool], Set[Location]]]
+    """locations waiting for the reachability of a region to change, with the reachability, by player and name"""
+
+    def __init__(self, locations: Iterable[Location]) -> None:
+        self.candidates = set(locations)
+        self.rule_candidates = {location for location in self.candidates if isinstance(location.access_rule, Rule)
+                                and location.access_rule.dependencies.complete}
+        self.candidates -= self.rule_candidates
+        self.waiting = set()
+        self.waiting_items = {}
+        self.waiting_regions = {}
+
+    def __len__(self) -> int:
+        return len(self.candidates) + len(self.rule_candidates) + len(self.waiting)
+
+    def __iter__(self) -> Iterator[Location]:
+        return itertools.chain(self.candidates, self.rule_candidates, self.waiting)
+
+    def pop_reachable(self, state: CollectionState) -> Set[Location]:
+        """Returns the locations that are reachable in state, and stops tracking them."""
+        reachable = {location for location in self.candidates if location.can_reach(state)}
+        self.candidates -= reachable
+        if self.waiting:
+            self._wake(state)
+        if self.rule_candidates:
+            failed: Set[Location] = set()
+            for location in self.rule_candidates:
+                if not location.access_rule(state):
+                    failed.add(location)
+                elif location.parent_region.can_reach(state):
+                    reachable.add(location)
+            for location in failed:
+                self._wait(location, state)
+            self.rule_candidates -= reachable
+            self.rule_candidates -= failed
+        return reachable
+
+    def _wait(self, location: Location, state: CollectionState) -> None:
+        dependencies = typing.cast(Rule, location.access_rule).dependencies
+        self.waiting.add(location)
+        for player, names in dependencies.items.items():
+            counts = _peek(state.prog_items, player)
+            for name in names:
+                self._add_waiting(self.waiting_items, (player, name), counts.get(name, 0), location)
+        for player, names in dependencies.regions.items():
+            for name in names:
+                self._add_waiting(self.waiting_regions, (player, name), state.can_reach_region(name, player),
+                                  location)
+
+    @staticmethod
+    def _add_waiting(waiting: Dict[Any, Tuple[Any, Set[Location]]], key: Any, value: Any, location: Location) -> None:
+        entry = waiting.get(key)
+        if entry is None:
+            waiting[key] = (value, {location})
+        elif entry[0] == value:
+            entry[1].add(location)
+        else:
+            # the locations already waiting saw a different value, make sure they get woken up
+            waiting[key] = (None, entry[1] | {location})
+
+    def _wake(self, state: CollectionState) -> None:
+        woken: Set[Location] = set()
+        prog_items = state.prog_items
+        changed_items = [key for key, (count, _) in self.waiting_items.items()
+                         if _peek(prog_items, key[0]).get(key[1], 0) != count]
+        for key in changed_items:
+            woken |= self.waiting_items.pop(key)[1]
+        changed_regions = [key for key, (reachable, _) in self.waiting_regions.items()
+                           if state.can_reach_region(key[1], key[0]) != reachable]
+        for key in changed_regions:
+            woken |= self.waiting_regions.pop(key)[1]
+        # some of them may have been woken up by something else already
+        woken &= self.waiting
+        self.waiting -= woken
+        self.rule_candidates |= woken
+
+
 class Entrance:
     access_rule: Callable[[CollectionState], bool] = staticmethod(lambda state: True)
+    access_dependencies: Optional[AccessDependencies] = None
     hide_path: bool = False
     player: int
     name: str
@@ -832,8 +1442,8 @@ class Entrance:
 
     def can_reach(self, state: CollectionState) -> bool:
         if self.parent_region.can_reach(state) and self.access_rule(state):
-            if not self.hide_path and not self in state.path:
-                state.path[self] = (self.name, state.path.get(self.parent_region, (self.parent_region.name, None)))
+            if not self.hide_path and not self in state._path:
+                state.path[self] = (self.name, state._path.get(self.parent_region, (self.parent_region.name, None)))
             return True
 
         return False
@@ -1215,23 +1825,23 @@ class Spoiler:
         from itertools import chain
         # get locations containing progress items
         multiworld = self.multiworld
+        # not taken from multiworld.analyze_spheres, which also collects non-progression items and so can reach more
         prog_locations = {location for location in multiworld.get_filled_locations() if location.item.advancement}
         state_cache: List[Optional[CollectionState]] = [None]
         collection_spheres: List[Set[Location]] = []
         state = CollectionState(multiworld)
-        sphere_candidates = set(prog_locations)
+        sphere_candidates = PendingLocations(prog_locations)
         logging.debug('Building up collection spheres.')
         while sphere_candidates:
 
             # build up spheres of collection radius.
             # Everything in each sphere is independent from each other in dependencies and only depends on lower spheres
 
-            sphere = {location for location in sphere_candidates if state.can_reach(location)}
+            sphere = sphere_candidates.pop_reachable(state)
 
             for location in sphere:
                 state.collect(location.item, True, location)
 
-            sphere_candidates -= sphere
             collection_spheres.append(sphere)
             state_cache.append(state.copy())
 
@@ -1246,7 +1856,7 @@ class Spoiler:
                     raise RuntimeError(f'Not all progression items reachable ({sphere_candidates}). '
                                        f'Something went terribly wrong here.')
                 else:
-                    self.unreachables = sphere_candidates
+                    self.unreachables = set(sphere_candidates)
                     break
 
         # in the second phase, we cull each sphere such that the game is still beatable,
@@ -1287,13 +1897,13 @@ class Spoiler:
         # used to access it was deemed not required.) So we need to do one final sphere collection pass
         # to build up the correct spheres
 
-        required_locations = {item for sphere in collection_spheres for item in sphere}
+        required_locations = PendingLocations(item for sphere in collection_spheres for item in sphere)
         state = CollectionState(multiworld)
         collection_spheres = []
         while required_locations:
             state.sweep_for_events(key_only=True)
 
-            sphere = set(filter(state.can_reach, required_locations))
+            sphere = required_locations.pop_reachable(state)
 
             for location in sphere:
                 state.collect(location.item, True, location)
@@ -1301,11 +1911,11 @@ class Spoiler:
             collection_spheres.append(sphere)
 
             logging.debug('Calculated final sphere %i, containing %i of %i progress items.', len(collection_spheres),
-                          len(sphere), len(required_locations))
+                          len(sphere), len(required_locations) + len(sphere))
 
-            required_locations -= sphere
             if not sphere:
-                raise RuntimeError(f'Not all required items reachable. Unreachable locations: {required_locations}')
+                raise RuntimeError(f'Not all required items reachable. '
+                                   f'Unreachable locations: {set(required_locations)}')
 
         # we can finally output our playthrough
         self.playthrough = {"0": sorted([self.multiworld.get_name_string_for_object(item) for item in
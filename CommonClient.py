@@ -23,7 +23,8 @@ if __name__ == "__main__":
 
 from MultiServer import CommandProcessor
 from NetUtils import (Endpoint, decode, NetworkItem, encode, JSONtoTextParser, ClientStatus, Permission, NetworkSlot,
-                      RawJSONtoTextParser, add_json_text, add_json_location, add_json_item, JSONTypes, SlotType)
+                      RawJSONtoTextParser, add_json_text, add_json_location, add_json_item, JSONTypes, SlotType,
+                      binary_protocol_available, binary_protocol_tag, decode_frame, encode_binary)
 from Utils import Version, stream_input, async_start
 from worlds import network_data_package, AutoWorldRegister
 import os
@@ -174,6 +175,8 @@ class CommonContext:
     game: typing.Optional[str] = None
     items_handling: typing.Optional[int] = None
     want_slot_data: bool = True  # should slot_data be retrieved via Connect
+    use_binary_protocol: bool = True  # use binary frames with servers that support them, see NetUtils.encode_binary
+    use_compression: bool = True  # offer permessage-deflate, disable to save CPU on fast or local connections
 
     class NameLookupDict:
         """A specialized dict, with helper methods, for id -> name item/location data package lookups by game."""
@@ -402,7 +405,7 @@ class CommonContext:
         """ `msgs` JSON serializable """
         if not self.server or not self.server.socket.open or self.server.socket.closed:
             return
-        await self.server.socket.send(encode(msgs))
+        await self.server.socket.send(encode_binary(msgs) if self.server.binary else encode(msgs))
 
     def consume_players_package(self, package: typing.List[tuple]):
         self.player_names = {slot: name for team, slot, name, orig_name in package if self.team == team}
@@ -695,6 +698,12 @@ async def keep_alive(ctx: CommonContext, seconds_between_checks=100):
                 seconds_elapsed = 0
 
 
+def get_server_address(server_url: urllib.parse.ParseResult) -> str:
+    """Returns the address to connect to from a parsed server url.
+    Keeps the path, as it names the room on servers hosting several rooms on one port."""
+    return server_url.netloc + server_url.path.rstrip("/")
+
+
 async def server_loop(ctx: CommonContext, address: typing.Optional[str] = None) -> None:
     if ctx.server and ctx.server.socket:
         logger.error('Already connected')
@@ -730,16 +739,17 @@ async def server_loop(ctx: CommonContext, address: typing.Optional[str] = None)
         port = server_url.port or 38281  # raises ValueError if invalid
         socket = await websockets.connect(address, port=port, ping_timeout=None, ping_interval=None,
                                           ssl=get_ssl_context() if address.startswith("wss://") else None,
-                                          max_size=ctx.max_size)
+                                          max_size=ctx.max_size,
+                                          compression="deflate" if ctx.use_compression else None)
         if ctx.ui is not None:
-            ctx.ui.update_address_bar(server_url.netloc)
+            ctx.ui.update_address_bar(get_server_address(server_url))
         ctx.server = Endpoint(socket)
         logger.info('Connected')
         ctx.server_address = address
         ctx.current_reconnect_delay = ctx.starting_reconnect_delay
         ctx.disconnected_intentionally = False
         async for data in ctx.server.socket:
-            for msg in decode(data):
+            for msg in decode_frame(data):
                 await process_server_cmd(ctx, msg)
         logger.warning(f"Disconnected from multiworld server{reconnect_hint()}")
     except websockets.InvalidMessage:
@@ -810,6 +820,13 @@ async def process_server_cmd(ctx: CommonContext, args: dict):
             ctx.hint_cost = int(args['hint_cost'])
             ctx.check_points = int(args['location_check_points'])
 
+            # ask for binary frames in Connect, and send them from now on
+            if ctx.use_binary_protocol and binary_protocol_available and binary_protocol_tag in args["tags"]:
+                ctx.tags = ctx.tags | {binary_protocol_tag}
+                ctx.server.binary = True
+            else:
+                ctx.tags = ctx.tags - {binary_protocol_tag}
+
             if "players" in args:  # TODO remove when servers sending this are outdated
                 players = args.get("players", [])
                 if len(players) < 1:
@@ -893,7 +910,7 @@ async def process_server_cmd(ctx: CommonContext, args: dict):
         ctx.server_locations = ctx.missing_locations | ctx. checked_locations
 
         server_url = urllib.parse.urlparse(ctx.server_address)
-        Utils.persistent_store("client", "last_server_address", server_url.netloc)
+        Utils.persistent_store("client", "last_server_address", get_server_address(server_url))
 
     elif cmd == 'ReceivedItems':
         start_index = args["index"]
@@ -1035,7 +1052,7 @@ def run_as_textclient():
 
     if args.url:
         url = urllib.parse.urlparse(args.url)
-        args.connect = url.netloc
+        args.connect = get_server_address(url)
         if url.username:
             args.name = urllib.parse.unquote(url.username)
         if url.password:
@@ -15,8 +15,9 @@ class FillError(RuntimeError):
     pass
 
 
-def _log_fill_progress(name: str, placed: int, total_items: int) -> None:
+def _log_fill_progress(multiworld: MultiWorld, name: str, placed: int, total_items: int) -> None:
     logging.info(f"Current fill step ({name}) at {placed}/{total_items} items placed.")
+    multiworld.progress.report_fill(name, placed, total_items)
 
 
 def sweep_from_pool(base_state: CollectionState, itempool: typing.Sequence[Item] = tuple(),
@@ -28,6 +29,23 @@ def sweep_from_pool(base_state: CollectionState, itempool: typing.Sequence[Item]
     return new_state
 
 
+def reaches_as_many(multiworld: MultiWorld, state: CollectionState, locations: typing.Sequence[Location]) -> bool:
+    """
+    Returns True if state can reach at least as many locations of the multiworld as there are in locations.
+    The given locations are checked first, so if state can still reach all of them, no other location gets checked.
+    """
+    required = len(locations)
+    reached = sum(1 for location in locations if location.can_reach(state))
+    if reached < required:
+        known = set(locations)
+        for location in multiworld.get_locations():
+            if location not in known and location.can_reach(state):
+                reached += 1
+                if reached >= required:
+                    break
+    return reached >= required
+
+
 def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locations: typing.List[Location],
                      item_pool: typing.List[Item], single_player_placement: bool = False, lock: bool = False,
                      swap: bool = True, on_place: typing.Optional[typing.Callable[[Location], None]] = None,
@@ -53,11 +71,18 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
     for item in item_pool:
         reachable_items.setdefault(item.player, deque()).append(item)
 
+    # with single player placement, only the item's player's locations have to be looked at
+    player_locations: typing.Dict[int, typing.List[Location]] = {}
+    if single_player_placement:
+        for location in locations:
+            player_locations.setdefault(location.player, []).append(location)
+
     # for progress logging
     total = min(len(item_pool), len(locations))
     placed = 0
 
     while any(reachable_items.values()) and locations:
+        multiworld.progress.check_cancelled()
         # grab one item per player
         items_to_place = [items.pop()
                           for items in reachable_items.values() if items]
@@ -89,12 +114,14 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
             else:
                 perform_access_check = True
 
-            for i, location in enumerate(locations):
-                if (not single_player_placement or location.player == item_to_place.player) \
-                        and location.can_fill(maximum_exploration_state, item_to_place, perform_access_check):
+            candidates = player_locations.get(item_to_place.player, []) if single_player_placement else locations
+            for i, location in enumerate(candidates):
+                if location.can_fill(maximum_exploration_state, item_to_place, perform_access_check):
                     # popping by index is faster than removing by content,
-                    spot_to_fill = locations.pop(i)
+                    spot_to_fill = candidates.pop(i)
                     # skipping a scan for the element
+                    if single_player_placement:
+                        locations.remove(spot_to_fill)
                     break
 
             else:
@@ -124,15 +151,10 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
                                 and location.can_fill(swap_state, item_to_place, perform_access_check):
 
                             # Verify placing this item won't reduce available locations, which would be a useless swap.
-                            prev_state = swap_state.copy()
-                            prev_loc_count = len(
-                                multiworld.get_reachable_locations(prev_state))
-
+                            prev_reachable = multiworld.get_reachable_locations(swap_state)
                             swap_state.collect(item_to_place, True)
-                            new_loc_count = len(
-                                multiworld.get_reachable_locations(swap_state))
 
-                            if new_loc_count >= prev_loc_count:
+                            if reaches_as_many(multiworld, swap_state, prev_reachable):
                                 # Add this item to the existing placement, and
                                 # add the old item to the back of the queue
                                 spot_to_fill = placements.pop(i)
@@ -165,12 +187,12 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
             placements.append(spot_to_fill)
             placed += 1
             if not placed % 1000:
-                _log_fill_progress(name, placed, total)
+                _log_fill_progress(multiworld, name, placed, total)
             if on_place:
                 on_place(spot_to_fill)
 
     if total > 1000:
-        _log_fill_progress(name, placed, total)
+        _log_fill_progress(multiworld, name, placed, total)
 
     if cleanup_required:
         # validate all placements and remove invalid ones
@@ -278,10 +300,10 @@ def remaining_fill(multiworld: MultiWorld,
         placements.append(spot_to_fill)
         placed += 1
         if not placed % 1000:
-            _log_fill_progress(name, placed, total)
+            _log_fill_progress(multiworld, name, placed, total)
 
     if total > 1000:
-        _log_fill_progress(name, placed, total)
+        _log_fill_progress(multiworld, name, placed, total)
 
     if unplaced_items and locations:
         # There are leftover unplaceable items and locations that won't accept them
@@ -657,6 +679,7 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
             return
 
         while True:
+            multiworld.progress.check_cancelled()
             # Gather non-locked locations.
             # This ensures that only shuffled locations get counted for progression balancing,
             #   i.e. the items the players will be checking.
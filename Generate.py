@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import argparse
+import concurrent.futures
 import copy
 import logging
 import os
@@ -10,7 +11,7 @@ import sys
 import urllib.parse
 import urllib.request
 from collections import Counter
-from typing import Any, Dict, Tuple, Union
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple, TypeVar, Union
 from itertools import chain
 
 import ModuleUpdate
@@ -52,6 +53,8 @@ def mystery_argparse():
     parser.add_argument("--skip_output", action="store_true",
                         help="Skips generation assertion and output stages and skips multidata and spoiler output. "
                              "Intended for debugging and testing purposes.")
+    parser.add_argument('--roll_workers', default=defaults.roll_workers, type=lambda value: max(int(value), 0),
+                        help="Number of processes to read and roll player files in, 0 to do it in this process.")
     args = parser.parse_args()
     if not os.path.isabs(args.weights_file_path):
         args.weights_file_path = os.path.join(args.player_files_path, args.weights_file_path)
@@ -82,6 +85,9 @@ def main(args=None) -> Tuple[argparse.Namespace, int]:
     if args.race:
         logging.info("Race mode enabled. Using non-deterministic random source.")
         random.seed()  # reset to time-based random source
+        roll_seed = random.getrandbits(64)
+    else:
+        roll_seed = seed
 
     weights_cache: Dict[str, Tuple[Any, ...]] = {}
     if args.weights_file_path and os.path.exists(args.weights_file_path):
@@ -108,15 +114,17 @@ def main(args=None) -> Tuple[argparse.Namespace, int]:
         meta_weights = None
     player_id = 1
     player_files = {}
+    player_file_paths: Dict[str, Tuple[str]] = {}
     for file in os.scandir(args.player_files_path):
         fname = file.name
         if file.is_file() and not fname.startswith(".") and \
                 os.path.join(args.player_files_path, fname) not in {args.meta_file_path, args.weights_file_path}:
-            path = os.path.join(args.player_files_path, fname)
-            try:
-                weights_cache[fname] = read_weights_yamls(path)
-            except Exception as e:
-                raise ValueError(f"File {fname} is invalid. Please fix your yaml.") from e
+            player_file_paths[fname] = (os.path.join(args.player_files_path, fname),)
+    player_weights, file_errors = map_files(read_weights_yamls, player_file_paths, args.roll_workers)
+    if not player_weights:
+        raise_file_errors(file_errors)
+    # files that failed to read are reported together with the ones that fail to roll
+    weights_cache.update(player_weights)
 
     # sort dict for consistent results across platforms:
     weights_cache = {key: value for key, value in sorted(weights_cache.items(), key=lambda k: k[0].casefold())}
@@ -144,6 +152,17 @@ def main(args=None) -> Tuple[argparse.Namespace, int]:
                         f"Provide a general weights file ({args.weights_file_path}) or individual player files. "
                         f"A mix is also permitted.")
 
+    if "worlds" not in sys.modules:
+        from world_manifest import load_manifest, restrict_world_loading
+        manifest = load_manifest()
+        if manifest:
+            yamls = chain.from_iterable(weights_cache.values())
+            games = get_referenced_games(chain(yamls, [meta_weights]) if meta_weights else yamls,
+                                         manifest["games"].keys())
+            if games is not None:
+                logging.info(f"Loading worlds of {len(games)} referenced game{'s' if len(games) != 1 else ''}")
+                restrict_world_loading(games)
+
     from worlds.AutoWorld import AutoWorldRegister
     from worlds.alttp.EntranceRandomizer import parse_arguments
     erargs = parse_arguments(['--multi', str(args.multi)])
@@ -156,10 +175,6 @@ def main(args=None) -> Tuple[argparse.Namespace, int]:
     erargs.skip_prog_balancing = args.skip_prog_balancing
     erargs.skip_output = args.skip_output
 
-    settings_cache: Dict[str, Tuple[argparse.Namespace, ...]] = \
-        {fname: (tuple(roll_settings(yaml, args.plando) for yaml in yamls) if args.sameoptions else None)
-         for fname, yamls in weights_cache.items()}
-
     if meta_weights:
         for category_name, category_dict in meta_weights.items():
             for key in category_dict:
@@ -180,6 +195,30 @@ def main(args=None) -> Tuple[argparse.Namespace, int]:
     player_path_cache = {}
     for player in range(1, args.multi + 1):
         player_path_cache[player] = player_files.get(player, args.weights_file_path)
+
+    # each use of a weights file gets its players rolled together, in order, or with sameoptions only its first use
+    roll_starts: Dict[int, str] = {}
+    player = 1
+    while player <= args.multi:
+        path = player_path_cache[player]
+        if not path or not weights_cache.get(path):
+            raise RuntimeError(f'No weights specified for player {player}')
+        if not args.sameoptions or path not in roll_starts.values():
+            roll_starts[player] = path
+        player += len(weights_cache[path])
+
+    from world_manifest import load_only
+    rolled_settings, errors = map_files(
+        roll_player_settings,
+        {(path, first_player): (weights_cache[path], args.plando, roll_seed, first_player, load_only)
+         for first_player, path in roll_starts.items()},
+        args.roll_workers)
+    for (path, first_player), error in errors.items():
+        file_errors.setdefault(path, error)
+    raise_file_errors(file_errors)
+    settings_cache: Dict[str, Tuple[argparse.Namespace, ...]] = \
+        {path: settings for (path, first_player), settings in rolled_settings.items()}
+
     name_counter = Counter()
     erargs.player_options = {}
 
@@ -188,8 +227,8 @@ def main(args=None) -> Tuple[argparse.Namespace, int]:
         path = player_path_cache[player]
         if path:
             try:
-                settings: Tuple[argparse.Namespace, ...] = settings_cache[path] if settings_cache[path] else \
-                    tuple(roll_settings(yaml, args.plando) for yaml in weights_cache[path])
+                settings: Tuple[argparse.Namespace, ...] = rolled_settings[path, player] \
+                    if (path, player) in rolled_settings else settings_cache[path]
                 for settingsObject in settings:
                     for k, v in vars(settingsObject).items():
                         if v is not None:
@@ -253,6 +292,85 @@ def read_weights_yamls(path) -> Tuple[Any, ...]:
     return tuple(parse_yamls(yaml))
 
 
+FileKey = TypeVar("FileKey")
+FileResult = TypeVar("FileResult")
+
+
+def map_files(function: Callable[..., FileResult], arguments: Dict[FileKey, Tuple[Any, ...]], workers: int = 0) \
+        -> Tuple[Dict[FileKey, FileResult], Dict[FileKey, Exception]]:
+    """Calls function with the arguments of every file, in up to workers processes if not 0.
+    Returns the results and the exceptions raised by file, so all broken files can be reported at once."""
+    results: Dict[FileKey, FileResult] = {}
+    errors: Dict[FileKey, Exception] = {}
+    if workers and len(arguments) > 1:
+        # a new pool each time, so on platforms that fork, workers start with the worlds already loaded here
+        with concurrent.futures.ProcessPoolExecutor(min(workers, len(arguments))) as pool:
+            futures = {key: pool.submit(function, *args) for key, args in arguments.items()}
+            for key, future in futures.items():
+                try:
+                    results[key] = future.result()
+                except Exception as e:
+                    errors[key] = e
+    else:
+        for key, args in arguments.items():
+            try:
+                results[key] = function(*args)
+            except Exception as e:
+                errors[key] = e
+    return results, errors
+
+
+def raise_file_errors(errors: Dict[str, Exception]) -> None:
+    if len(errors) == 1:
+        fname, error = next(iter(errors.items()))
+        raise ValueError(f"File {fname} is invalid. Please fix your yaml.") from error
+    elif errors:
+        for fname, error in errors.items():
+            logging.error(f"File {fname} is invalid: {error}", exc_info=error)
+        raise ValueError(f"Files {', '.join(errors)} are invalid. Please fix your yamls.") \
+            from next(iter(errors.values()))
+
+
+def roll_player_settings(yamls: Tuple[Any, ...], plando_options: PlandoOptions, seed: int, first_player: int,
+                         games: Optional[Set[str]] = None) -> Tuple[argparse.Namespace, ...]:
+    """Rolls the yamls of a weights file for the players starting at first_player. Each roll is seeded from seed and
+    its player, so results don't depend on the order or the process files are rolled in.
+    If worlds isn't loaded yet, only the worlds of games are loaded, see world_manifest.restrict_world_loading."""
+    if games is not None and "worlds" not in sys.modules:
+        from world_manifest import restrict_world_loading
+        restrict_world_loading(games)
+    settings = []
+    for player, yaml in enumerate(yamls, first_player):
+        random.seed(f"{seed}:{player}")
+        settings.append(roll_settings(yaml, plando_options))
+    return tuple(settings)
+
+
+def get_referenced_games(yamls: Iterable[Any], known_games: Iterable[str]) -> Optional[Set[str]]:
+    """Returns every game the yamls could roll, including through triggers and linked options,
+    or None if that can't be told without rolling them."""
+    known_games = set(known_games)
+    games: Set[str] = set()
+    to_check = list(yamls)
+    while to_check:
+        node = to_check.pop()
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key == "game":
+                    if isinstance(value, str):
+                        games.add(value)
+                    elif isinstance(value, dict):
+                        games.update(value)
+                    else:
+                        return None
+                elif key in known_games:
+                    games.add(key)
+                to_check.append(value)
+        elif isinstance(node, list):
+            to_check.extend(node)
+    return games
+
+
 def interpret_on_off(value) -> bool:
     return {"on": True, "off": False}.get(value, value)
 
@@ -544,6 +662,7 @@ def roll_alttp_settings(ret: argparse.Namespace, weights):
 
 
 if __name__ == '__main__':
+    Utils.freeze_support()  # roll_workers start processes
     import atexit
     confirmation = atexit.register(input, "Press enter to close.")
     erargs, seed = main()
@@ -2,15 +2,14 @@ import collections
 import concurrent.futures
 import logging
 import os
-import pickle
 import tempfile
 import time
 import zipfile
-import zlib
 from typing import Dict, List, Optional, Set, Tuple, Union
 
+import Utils
 import worlds
-from BaseClasses import CollectionState, Item, Location, LocationProgressType, MultiWorld, Region
+from BaseClasses import CollectionState, GenerationProgress, Item, Location, LocationProgressType, MultiWorld, Region
 from Fill import balance_multiworld_progression, distribute_items_restrictive, distribute_planned, flood_items
 from Options import StartInventoryPool
 from Utils import __version__, output_path, version_tuple, get_settings
@@ -21,10 +20,17 @@ from worlds.generic.Rules import exclusion_rules, locality_rules
 __all__ = ["main"]
 
 
-def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = None):
+def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = None,
+         progress: Optional[GenerationProgress] = None):
+    """Generates a multiworld from args. If progress is given, it receives the stages and fill counters of the
+    generation, and cancelling it aborts the generation with BaseClasses.GenerationCancelled."""
     if not baked_server_options:
         baked_server_options = get_settings().server_options.as_dict()
     assert isinstance(baked_server_options, dict)
+    multidata_compression = get_settings().generator.multidata_compression
+    if multidata_compression not in Utils.multidata_compressors:
+        raise ValueError(f"Unknown generator multidata_compression \"{multidata_compression}\" in host.yaml, "
+                         f"allowed values are: {', '.join(Utils.multidata_compressors)}")
     if args.outputpath:
         os.makedirs(args.outputpath, exist_ok=True)
         output_path.cached_path = args.outputpath
@@ -32,6 +38,8 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
     start = time.perf_counter()
     # initialize the multiworld
     multiworld = MultiWorld(args.multi)
+    if progress:
+        multiworld.progress = progress
 
     logger = logging.getLogger()
     multiworld.set_seed(seed, args.race, str(args.outputname) if args.outputname else None)
@@ -260,6 +268,7 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
         multiworld._all_state = None
 
     logger.info("Running Item Plando.")
+    multiworld.progress.report_stage("item_plando")
 
     distribute_planned(multiworld)
 
@@ -268,6 +277,7 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
     AutoWorld.call_all(multiworld, "pre_fill")
 
     logger.info(f'Filling the multiworld with {len(multiworld.itempool)} items.')
+    multiworld.progress.report_stage("fill")
 
     if multiworld.algorithm == 'flood':
         flood_items(multiworld)  # different algo, biased towards early game progress items
@@ -277,6 +287,7 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
     AutoWorld.call_all(multiworld, 'post_fill')
 
     if multiworld.players > 1 and not args.skip_prog_balancing:
+        multiworld.progress.report_stage("progression_balancing")
         balance_multiworld_progression(multiworld)
     else:
         logger.info("Progression balancing skipped.")
@@ -289,6 +300,7 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
         return multiworld
 
     logger.info(f'Beginning output...')
+    multiworld.progress.report_stage("output")
     outfilebase = 'AP_' + multiworld.seed_name
 
     output = tempfile.TemporaryDirectory()
@@ -402,11 +414,8 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
                 }
                 AutoWorld.call_all(multiworld, "modify_multidata", multidata)
 
-                multidata = zlib.compress(pickle.dumps(multidata), 9)
-
                 with open(os.path.join(temp_dir, f'{outfilebase}.archipelago'), 'wb') as f:
-                    f.write(bytes([3]))  # version of format
-                    f.write(multidata)
+                    Utils.write_multidata(f, multidata, multidata_compression)
 
             output_file_futures.append(pool.submit(write_multidata))
             if not check_accessibility_task.result():
@@ -423,6 +432,7 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
 
         if args.spoiler > 1:
             logger.info('Calculating playthrough.')
+            multiworld.progress.report_stage("playthrough")
             multiworld.spoiler.create_playthrough(create_paths=args.spoiler > 2)
 
         if args.spoiler:
@@ -433,7 +443,9 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
         with zipfile.ZipFile(zipfilename, mode="w", compression=zipfile.ZIP_DEFLATED,
                              compresslevel=9) as zf:
             for file in os.scandir(temp_dir):
-                zf.write(file.path, arcname=file.name)
+                # multidata is compressed already
+                compress_type = zipfile.ZIP_STORED if file.name.endswith(".archipelago") else None
+                zf.write(file.path, arcname=file.name, compress_type=compress_type)
 
     logger.info('Done. Enjoy. Total Time: %s', time.perf_counter() - start)
     return multiworld
@@ -15,6 +15,7 @@ import math
 import operator
 import pickle
 import random
+import struct
 import threading
 import time
 import typing
@@ -30,6 +31,9 @@ if typing.TYPE_CHECKING:
 
 import websockets
 import colorama
+from websockets.extensions import ServerExtensionFactory
+from websockets.extensions.permessage_deflate import PerMessageDeflate, ServerPerMessageDeflateFactory
+from websockets.frames import CTRL_OPCODES, Frame, Opcode
 try:
     # ponyorm is a requirement for webhost, not default server, so may not be importable
     from pony.orm.dbapiprovider import OperationalError
@@ -40,7 +44,7 @@ import NetUtils
 import Utils
 from Utils import version_tuple, restricted_loads, Version, async_start, get_intended_text
 from NetUtils import Endpoint, ClientStatus, NetworkItem, decode, encode, NetworkPlayer, Permission, NetworkSlot, \
-    SlotType, LocationStore
+    SlotType, LocationStore, binary_protocol_available, binary_protocol_tag, decode_frame, encode_binary
 
 min_client_version = Version(0, 1, 6)
 colorama.init()
@@ -100,6 +104,183 @@ def get_saving_second(seed_name: str, interval: int = 60) -> int:
     return int(hashlib.sha256(seed_name.encode()).hexdigest(), 16) % interval
 
 
+save_file_magic = b"APSAVE"
+"""start of .apsave files in the journaled format, which previously were a zlib compressed pickle"""
+
+
+class SaveJournal:
+    """
+    Tracks which parts of a save were written already, so that a save only has to write what changed since.
+    Where the state of a room is changed, changed() marks the section of the save, or the key in it, that changed.
+    Received items and location checks only grow, so only their new entries are written.
+    Changes are written as records after a snapshot of the whole save, until they outgrow the snapshot.
+    """
+    keyed_sections: typing.ClassVar[typing.FrozenSet[str]] = frozenset(
+        ("received_items", "location_checks", "hints", "stored_data"))
+    """sections of the save that are marked as changed by key"""
+    snapshot_size: int
+    """size of the last snapshot written, 0 if the next save has to write one"""
+    journal_size: int
+    """size of the records written after the last snapshot"""
+    changed_sections: typing.Set[str]
+    """sections of the save changed since the last save, other than keyed_sections"""
+    changed_keys: typing.Dict[str, typing.Set[typing.Any]]
+    """keys changed since the last save, by name of their section in keyed_sections"""
+    lock: threading.Lock
+    """held while saving, as two saves writing the same changes would duplicate them"""
+    _received_items_lengths: typing.Dict[typing.Tuple[int, int, bool], int]
+    _location_checks: typing.Dict[typing.Tuple[int, int], typing.FrozenSet[int]]
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Forgets what was written, so the next save writes a snapshot."""
+        self.snapshot_size = 0
+        self.journal_size = 0
+        self.changed_sections = set()
+        self.changed_keys = {}
+        self._received_items_lengths = {}
+        self._location_checks = {}
+
+    @property
+    def needs_snapshot(self) -> bool:
+        return not self.snapshot_size or self.journal_size > self.snapshot_size
+
+    def changed(self, section: str, key: typing.Any = None) -> None:
+        """Marks a section of the save as changed. Sections in keyed_sections are marked by the key that changed."""
+        if section in self.keyed_sections:
+            self.changed_keys.setdefault(section, set()).add(key)
+        else:
+            self.changed_sections.add(section)
+
+    def get_changes(self, get_save: typing.Callable[[typing.Optional[typing.AbstractSet[str]]],
+                                                    typing.Dict[str, typing.Any]]) -> typing.Dict[str, typing.Any]:
+        """
+        Returns the parts of the save that were not written yet, to be applied with apply_save_changes.
+        get_save is called with the names of the sections to return, or None for all of them.
+        Without a snapshot, the changes are a copy of the whole save.
+        """
+        changed_keys, self.changed_keys = self.changed_keys, {}
+        changed_sections, self.changed_sections = self.changed_sections, set()
+        snapshot = not self.snapshot_size
+        if snapshot:
+            savedata = get_save(None)
+            changed_keys = {name: savedata[name].keys() for name in self.keyed_sections}
+        else:
+            savedata = get_save(changed_sections | changed_keys.keys())
+        changes = {name: value for name, value in savedata.items() if name not in self.keyed_sections}
+
+        for name, keys in changed_keys.items():
+            section = savedata[name]
+            if name == "received_items":
+                value = {}
+                for key in keys:
+                    items = section.get(key, ())
+                    written = self._received_items_lengths.get(key, 0)
+                    if len(items) > written:
+                        value[key] = items[written:]
+            elif name == "location_checks":
+                value = {}
+                for key in keys:
+                    checks = section.get(key, set()) - self._location_checks.get(key, frozenset())
+                    if checks:
+                        value[key] = checks
+            elif name == "hints":
+                value = {key: set(section[key]) for key in keys if key in section}
+            else:
+                value = {key: section[key] for key in keys if key in section}
+            if value or snapshot:
+                changes[name] = value
+        return changes
+
+    def written(self, changes: typing.Dict[str, typing.Any], size: int) -> None:
+        """Remembers changes, returned by get_changes, as written. size is how many bytes writing them took."""
+        if self.snapshot_size:
+            self.journal_size += size
+        else:
+            self.snapshot_size = size
+        for key, items in changes.get("received_items", {}).items():
+            self._received_items_lengths[key] = self._received_items_lengths.get(key, 0) + len(items)
+        for key, checks in changes.get("location_checks", {}).items():
+            self._location_checks[key] = self._location_checks.get(key, frozenset()) | checks
+
+
+def apply_save_changes(savedata: typing.Dict[str, typing.Any], changes: typing.Dict[str, typing.Any]) -> None:
+    """Applies changes, as returned by SaveJournal.get_changes, to savedata."""
+    for name, value in changes.items():
+        if name == "received_items":
+            for key, items in value.items():
+                savedata[name].setdefault(key, []).extend(items)
+        elif name == "location_checks":
+            for key, checks in value.items():
+                savedata[name].setdefault(key, set()).update(checks)
+        elif name in ("hints", "stored_data"):
+            savedata[name].update(value)
+        else:
+            savedata[name] = value
+
+
+def encode_save_record(changes: typing.Dict[str, typing.Any]) -> bytes:
+    """Encodes a snapshot or journal record of a .apsave file."""
+    data = zlib.compress(pickle.dumps(changes))
+    return struct.pack("<I", len(data)) + data
+
+
+def decode_save_journal(snapshot: bytes, journal: typing.Iterable[bytes]) -> typing.Dict[str, typing.Any]:
+    """Decodes a pickled snapshot of a save and applies the pickled changes of its journal to it."""
+    savedata = restricted_loads(snapshot)
+    for changes in journal:
+        apply_save_changes(savedata, restricted_loads(changes))
+    return savedata
+
+
+def decode_save_file(data: bytes) -> typing.Dict[str, typing.Any]:
+    """
+    Decodes a .apsave file, applying its journal records to its snapshot.
+    A record cut short, by the server stopping while writing it, is ignored.
+    """
+    if not data.startswith(save_file_magic):
+        return restricted_loads(zlib.decompress(data))
+    savedata: typing.Optional[typing.Dict[str, typing.Any]] = None
+    position = len(save_file_magic)
+    while position + 4 <= len(data):
+        size, = struct.unpack_from("<I", data, position)
+        position += 4
+        if position + size > len(data):
+            break
+        changes = restricted_loads(zlib.decompress(data[position:position + size]))
+        position += size
+        if savedata is None:
+            savedata = changes
+        else:
+            apply_save_changes(savedata, changes)
+    if savedata is None:
+        raise ValueError("Save file does not contain a snapshot.")
+    return savedata
+
+
+encoded_game_data: typing.OrderedDict[typing.Tuple[str, bool], typing.Union[str, bytes]] = collections.OrderedDict()
+"""game data of DataPackage by checksum and binary protocol, encoded once for all Contexts of the process"""
+encoded_game_data_limit = 256
+
+
+def get_encoded_game_data(game_data: typing.Dict[str, typing.Any], binary: bool) -> typing.Union[str, bytes]:
+    """Returns the encoded game data, from encoded_game_data if it has a checksum."""
+    checksum = game_data.get("checksum")
+    if checksum is None:
+        return encode_binary(game_data) if binary else encode(game_data)
+    encoded = encoded_game_data.get((checksum, binary))
+    if encoded is None:
+        encoded = encoded_game_data[checksum, binary] = encode_binary(game_data) if binary else encode(game_data)
+        if len(encoded_game_data) > encoded_game_data_limit:
+            encoded_game_data.popitem(last=False)
+    else:
+        encoded_game_data.move_to_end((checksum, binary))
+    return encoded
+
+
 class Client(Endpoint):
     version = Version(0, 0, 0)
     tags: typing.List[str] = []
@@ -118,6 +299,10 @@ class Client(Endpoint):
         self.messageprocessor = client_message_processor(ctx, self)
         self.ctx = weakref.ref(ctx)
 
+    @property
+    def binary(self) -> bool:
+        return binary_protocol_available and binary_protocol_tag in self.tags
+
     @property
     def items_handling(self):
         if self.no_items:
@@ -143,8 +328,32 @@ class Client(Endpoint):
 team_slot = typing.Tuple[int, int]
 
 
+class _DeferredAttribute:
+    """Context attribute that is only decoded from the multidata when it is first accessed, see Context.load."""
+    name: str
+
+    def __set_name__(self, owner: typing.Type[Context], name: str) -> None:
+        self.name = name
+
+    def __get__(self, ctx: typing.Optional[Context], owner: typing.Type[Context]) -> typing.Any:
+        if ctx is None:
+            return self
+        loader = ctx.deferred_attributes.pop(self.name, None)
+        if loader:
+            ctx.__dict__[self.name] = loader()
+        try:
+            return ctx.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(f"'{owner.__name__}' object has no attribute '{self.name}'") from None
+
+    def __set__(self, ctx: Context, value: typing.Any) -> None:
+        ctx.deferred_attributes.pop(self.name, None)
+        ctx.__dict__[self.name] = value
+
+
 class Context:
     dumper = staticmethod(encode)
+    binary_dumper = staticmethod(encode_binary)
     loader = staticmethod(decode)
 
     simple_options = {"hint_cost": int,
@@ -163,6 +372,7 @@ class Context:
     hints_used: typing.Dict[typing.Tuple[int, int], int]
     groups: typing.Dict[int, typing.Set[int]]
     save_version = 2
+    save_journal: SaveJournal
     stored_data: typing.Dict[str, object]
     read_data: typing.Dict[str, object]
     stored_data_notification_clients: typing.Dict[str, typing.Set[Client]]
@@ -178,8 +388,14 @@ class Context:
     all_item_and_group_names: typing.Dict[str, typing.Set[str]]
     all_location_and_group_names: typing.Dict[str, typing.Set[str]]
     non_hintable_names: typing.Dict[str, typing.AbstractSet[str]]
+    slot_data: typing.Dict[int, typing.Any] = _DeferredAttribute()  # type: ignore[assignment]
+    er_hint_data: typing.Dict[int, typing.Dict[int, str]] = _DeferredAttribute()  # type: ignore[assignment]
+    deferred_attributes: typing.Dict[str, typing.Callable[[], typing.Any]]
+    """loaders of attributes that were not decoded yet"""
     spheres: typing.List[typing.Dict[int, typing.Set[int]]]
     """ each sphere is { player: { location_id, ... } } """
+    sphere_index: typing.Dict[int, typing.Dict[int, int]]
+    """player -> location_id -> sphere"""
     logger: logging.Logger
 
 
@@ -189,9 +405,13 @@ class Context:
                  log_network: bool = False, logger: logging.Logger = logging.getLogger()):
         self.logger = logger
         super(Context, self).__init__()
+        self.deferred_attributes = {}
         self.slot_info = {}
         self.log_network = log_network
         self.endpoints = []
+        self.client_messages = 0  # number of commands received from clients, for load reporting
+        self.outbox: typing.Dict[Endpoint, typing.List[dict]] = {}
+        self._outbox_flush_scheduled = False
         self.clients = {}
         self.compatibility: int = compatibility
         self.shutdown_task = None
@@ -216,6 +436,9 @@ class Context:
         self.location_check_points = location_check_points
         self.hints_used = collections.defaultdict(int)
         self.hints: typing.Dict[team_slot, typing.Set[NetUtils.Hint]] = collections.defaultdict(set)
+        # (team, finding player, location) -> (slot, hint) for hints in self.hints that are not found yet
+        self.unfound_hints: typing.Dict[typing.Tuple[int, int, int], typing.Set[typing.Tuple[int, NetUtils.Hint]]] = \
+            collections.defaultdict(set)
         self.release_mode: str = release_mode
         self.remaining_mode: str = remaining_mode
         self.collect_mode: str = collect_mode
@@ -226,7 +449,8 @@ class Context:
         self.client_connection_timers: typing.Dict[
             team_slot, datetime.datetime] = {}  # datetime of last connection
         self.client_game_state: typing.Dict[team_slot, int] = collections.defaultdict(int)
-        self.er_hint_data: typing.Dict[int, typing.Dict[int, str]] = {}
+        self.save_journal = SaveJournal()
+        self.er_hint_data = {}
         self.auto_shutdown = auto_shutdown
         self.commandprocessor = ServerCommandProcessor(self)
         self.embedded_blacklist = {"host", "port"}
@@ -245,6 +469,9 @@ class Context:
         self.stored_data_notification_clients = collections.defaultdict(weakref.WeakSet)
         self.read_data = {}
         self.spheres = []
+        self.sphere_index = {}
+        self.room_info_games = {"Archipelago"}
+        self.room_info_checksums = {}
 
         # init empty to satisfy linter, I suppose
         self.gamespackage = {}
@@ -270,9 +497,9 @@ class Context:
             self.non_hintable_names[world_name] = world.hint_blacklist
 
         for game_package in self.gamespackage.values():
-            # remove groups from data sent to clients
-            del game_package["item_name_groups"]
-            del game_package["location_name_groups"]
+            # remove groups from data sent to clients, which a previous Context in this process may have done already
+            game_package.pop("item_name_groups", None)
+            game_package.pop("location_name_groups", None)
 
     def _init_game_data(self):
         for game_name, game_package in self.gamespackage.items():
@@ -304,7 +531,9 @@ class Context:
     async def send_msgs(self, endpoint: Endpoint, msgs: typing.Iterable[dict]) -> bool:
         if not endpoint.socket or not endpoint.socket.open:
             return False
-        msg = self.dumper(msgs)
+        if endpoint in self.outbox:
+            self.flush_outbox()  # keep messages in order
+        msg = self.binary_dumper(msgs) if endpoint.binary else self.dumper(msgs)
         try:
             await endpoint.socket.send(msg)
         except websockets.ConnectionClosed:
@@ -316,9 +545,11 @@ class Context:
                 self.logger.info(f"Outgoing message: {msg}")
             return True
 
-    async def send_encoded_msgs(self, endpoint: Endpoint, msg: str) -> bool:
+    async def send_encoded_msgs(self, endpoint: Endpoint, msg: typing.Union[str, bytes]) -> bool:
         if not endpoint.socket or not endpoint.socket.open:
             return False
+        if endpoint in self.outbox:
+            self.flush_outbox()  # keep messages in order
         try:
             await endpoint.socket.send(msg)
         except websockets.ConnectionClosed:
@@ -345,23 +576,83 @@ class Context:
                 self.logger.info(f"Outgoing broadcast: {msg}")
             return True
 
+    def encode_data_package(self, games: typing.Iterable[str], binary: bool = False) -> typing.Union[str, bytes]:
+        """Returns a DataPackage command for the games, encoded as a list of messages. Each game is only encoded once
+        per process, see get_encoded_game_data."""
+        if binary:
+            return b'[{"cmd":"DataPackage","data":{"games":{' + b",".join(
+                self.binary_dumper(game) + b":" + get_encoded_game_data(self.gamespackage[game], True)
+                for game in games) + b"}}}]"
+        return '[{"cmd":"DataPackage","data":{"games":{' + ",".join(
+            self.dumper(game) + ":" + get_encoded_game_data(self.gamespackage[game], False)
+            for game in games) + "}}}]"
+
+    def queue_msgs(self, endpoints: typing.Iterable[Endpoint], msgs: typing.List[dict]):
+        """
+        Queues msgs for the endpoints, to be sent at the end of this event loop iteration. Everything queued for an
+        endpoint until then is sent as one frame, with a RoomUpdate or ReceivedItems merged into an earlier one.
+        """
+        for endpoint in endpoints:
+            queued = self.outbox.setdefault(endpoint, [])
+            for msg in msgs:
+                self._queue_msg(queued, msg)
+        if self.outbox and not self._outbox_flush_scheduled:
+            self._outbox_flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self.flush_outbox)
+
+    @staticmethod
+    def _queue_msg(queued: typing.List[dict], msg: dict):
+        cmd = msg["cmd"]
+        if cmd in ("RoomUpdate", "ReceivedItems"):
+            for index in range(len(queued) - 1, -1, -1):
+                if queued[index]["cmd"] == cmd:
+                    merged = merge_msgs(queued[index], msg)
+                    if merged:
+                        queued[index] = merged
+                        return
+                    break
+        queued.append(msg)
+
+    def flush_outbox(self):
+        """Sends everything queued by queue_msgs. Endpoints that got the same messages share one encoded frame."""
+        self._outbox_flush_scheduled = False
+        outbox, self.outbox = self.outbox, {}
+        encoded: typing.Dict[typing.Tuple[int, bool], typing.Union[str, bytes]] = {}
+        frames: typing.Dict[typing.Tuple[bool, typing.Tuple[int, ...]],
+                            typing.List[websockets.WebSocketServerProtocol]] = {}
+        for endpoint, msgs in outbox.items():
+            if msgs and endpoint.socket and endpoint.socket.open:
+                binary = endpoint.binary
+                dumper = self.binary_dumper if binary else self.dumper
+                for msg in msgs:
+                    if (id(msg), binary) not in encoded:
+                        encoded[id(msg), binary] = dumper([msg])[1:-1]  # strip the brackets of the list
+                frames.setdefault((binary, tuple(id(msg) for msg in msgs)), []).append(endpoint.socket)
+        for (binary, msg_ids), sockets in frames.items():
+            parts = [encoded[msg_id, binary] for msg_id in msg_ids]
+            frame = b"[" + b",".join(parts) + b"]" if binary else "[" + ",".join(parts) + "]"
+            try:
+                websockets.broadcast(sockets, frame)
+            except RuntimeError:
+                self.logger.exception("Exception during flush_outbox")
+            else:
+                if self.log_network:
+                    self.logger.info(f"Outgoing broadcast: {frame}")
+
     def broadcast_all(self, msgs: typing.List[dict]):
-        msgs = self.dumper(msgs)
         endpoints = (endpoint for endpoint in self.endpoints if endpoint.auth)
-        async_start(self.broadcast_send_encoded_msgs(endpoints, msgs))
+        self.queue_msgs(endpoints, msgs)
 
     def broadcast_text_all(self, text: str, additional_arguments: dict = {}):
         self.logger.info("Notice (all): %s" % text)
         self.broadcast_all([{**{"cmd": "PrintJSON", "data": [{ "text": text }]}, **additional_arguments}])
 
     def broadcast_team(self, team: int, msgs: typing.List[dict]):
-        msgs = self.dumper(msgs)
         endpoints = (endpoint for endpoint in itertools.chain.from_iterable(self.clients[team].values()))
-        async_start(self.broadcast_send_encoded_msgs(endpoints, msgs))
+        self.queue_msgs(endpoints, msgs)
 
     def broadcast(self, endpoints: typing.Iterable[Client], msgs: typing.List[dict]):
-        msgs = self.dumper(msgs)
-        async_start(self.broadcast_send_encoded_msgs(endpoints, msgs))
+        self.queue_msgs(endpoints, msgs)
 
     async def disconnect(self, endpoint: Client):
         if endpoint in self.endpoints:
@@ -384,31 +675,48 @@ class Context:
                                     for text in texts]))
 
     # loading
-    def load(self, multidatapath: str, use_embedded_server_options: bool = False):
+    def load(self, multidatapath: str, use_embedded_server_options: bool = False, lazy: bool = False):
+        """
+        Loads a .archipelago file, or the one in a .zip.
+        If lazy, the file is memory-mapped if it is stored uncompressed, and slot data and entrance hint data are only
+        decoded once they are first needed.
+        """
         if multidatapath.lower().endswith(".zip"):
             import zipfile
             with zipfile.ZipFile(multidatapath) as zf:
-                for file in zf.namelist():
-                    if file.endswith(".archipelago"):
-                        data = zf.read(file)
+                for info in zf.infolist():
+                    if info.filename.endswith(".archipelago"):
+                        if lazy and info.compress_type == zipfile.ZIP_STORED:
+                            # the local file header is followed by the file name and extra field
+                            header = Utils.map_file(multidatapath, info.header_offset, 30)
+                            name_length, extra_length = struct.unpack_from("<HH", header, 26)
+                            data = Utils.map_file(multidatapath, info.header_offset + 30 + name_length + extra_length,
+                                                  info.file_size)
+                        else:
+                            data = zf.read(info)
                         break
                 else:
                     raise Exception("No .archipelago found in archive.")
+        elif lazy:
+            data = Utils.map_file(multidatapath)
         else:
             with open(multidatapath, 'rb') as f:
                 data = f.read()
 
-        self._load(self.decompress(data), {}, use_embedded_server_options)
+        self._load(self.decompress(data, lazy), {}, use_embedded_server_options)
         self.data_filename = multidatapath
 
     @staticmethod
-    def decompress(data: bytes) -> dict:
+    def decompress(data: typing.Union[bytes, memoryview], lazy: bool = False) -> typing.Mapping[str, typing.Any]:
+        """Decodes multidata. If lazy, sections are only decoded when they are accessed, if the format allows it."""
         format_version = data[0]
-        if format_version > 3:
+        if format_version > Utils.multidata_format_version:
             raise Utils.VersionException("Incompatible multidata.")
+        if format_version == Utils.multidata_format_version:
+            return Utils.MultidataSections(data) if lazy else Utils.read_multidata(data)
         return restricted_loads(zlib.decompress(data[1:]))
 
-    def _load(self, decoded_obj: dict, game_data_packages: typing.Dict[str, typing.Any],
+    def _load(self, decoded_obj: typing.Mapping[str, typing.Any], game_data_packages: typing.Dict[str, typing.Any],
               use_embedded_server_options: bool):
 
         self.read_data = {}
@@ -445,24 +753,31 @@ class Context:
         self.random.seed(self.seed_name)
         self.connect_names = decoded_obj['connect_names']
         self.locations = LocationStore(decoded_obj.pop("locations"))  # pre-emptively free memory
-        self.slot_data = decoded_obj['slot_data']
-        for slot, data in self.slot_data.items():
-            self.read_data[f"slot_data_{slot}"] = lambda data=data: data
-        self.er_hint_data = {int(player): {int(address): name for address, name in loc_data.items()}
-                             for player, loc_data in decoded_obj["er_hint_data"].items()}
+        if isinstance(decoded_obj, Utils.MultidataSections):
+            # the loaders only keep their own section alive, so the rest of the multidata is freed after loading
+            self.deferred_attributes["slot_data"] = decoded_obj.loader("slot_data")
+            er_hint_data_loader = decoded_obj.loader("er_hint_data")
+            self.deferred_attributes["er_hint_data"] = lambda: self._decode_er_hint_data(er_hint_data_loader())
+        else:
+            self.slot_data = decoded_obj['slot_data']
+            self.er_hint_data = self._decode_er_hint_data(decoded_obj["er_hint_data"])
+        for slot in self.slot_info:
+            self.read_data[f"slot_data_{slot}"] = lambda local_slot=slot: self.slot_data.get(local_slot)
 
         # load start inventory:
         for slot, item_codes in decoded_obj["precollected_items"].items():
             self.start_inventory[slot] = [NetworkItem(item_code, -2, 0) for item_code in item_codes]
 
         for slot, hints in decoded_obj["precollected_hints"].items():
-            self.hints[0, slot].update(hints)
+            for hint in hints:
+                self.add_hint(0, slot, hint)
 
         # declare slots that aren't players as done
         for slot, slot_info in self.slot_info.items():
             if slot_info.type.always_goal:
                 for team in self.clients:
                     self.client_game_state[team, slot] = ClientStatus.CLIENT_GOAL
+                    self.save_journal.changed("client_game_state")
 
         if use_embedded_server_options:
             server_options = decoded_obj.get("server_options", {})
@@ -473,12 +788,12 @@ class Context:
             if game_name in game_data_packages:
                 data = game_data_packages[game_name]
             self.logger.info(f"Loading embedded data package for game {game_name}")
-            self.gamespackage[game_name] = data
             self.item_name_groups[game_name] = data["item_name_groups"]
             if "location_name_groups" in data:
                 self.location_name_groups[game_name] = data["location_name_groups"]
-                del data["location_name_groups"]
-            del data["item_name_groups"]  # remove from data package, but keep in self.item_name_groups
+            # copy without the groups, as data may be shared between rooms, but keep them in self.item_name_groups
+            self.gamespackage[game_name] = {key: value for key, value in data.items()
+                                            if key not in ("item_name_groups", "location_name_groups")}
         self._init_game_data()
         for game_name, data in self.item_name_groups.items():
             self.read_data[f"item_name_groups_{game_name}"] = lambda lgame=game_name: self.item_name_groups[lgame]
@@ -487,6 +802,18 @@ class Context:
 
         # sorted access spheres
         self.spheres = decoded_obj.get("spheres", [])
+        self.sphere_index = NetUtils.get_sphere_index(self.spheres)
+
+        self.room_info_games = {self.games[x] for x in range(1, len(self.games) + 1)}
+        self.room_info_games.add("Archipelago")
+        self.room_info_checksums = {game: game_data["checksum"] for game, game_data in self.gamespackage.items()
+                                    if game in self.room_info_games and "checksum" in game_data}
+
+    @staticmethod
+    def _decode_er_hint_data(er_hint_data: typing.Dict[int, typing.Dict[int, str]]) \
+            -> typing.Dict[int, typing.Dict[int, str]]:
+        return {int(player): {int(address): name for address, name in loc_data.items()}
+                for player, loc_data in er_hint_data.items()}
 
     # saving
 
@@ -503,10 +830,22 @@ class Context:
 
     def _save(self, exit_save: bool = False) -> bool:
         try:
-            encoded_save = pickle.dumps(self.get_save())
-            with open(self.save_filename, "wb") as f:
-                f.write(zlib.compress(encoded_save))
+            with self.save_journal.lock:
+                if self.save_journal.needs_snapshot:
+                    self.save_journal.reset()
+                changes = self.save_journal.get_changes(self.get_save)
+                if not changes:
+                    return True
+                record = encode_save_record(changes)
+                if self.save_journal.snapshot_size:
+                    with open(self.save_filename, "ab") as f:
+                        f.write(record)
+                else:
+                    with open(self.save_filename, "wb") as f:
+                        f.write(save_file_magic + record)
+                self.save_journal.written(changes, len(record))
         except Exception as e:
+            self.save_journal.reset()  # the file may end in a partial record, which can't be followed by others
             self.logger.exception(e)
             return False
         else:
@@ -522,7 +861,7 @@ class Context:
                     else self.data_filename + '_' + 'apsave'
             try:
                 with open(self.save_filename, 'rb') as f:
-                    save_data = restricted_loads(zlib.decompress(f.read()))
+                    save_data = decode_save_file(f.read())
                     self.set_save(save_data)
             except FileNotFoundError:
                 self.logger.error('No save data found, starting a new game')
@@ -558,39 +897,40 @@ class Context:
                 import atexit
                 atexit.register(self._save, True)  # make sure we save on exit too
 
-    def get_save(self) -> dict:
-        self.recheck_hints()
-        d = {
-            "version": self.save_version,
-            "connect_names": self.connect_names,
-            "received_items": self.received_items,
-            "hints_used": dict(self.hints_used),
-            "hints": dict(self.hints),
-            "location_checks": dict(self.location_checks),
-            "name_aliases": self.name_aliases,
-            "client_game_state": dict(self.client_game_state),
-            "client_activity_timers": tuple(
+    def get_save(self, sections: typing.Optional[typing.AbstractSet[str]] = None) -> dict:
+        """Returns the state of the room to save, or only the given sections of it."""
+        getters: typing.Dict[str, typing.Callable[[], typing.Any]] = {
+            "version": lambda: self.save_version,
+            "connect_names": lambda: self.connect_names,
+            "received_items": lambda: self.received_items,
+            "hints_used": lambda: dict(self.hints_used),
+            "hints": lambda: dict(self.hints),
+            "location_checks": lambda: dict(self.location_checks),
+            "name_aliases": lambda: self.name_aliases,
+            "client_game_state": lambda: dict(self.client_game_state),
+            "client_activity_timers": lambda: tuple(
                 (key, value.timestamp()) for key, value in self.client_activity_timers.items()),
-            "client_connection_timers": tuple(
+            "client_connection_timers": lambda: tuple(
                 (key, value.timestamp()) for key, value in self.client_connection_timers.items()),
-            "random_state": self.random.getstate(),
-            "group_collected": dict(self.group_collected),
-            "stored_data": self.stored_data,
-            "game_options": {"hint_cost": self.hint_cost, "location_check_points": self.location_check_points,
-                             "server_password": self.server_password, "password": self.password,
-                             "release_mode": self.release_mode,
-                             "remaining_mode": self.remaining_mode, "collect_mode": self.collect_mode,
-                             "item_cheat": self.item_cheat, "compatibility": self.compatibility}
-
+            "random_state": self.random.getstate,
+            "group_collected": lambda: dict(self.group_collected),
+            "stored_data": lambda: self.stored_data,
+            "game_options": lambda: {
+                "hint_cost": self.hint_cost, "location_check_points": self.location_check_points,
+                "server_password": self.server_password, "password": self.password,
+                "release_mode": self.release_mode,
+                "remaining_mode": self.remaining_mode, "collect_mode": self.collect_mode,
+                "item_cheat": self.item_cheat, "compatibility": self.compatibility}
         }
 
-        return d
+        return {name: getter() for name, getter in getters.items() if sections is None or name in sections}
 
     def set_save(self, savedata: dict):
         if self.connect_names != savedata["connect_names"]:
             raise Exception("This savegame does not appear to match the loaded multiworld.")
         if savedata["version"] > self.save_version:
             raise Exception("This savegame is newer than the server.")
+        self.save_journal.reset()
         self.received_items = savedata["received_items"]
         self.hints_used.update(savedata["hints_used"])
         self.hints.update(savedata["hints"])
@@ -604,6 +944,8 @@ class Context:
             {tuple(key): datetime.datetime.fromtimestamp(value, datetime.timezone.utc) for key, value
              in savedata["client_activity_timers"]})
         self.location_checks.update(savedata["location_checks"])
+        self.recheck_hints()
+        self.index_hints()
         self.random.setstate(savedata["random_state"])
 
         if "game_options" in savedata:
@@ -635,27 +977,64 @@ class Context:
         return 0
 
     def recheck_hints(self, team: typing.Optional[int] = None, slot: typing.Optional[int] = None):
+        """Re-checks every hint. Only needed if location_checks were changed without register_location_checks."""
         for hint_team, hint_slot in self.hints:
             if (team is None or team == hint_team) and (slot is None or slot == hint_slot):
                 self.hints[hint_team, hint_slot] = {
                     hint.re_check(self, hint_team) for hint in
                     self.hints[hint_team, hint_slot]
                 }
+                self.save_journal.changed("hints", (hint_team, hint_slot))
 
     def get_rechecked_hints(self, team: int, slot: int):
-        self.recheck_hints(team, slot)
-        return self.hints[team, slot]
+        return self.hints[team, slot]  # kept up to date by register_location_checks
+
+    def add_hint(self, team: int, slot: int, hint: NetUtils.Hint) -> bool:
+        """Remembers a hint for slot. Returns False if it already had it."""
+        hints = self.hints[team, slot]
+        if hint in hints:
+            return False
+        hints.add(hint)
+        self.save_journal.changed("hints", (team, slot))
+        if not hint.found:
+            self.unfound_hints[team, hint.finding_player, hint.location].add((slot, hint))
+        return True
+
+    def index_hints(self):
+        """Rebuilds unfound_hints, after self.hints was replaced."""
+        self.unfound_hints.clear()
+        for (team, slot), hints in self.hints.items():
+            for hint in hints:
+                if not hint.found:
+                    self.unfound_hints[team, hint.finding_player, hint.location].add((slot, hint))
+
+    def find_hints(self, team: int, finding_player: int, locations: typing.Iterable[int]) -> typing.Set[int]:
+        """Marks the hints for newly checked locations as found. Returns the slots whose hints changed."""
+        changed: typing.Set[int] = set()
+        for location in locations:
+            for slot, hint in self.unfound_hints.pop((team, finding_player, location), ()):
+                hints = self.hints[team, slot]
+                if hint in hints:
+                    hints.remove(hint)
+                    hints.add(hint.re_check(self, team))
+                    self.save_journal.changed("hints", (team, slot))
+                    changed.add(slot)
+        return changed
 
     def get_sphere(self, player: int, location_id: int) -> int:
         """Get sphere of a location, -1 if spheres are not available."""
         if self.spheres:
-            for i, sphere in enumerate(self.spheres):
-                if location_id in sphere.get(player, set()):
-                    return i
-            raise KeyError(f"No Sphere found for location ID {location_id} belonging to player {player}. "
-                           f"Location or player may not exist.")
+            try:
+                return self.sphere_index[player][location_id]
+            except KeyError:
+                raise KeyError(f"No Sphere found for location ID {location_id} belonging to player {player}. "
+                               f"Location or player may not exist.") from None
         return -1
 
+    def get_player_spheres(self, player: int) -> typing.Dict[int, int]:
+        """Get the sphere of each location of a player, empty if spheres are not available."""
+        return self.sphere_index.get(player, {})
+
     def get_players_package(self):
         return [NetworkPlayer(t, p, self.get_aliased_name(t, p), n) for (t, p), n in self.player_names.items()]
 
@@ -708,11 +1087,10 @@ class Context:
             if not hint.found:
                 # since hints are bidirectional, finding player and receiving player,
                 # we can check once if hint already exists
-                if hint not in self.hints[team, hint.finding_player]:
-                    self.hints[team, hint.finding_player].add(hint)
+                if self.add_hint(team, hint.finding_player, hint):
                     new_hint_events.add(hint.finding_player)
                     for player in self.slot_set(hint.receiving_player):
-                        self.hints[team, player].add(hint)
+                        self.add_hint(team, player, hint)
                         new_hint_events.add(player)
 
             self.logger.info("Notice (Team #%d): %s" % (team + 1, format_hint(self, team, hint)))
@@ -752,6 +1130,12 @@ class Context:
         if targets:
             self.broadcast(targets, [{"cmd": "SetReply", "key": key, "value": self.hints[team, slot]}])
 
+    def on_locations_checked(self, team: int, slot: int, locations: typing.Set[int]):
+        pass
+
+    def on_items_received(self, team: int, slot: int, items: typing.Sequence[NetworkItem]):
+        pass
+
     def on_client_status_change(self, team: int, slot: int):
         key: str = f"_read_client_status_{team}_{slot}"
         targets: typing.Set[Client] = set(self.stored_data_notification_clients[key])
@@ -781,7 +1165,8 @@ async def server(websocket, path: str = "/", ctx: Context = None):
         async for data in websocket:
             if ctx.log_network:
                 ctx.logger.info(f"Incoming message: {data}")
-            for msg in decode(data):
+            for msg in decode_frame(data):
+                ctx.client_messages += 1
                 await process_client_cmd(ctx, client, msg)
     except Exception as e:
         if not isinstance(e, websockets.WebSocketException):
@@ -799,22 +1184,19 @@ async def on_client_connected(ctx: Context, client: Client):
             if connected_clients:
                 name = ctx.player_names[team, slot]
                 players.append(NetworkPlayer(team, slot, ctx.name_aliases.get((team, slot), name), name))
-    games = {ctx.games[x] for x in range(1, len(ctx.games) + 1)}
-    games.add("Archipelago")
     await ctx.send_msgs(client, [{
         'cmd': 'RoomInfo',
         'password': bool(ctx.password),
-        'games': games,
+        'games': ctx.room_info_games,
         # tags are for additional features in the communication.
         # Name them by feature or fork, as you feel is appropriate.
-        'tags': ctx.tags,
+        'tags': ctx.tags + [binary_protocol_tag] if binary_protocol_available else ctx.tags,
         'version': version_tuple,
         'generator_version': ctx.generator_version,
         'permissions': get_permissions(ctx),
         'hint_cost': ctx.hint_cost,
         'location_check_points': ctx.location_check_points,
-        'datapackage_checksums': {game: game_data["checksum"] for game, game_data
-                                  in ctx.gamespackage.items() if game in games and "checksum" in game_data},
+        'datapackage_checksums': ctx.room_info_checksums,
         'seed_name': ctx.seed_name,
         'time': time.time(),
     }])
@@ -860,12 +1242,14 @@ async def on_client_joined(ctx: Context, client: Client):
                               "you may have additional local commands you can list with /help.",
                       {"type": "Tutorial"})
     ctx.client_connection_timers[client.team, client.slot] = datetime.datetime.now(datetime.timezone.utc)
+    ctx.save_journal.changed("client_connection_timers")
 
 
 async def on_client_left(ctx: Context, client: Client):
     if len(ctx.clients[client.team][client.slot]) < 1:
         update_client_status(ctx, client, ClientStatus.CLIENT_UNKNOWN)
         ctx.client_connection_timers[client.team, client.slot] = datetime.datetime.now(datetime.timezone.utc)
+        ctx.save_journal.changed("client_connection_timers")
 
     version_str = '.'.join(str(x) for x in client.version)
 
@@ -939,21 +1323,35 @@ def get_start_inventory(ctx: Context, player: int, remote_start_inventory: bool)
     return ctx.start_inventory.setdefault(player, []) if remote_start_inventory else []
 
 
-def send_new_items(ctx: Context):
-    for team, clients in ctx.clients.items():
-        for slot, clients in clients.items():
-            for client in clients:
-                if client.no_items:
-                    continue
-                start_inventory = get_start_inventory(ctx, slot, client.remote_start_inventory)
-                items = get_received_items(ctx, team, slot, client.remote_items)
-                if len(start_inventory) + len(items) > client.send_index:
-                    first_new_item = max(0, client.send_index - len(start_inventory))
-                    async_start(ctx.send_msgs(client, [{
-                        "cmd": "ReceivedItems",
-                        "index": client.send_index,
-                        "items": start_inventory[client.send_index:] + items[first_new_item:]}]))
-                    client.send_index = len(start_inventory) + len(items)
+def merge_msgs(first: dict, second: dict) -> typing.Optional[dict]:
+    """Returns a RoomUpdate or ReceivedItems with the changes of both, or None if they can't be merged."""
+    if first["cmd"] == "RoomUpdate":
+        merged = {**first, **second}
+        if "checked_locations" in first and "checked_locations" in second:
+            merged["checked_locations"] = set(first["checked_locations"]) | set(second["checked_locations"])
+        return merged
+    if first["cmd"] == "ReceivedItems" and first["index"] + len(first["items"]) == second["index"]:
+        return {**first, "items": first["items"] + second["items"]}
+    return None
+
+
+def send_new_items(ctx: Context, team_slots: typing.Optional[typing.Iterable[team_slot]] = None):
+    """Sends items clients did not receive yet. With team_slots, only to those, instead of checking every client."""
+    if team_slots is None:
+        team_slots = ((team, slot) for team, clients in ctx.clients.items() for slot in clients)
+    for team, slot in team_slots:
+        for client in ctx.clients[team].get(slot, ()):
+            if client.no_items:
+                continue
+            start_inventory = get_start_inventory(ctx, slot, client.remote_start_inventory)
+            items = get_received_items(ctx, team, slot, client.remote_items)
+            if len(start_inventory) + len(items) > client.send_index:
+                first_new_item = max(0, client.send_index - len(start_inventory))
+                ctx.queue_msgs([client], [{
+                    "cmd": "ReceivedItems",
+                    "index": client.send_index,
+                    "items": start_inventory[client.send_index:] + items[first_new_item:]}])
+                client.send_index = len(start_inventory) + len(items)
 
 
 def update_checked_locations(ctx: Context, team: int, slot: int):
@@ -987,6 +1385,7 @@ def collect_player(ctx: Context, team: int, slot: int, is_group: bool = False):
             if slot in group_players:
                 group_collected_players = ctx.group_collected.setdefault(group, set())
                 group_collected_players.add(slot)
+                ctx.save_journal.changed("group_collected")
                 if set(group_players) == group_collected_players:
                     collect_player(ctx, team, group, True)
 
@@ -998,9 +1397,13 @@ def get_remaining(ctx: Context, team: int, slot: int) -> typing.List[int]:
 def send_items_to(ctx: Context, team: int, target_slot: int, *items: NetworkItem):
     for target in ctx.slot_set(target_slot):
         for item in items:
-            if item.player != target_slot:
+            # items not found at any location, like cheated ones, come from outside the world of even their own slot
+            if item.player != target_slot or item.location < 0:
                 get_received_items(ctx, team, target, False).append(item)
+                ctx.save_journal.changed("received_items", (team, target, False))
             get_received_items(ctx, team, target, True).append(item)
+            ctx.save_journal.changed("received_items", (team, target, True))
+        ctx.on_items_received(team, target, items)
 
 
 def register_location_checks(ctx: Context, team: int, slot: int, locations: typing.Iterable[int],
@@ -1010,10 +1413,13 @@ def register_location_checks(ctx: Context, team: int, slot: int, locations: typi
     if new_locations:
         if count_activity:
             ctx.client_activity_timers[team, slot] = datetime.datetime.now(datetime.timezone.utc)
+            ctx.save_journal.changed("client_activity_timers")
+        receivers: typing.Set[team_slot] = set()
         for location in new_locations:
             item_id, target_player, flags = ctx.locations[slot][location]
             new_item = NetworkItem(item_id, location, slot, flags)
             send_items_to(ctx, team, target_player, new_item)
+            receivers.update((team, target) for target in ctx.slot_set(target_player))
 
             ctx.logger.info('(Team #%d) %s sent %s to %s (%s)' % (
                 team + 1, ctx.player_names[(team, slot)], ctx.item_names[ctx.slot_info[target_player].game][item_id],
@@ -1022,16 +1428,16 @@ def register_location_checks(ctx: Context, team: int, slot: int, locations: typi
             ctx.broadcast_team(team, [info_text])
 
         ctx.location_checks[team, slot] |= new_locations
-        send_new_items(ctx)
+        ctx.save_journal.changed("location_checks", (team, slot))
+        ctx.on_locations_checked(team, slot, new_locations)
+        send_new_items(ctx, receivers)
         ctx.broadcast(ctx.clients[team][slot], [{
             "cmd": "RoomUpdate",
             "hint_points": get_slot_points(ctx, team, slot),
             "checked_locations": new_locations,  # send back new checks only
         }])
-        old_hints = ctx.hints[team, slot].copy()
-        ctx.recheck_hints(team, slot)
-        if old_hints != ctx.hints[team, slot]:
-            ctx.on_changed_hints(team, slot)
+        for changed_slot in ctx.find_hints(team, slot, new_locations):
+            ctx.on_changed_hints(team, changed_slot)
         ctx.save()
 
 
@@ -1433,12 +1839,14 @@ class ClientMessageProcessor(CommonCommandProcessor):
         if alias_name:
             alias_name = alias_name[:16].strip()
             self.ctx.name_aliases[self.client.team, self.client.slot] = alias_name
+            self.ctx.save_journal.changed("name_aliases")
             self.output(f"Hello, {alias_name}")
             update_aliases(self.ctx, self.client.team)
             self.ctx.save()
             return True
         elif (self.client.team, self.client.slot) in self.ctx.name_aliases:
             del (self.ctx.name_aliases[self.client.team, self.client.slot])
+            self.ctx.save_journal.changed("name_aliases")
             self.output("Removed Alias")
             update_aliases(self.ctx, self.client.team)
             self.ctx.save()
@@ -1456,8 +1864,7 @@ class ClientMessageProcessor(CommonCommandProcessor):
             )
             if usable:
                 new_item = NetworkItem(names[item_name], -1, self.client.slot)
-                get_received_items(self.ctx, self.client.team, self.client.slot, False).append(new_item)
-                get_received_items(self.ctx, self.client.team, self.client.slot, True).append(new_item)
+                send_items_to(self.ctx, self.client.team, self.client.slot, new_item)
                 self.ctx.broadcast_text_all(
                     'Cheat console: sending "' + item_name + '" to ' + self.ctx.get_aliased_name(self.client.team,
                                                                                                  self.client.slot),
@@ -1476,9 +1883,7 @@ class ClientMessageProcessor(CommonCommandProcessor):
         cost = self.ctx.get_hint_cost(self.client.slot)
 
         if not input_text:
-            hints = {hint.re_check(self.ctx, self.client.team) for hint in
-                     self.ctx.hints[self.client.team, self.client.slot]}
-            self.ctx.hints[self.client.team, self.client.slot] = hints
+            hints = self.ctx.hints[self.client.team, self.client.slot]
             self.ctx.notify_hints(self.client.team, list(hints), recipients=(self.client.slot,))
             self.output(f"A hint costs {self.ctx.get_hint_cost(self.client.slot)} points. "
                         f"You have {points_available} points.")
@@ -1554,6 +1959,7 @@ class ClientMessageProcessor(CommonCommandProcessor):
                     can_pay = 1000
 
                 self.ctx.random.shuffle(not_found_hints)
+                self.ctx.save_journal.changed("random_state")
                 # By popular vote, make hints prefer non-local placements
                 not_found_hints.sort(key=lambda hint: int(hint.receiving_player != hint.finding_player))
                 # By another popular vote, prefer early sphere
@@ -1568,6 +1974,7 @@ class ClientMessageProcessor(CommonCommandProcessor):
                     hints.append(hint)
                     can_pay -= 1
                     self.ctx.hints_used[self.client.team, self.client.slot] += 1
+                    self.ctx.save_journal.changed("hints_used")
 
                 self.ctx.notify_hints(self.client.team, hints)
                 if not_found_hints:
@@ -1712,33 +2119,27 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
             if (start_inventory or items) and not client.no_items:
                 reply.append({"cmd": 'ReceivedItems', "index": 0, "items": start_inventory + items})
                 client.send_index = len(start_inventory) + len(items)
-            if not client.auth:  # if this was a Re-Connect, don't print to console
-                client.auth = True
-                await on_client_joined(ctx, client)
             if args.get("slot_data", True):
                 connected_packet["slot_data"] = ctx.slot_data[client.slot]
+            # Connected goes first, before the join messages that on_client_joined queues in the outbox
+            joined = not client.auth  # if this was a Re-Connect, don't print to console
+            client.auth = True
             await ctx.send_msgs(client, reply)
+            if joined:
+                await on_client_joined(ctx, client)
 
     elif cmd == "GetDataPackage":
         exclusions = args.get("exclusions", [])
         if "games" in args:
-            games = {name: game_data for name, game_data in ctx.gamespackage.items()
-                     if name in set(args.get("games", []))}
-            await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": {"games": games}}])
+            requested = set(args.get("games", []))
+            games = [name for name in ctx.gamespackage if name in requested]
         # TODO: remove exclusions behaviour around 0.5.0
         elif exclusions:
             exclusions = set(exclusions)
-            games = {name: game_data for name, game_data in ctx.gamespackage.items()
-                     if name not in exclusions}
-
-            package = {"games": games}
-            await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": package}])
-
+            games = [name for name in ctx.gamespackage if name not in exclusions]
         else:
-            await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": {"games": ctx.gamespackage}}])
+            games = list(ctx.gamespackage)
+        await ctx.send_encoded_msgs(client, ctx.encode_data_package(games, client.binary))
 
     elif client.auth:
         if cmd == "ConnectUpdate":
@@ -1861,6 +2262,7 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
                 func = modify_functions[operation["operation"]]
                 value = func(value, operation["value"])
             ctx.stored_data[args["key"]] = args["value"] = value
+            ctx.save_journal.changed("stored_data", args["key"])
             targets = set(ctx.stored_data_notification_clients[args["key"]])
             if args.get("want_reply", True):
                 targets.add(client)
@@ -1889,6 +2291,7 @@ def update_client_status(ctx: Context, client: Client, new_status: ClientStatus)
                 ctx.broadcast_text_all(f"Team #{client.team + 1} has completed all of their games! Congratulations!")
 
         ctx.client_game_state[client.team, client.slot] = new_status
+        ctx.save_journal.changed("client_game_state")
         ctx.on_client_status_change(client.team, client.slot)
         ctx.save()
 
@@ -1946,12 +2349,14 @@ class ServerCommandProcessor(CommonCommandProcessor):
                     if alias_name:
                         alias_name = alias_name.strip()[:15]
                         self.ctx.name_aliases[team, slot] = alias_name
+                        self.ctx.save_journal.changed("name_aliases")
                         self.output(f"Named {player_name} as {alias_name}")
                         update_aliases(self.ctx, team)
                         self.ctx.save()
                         return True
                     else:
                         del (self.ctx.name_aliases[team, slot])
+                        self.ctx.save_journal.changed("name_aliases")
                         self.output(f"Removed Alias for {player_name}")
                         update_aliases(self.ctx, team)
                         self.ctx.save()
@@ -2189,6 +2594,7 @@ class ServerCommandProcessor(CommonCommandProcessor):
                 return False
 
         setattr(self.ctx, option_name, value_type(option_value))
+        self.ctx.save_journal.changed("game_options")
         self.output(f"Set option {option_name} to {getattr(self.ctx, option_name)}")
         if option_name in {"release_mode", "remaining_mode", "collect_mode"}:
             self.ctx.broadcast_all([{"cmd": "RoomUpdate", 'permissions': get_permissions(self.ctx)}])
@@ -2284,6 +2690,12 @@ def parse_args() -> argparse.Namespace:
     #0 -> recommended for tournaments to force a level playing field, only allow an exact version match
     """)
     parser.add_argument('--log_network', default=defaults["log_network"], action="store_true")
+    parser.add_argument('--compression_threshold', default=defaults["compression_threshold"], type=int,
+                        help="messages smaller than this many bytes are sent uncompressed, -1 disables compression")
+    parser.add_argument('--compression_window_bits', default=defaults["compression_window_bits"], type=int,
+                        choices=range(9, 16), help="zlib window size of compressed connections, 9 - 15")
+    parser.add_argument('--compression_memory_level', default=defaults["compression_memory_level"], type=int,
+                        choices=range(1, 10), help="zlib memory level of compressed connections, 1 - 9")
     args = parser.parse_args()
     return args
 
@@ -2322,6 +2734,55 @@ def load_server_cert(path: str, cert_key: typing.Optional[str]) -> "ssl.SSLConte
     return ssl_context
 
 
+class ThresholdPerMessageDeflate(PerMessageDeflate):
+    """Per-Message Deflate, that sends messages smaller than threshold bytes uncompressed.
+    Compressing tiny frequent messages, like Bounce or SetReply, costs more CPU than it saves bandwidth."""
+    threshold: int
+    encode_cont_data: bool  # whether the current fragmented message is compressed
+
+    def __init__(self, threshold: int, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.threshold = threshold
+        self.encode_cont_data = True
+
+    def encode(self, frame: Frame) -> Frame:
+        if frame.opcode in CTRL_OPCODES:
+            return frame
+        if frame.opcode is not Opcode.CONT:
+            self.encode_cont_data = len(frame.data) >= self.threshold
+        # uncompressed messages don't touch the compression context, so the peer can keep decoding the rest
+        return super().encode(frame) if self.encode_cont_data else frame
+
+
+class ServerCompressionFactory(ServerPerMessageDeflateFactory):
+    """Negotiates ThresholdPerMessageDeflate with clients offering permessage-deflate.
+    Clients not offering it, for example with compression=None, get an uncompressed connection."""
+    threshold: int
+
+    def __init__(self, threshold: int, **kwargs):
+        super().__init__(**kwargs)
+        self.threshold = threshold
+
+    def process_request_params(self, params, accepted_extensions):
+        response_params, extension = super().process_request_params(params, accepted_extensions)
+        return response_params, ThresholdPerMessageDeflate(
+            self.threshold, extension.remote_no_context_takeover, extension.local_no_context_takeover,
+            extension.remote_max_window_bits, extension.local_max_window_bits, extension.compress_settings)
+
+
+def get_server_extensions(compression_threshold: int = 256, compression_window_bits: int = 12,
+                          compression_memory_level: int = 5) -> typing.List[ServerExtensionFactory]:
+    """Extensions to pass to websockets.serve, together with compression=None.
+    A negative compression_threshold disables compression,
+    window bits (9 - 15) and memory level (1 - 9) trade memory per connection for compression ratio."""
+    if compression_threshold < 0:
+        return []
+    return [ServerCompressionFactory(compression_threshold,
+                                     server_max_window_bits=compression_window_bits,
+                                     client_max_window_bits=compression_window_bits,
+                                     compress_settings={"memLevel": compression_memory_level})]
+
+
 async def main(args: argparse.Namespace):
     Utils.init_logging("Server", loglevel=args.loglevel.lower())
 
@@ -2362,7 +2823,10 @@ async def main(args: argparse.Namespace):
 
     ssl_context = load_server_cert(args.cert, args.cert_key) if args.cert else None
 
-    ctx.server = websockets.serve(functools.partial(server, ctx=ctx), host=ctx.host, port=ctx.port, ssl=ssl_context)
+    extensions = get_server_extensions(args.compression_threshold, args.compression_window_bits,
+                                       args.compression_memory_level)
+    ctx.server = websockets.serve(functools.partial(server, ctx=ctx), host=ctx.host, port=ctx.port, ssl=ssl_context,
+                                  compression=None, extensions=extensions)
     ip = args.host if args.host else Utils.get_public_ipv4()
     logging.info('Hosting game at %s:%d (%s)' % (ip, ctx.port,
                                                  'No password' if not ctx.password else 'Password: %s' % ctx.password))
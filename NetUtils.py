@@ -9,6 +9,11 @@ import websockets
 
 from Utils import ByValue, Version
 
+try:
+    import orjson
+except ImportError:  # only needed for the binary protocol
+    orjson = None
+
 
 class JSONMessagePart(typing.TypedDict, total=False):
     text: str
@@ -138,9 +143,85 @@ def _object_hook(o: typing.Any) -> typing.Any:
 
 decode = JSONDecoder(object_hook=_object_hook).decode
 
+binary_protocol_tag = "BinaryProtocol"
+"""
+Tag of servers and clients that accept binary frames, see encode_binary. A server announces it in RoomInfo, a client
+in Connect or ConnectUpdate. Text frames stay valid, so either side may still send JSON.
+"""
+binary_protocol_available = orjson is not None
+_binary_tuples = (NetworkItem, NetworkPlayer, NetworkSlot)
+
+
+def _binary_default(obj: typing.Any) -> typing.Any:
+    if isinstance(obj, _binary_tuples):
+        return tuple(obj)
+    if isinstance(obj, tuple) and hasattr(obj, "_fields"):
+        return {**obj._asdict(), "class": obj.__class__.__name__}
+    if isinstance(obj, (set, frozenset)):
+        return tuple(obj)
+    raise TypeError(f"Type is not serializable: {type(obj).__name__}")
+
+
+def encode_binary(obj: typing.Any) -> bytes:
+    """
+    Encodes like encode, but to UTF-8 JSON bytes, in one pass in C, with NetworkItem, NetworkPlayer and NetworkSlot as
+    plain lists of their fields. Only for endpoints that use the binary protocol.
+    """
+    try:
+        return orjson.dumps(obj, default=_binary_default, option=orjson.OPT_NON_STR_KEYS)
+    except orjson.JSONEncodeError:  # such as integers beyond 64 bit
+        return encode(obj).encode("utf-8")
+
+
+def _binary_tuple(cls: typing.Type[typing.NamedTuple]) -> typing.Callable[[typing.Any], typing.Any]:
+    def convert(value: typing.Any) -> typing.Any:
+        return cls(*value) if isinstance(value, list) else _object_hook(value)
+    return convert
+
+
+def _binary_list(convert: typing.Callable[[typing.Any], typing.Any]) -> typing.Callable[[typing.List], typing.List]:
+    return lambda values: [convert(value) for value in values]
+
+
+def _binary_dict(convert: typing.Callable[[typing.Any], typing.Any]) -> typing.Callable[[typing.Dict], typing.Dict]:
+    return lambda values: {key: convert(value) for key, value in values.items()}
+
+
+# the arguments of each command that can contain the tuples sent as lists by encode_binary, or other classes
+_binary_arguments: typing.Dict[str, typing.Dict[str, typing.Callable[[typing.Any], typing.Any]]] = {
+    "Connect": {"version": _object_hook},
+    "RoomInfo": {"version": _object_hook, "generator_version": _object_hook},
+    "ReceivedItems": {"items": _binary_list(_binary_tuple(NetworkItem))},
+    "LocationInfo": {"locations": _binary_list(_binary_tuple(NetworkItem))},
+    "PrintJSON": {"item": _binary_tuple(NetworkItem)},
+    "Connected": {"players": _binary_list(_binary_tuple(NetworkPlayer)),
+                  "slot_info": _binary_dict(_binary_tuple(NetworkSlot))},
+    "RoomUpdate": {"players": _binary_list(_binary_tuple(NetworkPlayer))},
+}
+
+
+def decode_binary(data: bytes) -> typing.List[typing.Dict[str, typing.Any]]:
+    """Decodes what encode_binary encoded, only converting the arguments known to contain tuples."""
+    msgs = orjson.loads(data)
+    for msg in msgs:
+        arguments = _binary_arguments.get(msg.get("cmd"))
+        if arguments:
+            for name, convert in arguments.items():
+                if name in msg:
+                    msg[name] = convert(msg[name])
+    return msgs
+
+
+def decode_frame(data: typing.Union[str, bytes]) -> typing.Any:
+    """Decodes a websocket frame, which is binary for the binary protocol and text for JSON."""
+    if isinstance(data, bytes) and binary_protocol_available:
+        return decode_binary(data)
+    return decode(data)
+
 
 class Endpoint:
     socket: websockets.WebSocketServerProtocol
+    binary: bool = False  # if messages to it are encoded with encode_binary
 
     def __init__(self, socket):
         self.socket = socket
@@ -347,6 +428,16 @@ class Hint(typing.NamedTuple):
         return self.receiving_player == self.finding_player
 
 
+def get_sphere_index(spheres: typing.Iterable[typing.Dict[int, typing.Iterable[int]]]) \
+        -> typing.Dict[int, typing.Dict[int, int]]:
+    """Turns a list of spheres, each { player: { location_id, ... } }, into { player: { location_id: sphere } }."""
+    index: typing.Dict[int, typing.Dict[int, int]] = {}
+    for sphere_number, sphere in enumerate(spheres):
+        for player, location_ids in sphere.items():
+            index.setdefault(player, {}).update(dict.fromkeys(location_ids, sphere_number))
+    return index
+
+
 class _LocationStore(dict, typing.MutableMapping[int, typing.Dict[int, typing.Tuple[int, int, int]]]):
     def __init__(self, values: typing.MutableMapping[int, typing.Dict[int, typing.Tuple[int, int, int]]]):
         super().__init__(values)
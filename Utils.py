@@ -12,6 +12,8 @@ import pickle
 import functools
 import io
 import collections
+import struct
+import zlib
 import importlib
 import logging
 import warnings
@@ -445,6 +447,133 @@ def restricted_loads(s: bytes) -> Any:
     return RestrictedUnpickler(io.BytesIO(s)).load()
 
 
+multidata_format_version = 4
+"""format of the .archipelago files written by write_multidata, stored in their first byte"""
+
+
+def _lzma_compress(data: bytes) -> bytes:
+    import lzma
+    return lzma.compress(data)
+
+
+def _lzma_decompress(data: bytes) -> bytes:
+    import lzma
+    return lzma.decompress(data)
+
+
+multidata_compressors: Dict[str, typing.Tuple[int, typing.Callable[[bytes], bytes]]] = {
+    "none": (0, bytes),
+    "zlib": (1, zlib.compress),
+    "zlib-fast": (1, functools.partial(zlib.compress, level=1)),
+    "lzma": (2, _lzma_compress),
+}
+"""compressors write_multidata can use, with the id of their decompressor"""
+
+_multidata_decompressors: Dict[int, typing.Callable[[bytes], bytes]] = {
+    0: bytes,
+    1: zlib.decompress,
+    2: _lzma_decompress,
+}
+
+
+def write_multidata(file: BinaryIO, multidata: Dict[str, Any], compression: str = "zlib") -> None:
+    """
+    Writes multidata to file, in format multidata_format_version.
+    Each key becomes a section that is pickled and compressed on its own, so only one section is held in memory in
+    serialized form at a time, and readers can find a section without decompressing the others.
+    """
+    compressor_id, compress = multidata_compressors[compression]
+    file.write(bytes((multidata_format_version, compressor_id)))
+    for name, value in multidata.items():
+        encoded_name = name.encode("utf-8")
+        payload = compress(pickle.dumps(value))
+        file.write(struct.pack("<H", len(encoded_name)))
+        file.write(encoded_name)
+        file.write(struct.pack("<Q", len(payload)))
+        file.write(payload)
+
+
+def iter_multidata_sections(data: Union[bytes, memoryview]) -> typing.Iterator[typing.Tuple[str, memoryview]]:
+    """Yields name and compressed payload of each section of multidata written by write_multidata."""
+    view = memoryview(data)
+    position = 2
+    while position < len(view):
+        name_length, = struct.unpack_from("<H", view, position)
+        position += 2
+        name = bytes(view[position:position + name_length]).decode("utf-8")
+        position += name_length
+        payload_length, = struct.unpack_from("<Q", view, position)
+        position += 8
+        yield name, view[position:position + payload_length]
+        position += payload_length
+
+
+def get_multidata_decompressor(data: Union[bytes, memoryview]) -> typing.Callable[[bytes], bytes]:
+    """Returns the function decompressing the sections of multidata written by write_multidata."""
+    try:
+        return _multidata_decompressors[data[1]]
+    except KeyError:
+        raise VersionException(f"Multidata uses unknown compression {data[1]}.") from None
+
+
+def _decode_multidata_section(decompress: typing.Callable[[bytes], bytes], payload: memoryview) -> Any:
+    return restricted_loads(decompress(payload))
+
+
+def read_multidata(data: Union[bytes, memoryview]) -> Dict[str, Any]:
+    """Reads all sections of multidata written by write_multidata."""
+    decompress = get_multidata_decompressor(data)
+    return {name: _decode_multidata_section(decompress, payload) for name, payload in iter_multidata_sections(data)}
+
+
+class MultidataSections(typing.Mapping[str, Any]):
+    """
+    Multidata written by write_multidata, decoding each section on first access.
+    The data can be a memory-mapped file, of which only the sections that are read are then paged in.
+    """
+    _decompress: typing.Callable[[bytes], bytes]
+    _sections: Dict[str, memoryview]
+    _decoded: Dict[str, Any]
+
+    def __init__(self, data: Union[bytes, memoryview]) -> None:
+        self._decompress = get_multidata_decompressor(data)
+        self._sections = dict(iter_multidata_sections(data))
+        self._decoded = {}
+
+    def __getitem__(self, name: str) -> Any:
+        try:
+            return self._decoded[name]
+        except KeyError:
+            value = self._decoded[name] = _decode_multidata_section(self._decompress, self._sections[name])
+            return value
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return iter(self._sections)
+
+    def __len__(self) -> int:
+        return len(self._sections)
+
+    def pop(self, name: str) -> Any:
+        """Removes a section, returning it decoded without keeping a reference to it."""
+        value = self[name]
+        del self._decoded[name], self._sections[name]
+        return value
+
+    def loader(self, name: str) -> typing.Callable[[], Any]:
+        """Returns a function decoding a section, which only keeps that section alive, not the others.
+        The still encoded section is copied for this, as any slice of the data keeps all of it alive."""
+        return functools.partial(_decode_multidata_section, self._decompress, bytes(self._sections[name]))
+
+
+def map_file(path: str, offset: int = 0, size: Optional[int] = None) -> memoryview:
+    """Memory-maps a file read-only. The mapping is closed once the returned view and all slices of it are freed."""
+    import mmap
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    return view[offset:] if size is None else view[offset:offset + size]
+
+
 class ByValue:
     """
     Mixin for enums to pickle value instead of name (restores pre-3.11 behavior). Use as left-most parent.
@@ -24,6 +24,8 @@ app.jinja_env.filters['all'] = all
 app.config["SELFHOST"] = True  # application process is in charge of running the websites
 app.config["GENERATORS"] = 8  # maximum concurrent world gens
 app.config["HOSTERS"] = 8  # maximum concurrent room hosters
+# if not 0, a room hoster using more MiB of memory takes no new rooms, and is restarted once its rooms shut down
+app.config["HOSTER_DRAIN_MEMORY"] = 0
 app.config["SELFLAUNCH"] = True  # application process is in charge of launching Rooms.
 app.config["SELFLAUNCHCERT"] = None  # can point to a SSL Certificate to encrypt Room websocket connections
 app.config["SELFLAUNCHKEY"] = None  # can point to a SSL Certificate Key to encrypt Room websocket connections
@@ -38,6 +40,8 @@ app.config["SECRET_KEY"] = bytes(socket.gethostname(), encoding="utf-8")
 app.config["JOB_THRESHOLD"] = 1
 # after what time in seconds should generation be aborted, freeing the queue slot. Can be set to None to disable.
 app.config["JOB_TIME"] = 600
+# after what time in seconds a generation that exceeded JOB_TIME should have stopped, otherwise it gets logged
+app.config["JOB_CANCEL_TIME"] = 60
 app.config['SESSION_PERMANENT'] = True
 
 # waitress uses one thread for I/O, these are for processing of views that then get sent
@@ -52,6 +56,14 @@ app.config["PONY"] = {
 app.config["MAX_ROLL"] = 20
 app.config["CACHE_TYPE"] = "SimpleCache"
 app.config["HOST_ADDRESS"] = ""
+# if not 0, room hoster N serves all of its rooms on port SHARED_ROOM_PORT + N, telling them apart by URL path
+app.config["SHARED_ROOM_PORT"] = 0
+# websocket compression of rooms, see MultiServer.get_server_extensions. A threshold of -1 disables compression
+app.config["ROOM_COMPRESSION"] = {
+    "compression_threshold": 256,
+    "compression_window_bits": 12,
+    "compression_memory_level": 5
+}
 app.config["ASSET_RIGHTS"] = False
 
 cache = Cache()
@@ -73,6 +85,17 @@ app.jinja_env.filters['suuid'] = lambda value: base64.urlsafe_b64encode(value.by
 app.jinja_env.filters["title_sorted"] = title_sorted
 
 
+def get_room_address(room) -> str:
+    """Address, without scheme, that clients connect to a running Room with."""
+    address = f"{app.config['HOST_ADDRESS']}:{room.last_port}"
+    if app.config["SHARED_ROOM_PORT"]:
+        address += "/" + app.jinja_env.filters["suuid"](room.id)
+    return address
+
+
+app.jinja_env.filters["room_address"] = get_room_address
+
+
 def register():
     """Import submodules, triggering their registering on flask routing.
     Note: initializes worlds subsystem."""
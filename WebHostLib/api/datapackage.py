@@ -9,8 +9,8 @@ from . import api_endpoints
 @api_endpoints.route('/datapackage')
 @cache.cached()
 def get_datapackage():
-    from worlds import network_data_package
-    return network_data_package
+    from world_manifest import get_manifest
+    return {"games": {game: game_data["data_package"] for game, game_data in get_manifest()["games"].items()}}
 
 
 @api_endpoints.route('/datapackage/<string:checksum>')
@@ -25,8 +25,8 @@ def get_datapackage_by_checksum(checksum: str):
 @api_endpoints.route('/datapackage_checksum')
 @cache.cached()
 def get_datapackage_checksums():
-    from worlds import network_data_package
+    from world_manifest import get_manifest
     version_package = {
-        game: game_data["checksum"] for game, game_data in network_data_package["games"].items()
+        game: game_data["data_package"]["checksum"] for game, game_data in get_manifest()["games"].items()
     }
     return version_package
@@ -82,4 +82,4 @@ def wait_seed_api(seed: UUID):
         return {"text": "Generation not found"}, 404
     elif generation.state == STATE_ERROR:
         return {"text": "Generation failed"}, 500
-    return {"text": "Generation running"}, 202
+    return {"text": "Generation running", "progress": json.loads(generation.meta).get("progress")}, 202
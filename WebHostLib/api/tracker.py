@@ -0,0 +1,33 @@
+import json
+from typing import Any, Dict
+from uuid import UUID
+
+from flask import abort
+
+from WebHostLib import cache
+from WebHostLib.models import Room
+from . import api_endpoints
+
+
+def get_tracker_summary(tracker: UUID) -> Dict[str, Any]:
+    room = Room.get(tracker=tracker)
+    if room is None or room.tracker_summary is None:
+        return abort(404)
+    return {"last_update": room.tracker_summary.last_update, **json.loads(room.tracker_summary.data)}
+
+
+@api_endpoints.route('/tracker/<suuid:tracker>')
+@cache.memoize(timeout=5)
+def tracker_summary(tracker: UUID):
+    """Progress of all slots, as written by the room every few seconds while it is hosted."""
+    return get_tracker_summary(tracker)
+
+
+@api_endpoints.route('/tracker/<suuid:tracker>/<int:team>/<int:player>')
+@cache.memoize(timeout=5)
+def tracker_slot_summary(tracker: UUID, team: int, player: int):
+    summary = get_tracker_summary(tracker)
+    for slot in summary["slots"]:
+        if slot["team"] == team and slot["player"] == player:
+            return {"last_update": summary["last_update"], **slot}
+    return abort(404)
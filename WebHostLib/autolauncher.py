@@ -71,6 +71,43 @@ def cleanup():
         logging.info(f"{rooms} Rooms, {seeds} Seeds and {slots} Slots have been deleted.")
 
 
+room_wakeup_grace = timedelta(seconds=5)
+"""how far back each poll of the autohost looks, to catch activity committed after it was timestamped"""
+
+
+def get_rooms_to_start(since: datetime) -> typing.List[Room]:
+    """Returns rooms that had activity since `since` and are still within their timeout. Requires a db_session.
+    Uses the index on Room.last_activity, so a short `since` window only reads recently touched rooms."""
+    rooms = select(room for room in Room if room.last_activity >= since)
+    now = datetime.utcnow()
+    # we have to filter twice, as the per-room timeout can't currently be PonyORM transpiled.
+    return [room for room in rooms if room.last_activity >= now - timedelta(seconds=room.timeout + 5)]
+
+
+def get_rooms_in_timeout(room_ids: typing.Collection[UUID]) -> typing.List[Room]:
+    """Returns the rooms of room_ids that are still within their timeout. Requires a db_session."""
+    rooms = select(room for room in Room if room.id in list(room_ids))
+    now = datetime.utcnow()
+    return [room for room in rooms if room.last_activity >= now - timedelta(seconds=room.timeout + 5)]
+
+
+def start_rooms(hosters: typing.Sequence[MultiworldInstance], since: datetime,
+                pending_room_ids: typing.Set[UUID]) -> None:
+    """Starts rooms that had activity since `since` on a hoster. Requires a db_session.
+    A room its hoster still runs, for example while it is shutting down, is kept in pending_room_ids
+    and checked again on every call, until it is started again or its timeout has run out."""
+    rooms = {room.id: room for room in get_rooms_to_start(since)}
+    if pending_room_ids:
+        rooms.update((room.id, room) for room in get_rooms_in_timeout(pending_room_ids - rooms.keys()))
+    pending_room_ids.clear()
+    for room in rooms.values():
+        hoster = place_room(hosters, room.id)
+        if room.id in hoster.room_ids:
+            pending_room_ids.add(room.id)
+        else:
+            hoster.start_room(room.id, room.seed.slots.count())
+
+
 def autohost(config: dict):
     def keep_running():
         stop_event = _stop_event
@@ -83,15 +120,16 @@ def autohost(config: dict):
                     hosters.append(hoster)
                     hoster.start()
 
+                # only the first query looks at every recent room, later ones only at rooms that became active since
+                since = datetime.utcnow() - timedelta(days=3)
+                pending_room_ids: typing.Set[UUID] = set()
                 while not stop_event.wait(0.1):
+                    poll_time = datetime.utcnow()
+                    for hoster in hosters:
+                        hoster.update()
                     with db_session:
-                        rooms = select(
-                            room for room in Room if
-                            room.last_activity >= datetime.utcnow() - timedelta(days=3))
-                        for room in rooms:
-                            # we have to filter twice, as the per-room timeout can't currently be PonyORM transpiled.
-                            if room.last_activity >= datetime.utcnow() - timedelta(seconds=room.timeout + 5):
-                                hosters[room.id.int % len(hosters)].start_room(room.id)
+                        start_rooms(hosters, since, pending_room_ids)
+                    since = poll_time - room_wakeup_grace
 
         except AlreadyRunningException:
             logging.info("Autohost reports as already running, not starting another.")
@@ -136,10 +174,26 @@ def autogen(config: dict):
     Thread(target=keep_running, name="AP_Autogen").start()
 
 
+def place_room(hosters: typing.Sequence[MultiworldInstance], room_id: UUID) -> MultiworldInstance:
+    """Returns the hoster already running the room, or else the least loaded one that is not draining."""
+    for hoster in hosters:
+        if room_id in hoster.room_ids:
+            return hoster
+    candidates = [hoster for hoster in hosters if not hoster.draining] or hosters
+    return min(candidates, key=lambda hoster: hoster.score)
+
+
 multiworlds: typing.Dict[type(Room.id), MultiworldInstance] = {}
 
 
 class MultiworldInstance():
+    load: HosterLoad
+    """last load reported by the hoster process"""
+    pending_clients: int
+    """players of rooms started since the last load report"""
+    draining: bool
+    """if set, no new rooms are placed on this hoster and it is restarted once its rooms shut down"""
+
     def __init__(self, config: dict, id: int):
         self.room_ids = set()
         self.process: typing.Optional[multiprocessing.Process] = None
@@ -147,8 +201,15 @@ class MultiworldInstance():
         self.cert = config["SELFLAUNCHCERT"]
         self.key = config["SELFLAUNCHKEY"]
         self.host = config["HOST_ADDRESS"]
+        self.shared_port = config["SHARED_ROOM_PORT"] + id if config["SHARED_ROOM_PORT"] else 0
+        self.compression = config["ROOM_COMPRESSION"]
         self.rooms_to_start = multiprocessing.Queue()
         self.rooms_shutting_down = multiprocessing.Queue()
+        self.load_reports = multiprocessing.Queue()
+        self.load = HosterLoad(0, 0.0, 0)
+        self.pending_clients = 0
+        self.memory_limit = config["HOSTER_DRAIN_MEMORY"] * 1024 * 1024
+        self.draining = False
         self.name = f"MultiHoster{id}"
 
     def start(self):
@@ -158,23 +219,49 @@ class MultiworldInstance():
         process = multiprocessing.Process(group=None, target=run_server_process,
                                           args=(self.name, self.ponyconfig, get_static_server_data(),
                                                 self.cert, self.key, self.host,
-                                                self.rooms_to_start, self.rooms_shutting_down),
+                                                self.rooms_to_start, self.rooms_shutting_down, self.shared_port,
+                                                self.load_reports, self.compression),
                                           name=self.name)
         process.start()
         self.process = process
 
-    def start_room(self, room_id):
+    @property
+    def score(self) -> float:
+        return self.load.score + self.pending_clients
+
+    def update(self):
+        """Collects rooms that shut down and the latest load report, and restarts the process once it is drained."""
         while not self.rooms_shutting_down.empty():
             self.room_ids.remove(self.rooms_shutting_down.get(block=True, timeout=None))
+        while not self.load_reports.empty():
+            self.load = self.load_reports.get(block=True, timeout=None)
+            self.pending_clients = 0
+        if self.memory_limit and self.load.rss > self.memory_limit and not self.draining:
+            logging.info(f"{self.name} uses {self.load.rss // 1024 // 1024} MiB of memory, draining it.")
+            self.draining = True
+        if self.draining and not self.room_ids and self.process:
+            # its rooms start on other hosters from now on, so a fresh process can take rooms again
+            logging.info(f"{self.name} is drained, restarting it.")
+            self.stop()
+            while not self.load_reports.empty():
+                self.load_reports.get(block=True, timeout=None)
+            self.load = HosterLoad(0, 0.0, 0)
+            self.draining = False
+            self.start()
+
+    def start_room(self, room_id, players: int = 0):
+        self.update()
         if room_id in self.room_ids:
             pass  # should already be hosted currently.
         else:
             self.room_ids.add(room_id)
+            self.pending_clients += players
             self.rooms_to_start.put(room_id)
 
     def stop(self):
         if self.process:
             self.process.terminate()
+            self.process.join()
             self.process = None
 
     def done(self):
@@ -186,5 +273,5 @@ class MultiworldInstance():
 
 
 from .models import Room, Generation, STATE_QUEUED, STATE_STARTED, STATE_ERROR, db, Seed, Slot
-from .customserver import run_server_process, get_static_server_data
+from .customserver import HosterLoad, run_server_process, get_static_server_data
 from .generate import gen_game
@@ -1,11 +1,16 @@
 from __future__ import annotations
 
 import asyncio
+import base64
 import collections
+import concurrent.futures
+import contextlib
 import datetime
 import functools
+import json
 import logging
 import multiprocessing
+import os
 import pickle
 import random
 import socket
@@ -13,16 +18,20 @@ import threading
 import time
 import typing
 import sys
+import uuid
+import weakref
 
 import websockets
 from pony.orm import commit, db_session, select
 
 import Utils
 
-from MultiServer import Context, server, auto_shutdown, ServerCommandProcessor, ClientMessageProcessor, load_server_cert
-from Utils import restricted_loads, cache_argsless
+from MultiServer import Context, server, auto_shutdown, ServerCommandProcessor, ClientMessageProcessor, \
+    decode_save_journal, get_saving_second, get_server_extensions, load_server_cert
+from NetUtils import NetworkItem
+from Utils import cache_argsless
 from .locker import Locker
-from .models import Command, GameDataPackage, Room, db
+from .models import Command, GameDataPackage, Room, SaveJournalEntry, TrackerSummary, db
 
 
 class CustomClientMessageProcessor(ClientMessageProcessor):
@@ -34,11 +43,13 @@ class CustomClientMessageProcessor(ClientMessageProcessor):
         """
         if platform.lower().startswith("t"):  # twitch
             self.ctx.video[self.client.team, self.client.slot] = "Twitch", user
+            self.ctx.save_journal.changed("video")
             self.ctx.save()
             self.output(f"Registered Twitch Stream https://www.twitch.tv/{user}")
             return True
         elif platform.lower().startswith("y"):  # youtube
             self.ctx.video[self.client.team, self.client.slot] = "Youtube", user
+            self.ctx.save_journal.changed("video")
             self.ctx.save()
             self.output(f"Registered Youtube Stream for {user}")
             return True
@@ -57,8 +68,23 @@ class DBCommandProcessor(ServerCommandProcessor):
         self.ctx.logger.info(text)
 
 
+class SharedGameDataPackage(dict):
+    """Custom data package of a game, loaded once per process for all rooms that use it."""
+
+
+shared_game_data_packages: typing.MutableMapping[str, SharedGameDataPackage] = weakref.WeakValueDictionary()
+"""by checksum, kept alive by the rooms using them"""
+
+
 class WebHostContext(Context):
     room_id: int
+    game_data_packages: typing.Dict[str, SharedGameDataPackage]
+    tracker_summary: typing.Dict[typing.Tuple[int, int], typing.Dict[str, typing.Any]]
+    """(team, slot) -> progress for trackers, kept up to date as locations are checked and items received"""
+    tracker_summary_json: typing.Dict[typing.Tuple[int, int], str]
+    """(team, slot) -> tracker_summary entry as JSON, as last published"""
+    tracker_summary_changed: typing.Set[typing.Tuple[int, int]]
+    tracker_summary_dirty: bool
 
     def __init__(self, static_server_data: dict, logger: logging.Logger):
         # static server data is used during _load_game_data to load required data,
@@ -71,6 +97,10 @@ class WebHostContext(Context):
         self.main_loop = asyncio.get_running_loop()
         self.video = {}
         self.tags = ["AP", "WebHost"]
+        self.tracker_summary = {}
+        self.tracker_summary_json = {}
+        self.tracker_summary_changed = set()
+        self.tracker_summary_dirty = False
 
     def _load_game_data(self):
         for key, value in self.static_server_data.items():
@@ -78,19 +108,6 @@ class WebHostContext(Context):
             setattr(self, key, value)
         self.non_hintable_names = collections.defaultdict(frozenset, self.non_hintable_names)
 
-    def listen_to_db_commands(self):
-        cmdprocessor = DBCommandProcessor(self)
-
-        while not self.exit_event.is_set():
-            with db_session:
-                commands = select(command for command in Command if command.room.id == self.room_id)
-                if commands:
-                    for command in commands:
-                        self.main_loop.call_soon_threadsafe(cmdprocessor, command.commandtext)
-                        command.delete()
-                    commit()
-            time.sleep(5)
-
     @db_session
     def load(self, room_id: int):
         self.room_id = room_id
@@ -100,8 +117,8 @@ class WebHostContext(Context):
         else:
             self.port = get_random_port()
 
-        multidata = self.decompress(room.seed.multidata)
-        game_data_packages = {}
+        multidata = self.decompress(room.seed.multidata, lazy=True)
+        game_data_packages: typing.Dict[str, SharedGameDataPackage] = {}
 
         static_gamespackage = self.gamespackage  # this is shared across all rooms
         static_item_name_groups = self.item_name_groups
@@ -118,11 +135,17 @@ class WebHostContext(Context):
                     # games package could be dropped from static data once all rooms embed data package
                     del multidata["datapackage"][game]
                 else:
-                    row = GameDataPackage.get(checksum=game_data["checksum"])
-                    if row:  # None if rolled on >= 0.3.9 but uploaded to <= 0.3.8. multidata should be complete
-                        game_data_packages[game] = Utils.restricted_loads(row.data)
+                    game_data_package = shared_game_data_packages.get(game_data["checksum"])
+                    if game_data_package is None:
+                        row = GameDataPackage.get(checksum=game_data["checksum"])
+                        if row:
+                            game_data_package = SharedGameDataPackage(Utils.restricted_loads(row.data))
+                            shared_game_data_packages[game_data["checksum"]] = game_data_package
+                    if game_data_package is not None:
+                        game_data_packages[game] = game_data_package
                         continue
                     else:
+                        # None if rolled on >= 0.3.9 but uploaded to <= 0.3.8. multidata should be complete
                         self.logger.warning(f"Did not find game_data_package for {game}: {game_data['checksum']}")
             self.gamespackage[game] = static_gamespackage.get(game, {})
             self.item_name_groups[game] = static_item_name_groups.get(game, {})
@@ -133,30 +156,106 @@ class WebHostContext(Context):
             self.gamespackage = static_gamespackage
             self.item_name_groups = static_item_name_groups
             self.location_name_groups = static_location_name_groups
+        self.game_data_packages = game_data_packages
         return self._load(multidata, game_data_packages, True)
 
     @db_session
     def init_save(self, enabled: bool = True):
         self.saving = enabled
         if self.saving:
-            savegame_data = Room.get(id=self.room_id).multisave
-            if savegame_data:
-                self.set_save(restricted_loads(Room.get(id=self.room_id).multisave))
-            self._start_async_saving(atexit_save=False)
-        threading.Thread(target=self.listen_to_db_commands, daemon=True).start()
+            room = Room.get(id=self.room_id)
+            if room.multisave:
+                self.set_save(decode_save_journal(room.multisave, [entry.data for entry in
+                                                                   room.save_journal.order_by(SaveJournalEntry.id)]))
+        self.init_tracker_summary()
+        # saving regularly and commands from the website are handled by the RoomScheduler of the process
+
+    def init_tracker_summary(self):
+        self.tracker_summary = {}
+        self.tracker_summary_json = {}
+        for team, slot in self.player_names:
+            last_activity = self.client_activity_timers.get((team, slot))
+            self.tracker_summary[team, slot] = {
+                "checked": len(self.location_checks[team, slot]),
+                "total": len(self.locations[slot]) if slot in self.locations else 0,
+                "received": len(self.received_items.get((team, slot, True), ())),
+                "status": self.client_game_state[team, slot],
+                "last_activity": last_activity.timestamp() if last_activity else None,
+            }
+        self.tracker_summary_changed = set(self.tracker_summary)
+        self.tracker_summary_dirty = True
+
+    def tracker_summary_slot_changed(self, team: int, slot: int):
+        self.tracker_summary_changed.add((team, slot))
+        self.tracker_summary_dirty = True
+
+    def on_locations_checked(self, team: int, slot: int, locations: typing.Set[int]):
+        summary = self.tracker_summary.get((team, slot))
+        if summary:
+            summary["checked"] = len(self.location_checks[team, slot])
+            last_activity = self.client_activity_timers.get((team, slot))
+            summary["last_activity"] = last_activity.timestamp() if last_activity else None
+            self.tracker_summary_slot_changed(team, slot)
+
+    def on_items_received(self, team: int, slot: int, items: typing.Sequence[NetworkItem]):
+        summary = self.tracker_summary.get((team, slot))
+        if summary:
+            summary["received"] += len(items)
+            self.tracker_summary_slot_changed(team, slot)
+
+    def on_client_status_change(self, team: int, slot: int):
+        super().on_client_status_change(team, slot)
+        summary = self.tracker_summary.get((team, slot))
+        if summary:
+            summary["status"] = self.client_game_state[team, slot]
+            self.tracker_summary_slot_changed(team, slot)
+
+    def get_tracker_summary(self) -> str:
+        """Returns the tracker summary as JSON, a list of slots with their location and item counts and status.
+        Only slots that changed since the last call are serialized again."""
+        for team, slot in sorted(self.tracker_summary_changed):
+            self.tracker_summary_json[team, slot] = json.dumps({"team": team, "player": slot,
+                                                                **self.tracker_summary[team, slot]})
+        self.tracker_summary_changed.clear()
+        self.tracker_summary_dirty = False
+        return '{"slots": [' + ", ".join(self.tracker_summary_json.values()) + "]}"
 
     @db_session
     def _save(self, exit_save: bool = False) -> bool:
+        with self.save_journal.lock:
+            try:
+                written = self.stage_save(exit_save)
+                commit()
+            except Exception:
+                self.save_journal.reset()
+                raise
+            written()
+        return True
+
+    def stage_save(self, exit_save: bool = False) -> typing.Callable[[], None]:
+        """
+        Writes the changes since the last save to the database, without committing them.
+        Returns what to call once committed. Has to be called in a db_session, holding save_journal.lock.
+        """
         room = Room.get(id=self.room_id)
-        room.multisave = pickle.dumps(self.get_save())
+        if self.save_journal.needs_snapshot:
+            self.save_journal.reset()
+        changes = self.save_journal.get_changes(self.get_save)
+        data = pickle.dumps(changes)
+        if not self.save_journal.snapshot_size:
+            room.multisave = data
+            room.save_journal.select().delete(bulk=True)
+        elif changes:
+            SaveJournalEntry(room=room, data=data)
         # saving only occurs on activity, so we can "abuse" this information to mark this as last_activity
         if not exit_save:  # we don't want to count a shutdown as activity, which would restart the server again
             room.last_activity = datetime.datetime.utcnow()
-        return True
+        return functools.partial(self.save_journal.written, changes, len(data)) if changes else lambda: None
 
-    def get_save(self) -> dict:
-        d = super(WebHostContext, self).get_save()
-        d["video"] = [(tuple(playerslot), videodata) for playerslot, videodata in self.video.items()]
+    def get_save(self, sections: typing.Optional[typing.AbstractSet[str]] = None) -> dict:
+        d = super(WebHostContext, self).get_save(sections)
+        if sections is None or "video" in sections:
+            d["video"] = [(tuple(playerslot), videodata) for playerslot, videodata in self.video.items()]
         return d
 
 
@@ -164,29 +263,276 @@ def get_random_port():
     return random.randint(49152, 65535)
 
 
+def get_room_path(room_id: uuid.UUID) -> str:
+    """URL path of a room on a hoster that serves all of its rooms on one port, the short form of its id."""
+    return base64.urlsafe_b64encode(room_id.bytes).rstrip(b"=").decode("ascii")
+
+
+class SharedRoomServer:
+    """Websocket handler serving all rooms of a hoster on one port, routing connections by their URL path."""
+    rooms: typing.Dict[str, WebHostContext]
+
+    def __init__(self):
+        self.rooms = {}
+
+    async def __call__(self, websocket, path: str = "/"):
+        ctx = self.rooms.get(path.strip("/"))
+        if ctx is None:
+            await websocket.close(4004, "Room not found")
+            return
+        await server(websocket, path, ctx)
+
+    def add_room(self, ctx: WebHostContext) -> RoomRoute:
+        path = get_room_path(ctx.room_id)
+        self.rooms[path] = ctx
+        return RoomRoute(self, path, ctx)
+
+
+class RoomRoute:
+    """Stands in for the websocket server of a room served by a SharedRoomServer, as ctx.server."""
+
+    def __init__(self, shared_server: SharedRoomServer, path: str, ctx: WebHostContext):
+        self.shared_server = shared_server
+        self.path = path
+        self.ctx = ctx
+
+    @property
+    def ws_server(self) -> RoomRoute:
+        return self
+
+    def close(self):
+        """Stops routing to the room and disconnects its clients."""
+        if self.shared_server.rooms.get(self.path) is self.ctx:
+            del self.shared_server.rooms[self.path]
+        for endpoint in self.ctx.endpoints:
+            Utils.async_start(endpoint.socket.close())
+
+
+class HosterLoad(typing.NamedTuple):
+    """Load of a room hoster process, as reported to the autohost."""
+    clients: int
+    messages_per_second: float
+    rss: int
+    """resident memory of the process, in bytes"""
+
+    @property
+    def score(self) -> float:
+        """Rough cost of the load, counting each client, each message per second and each 64 MiB of memory as 1."""
+        return self.clients + self.messages_per_second + self.rss / (64 * 1024 * 1024)
+
+
+def get_resident_memory() -> int:
+    """Returns the resident memory of this process in bytes, or 0 if it can't be determined."""
+    try:
+        with open("/proc/self/statm", "rb") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ModuleNotFoundError:
+        return 0  # unix only module
+    # only the peak is available here, in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RoomScheduler:
+    """
+    Does the periodic work of all rooms of a hoster from its event loop, instead of with threads for each room.
+    Commands from the website are fetched for all rooms in one query, and rooms that changed are saved together in
+    one transaction, at their saving second. The database is only accessed from a small thread pool.
+    Tracker summaries that changed are written every few seconds, as they are much smaller than saves.
+    With a load_reports queue, the load of the hoster is also put into it regularly, for placing new rooms.
+    """
+    command_interval = 5
+    load_report_interval = 5
+    tracker_summary_interval = 5
+    rooms: typing.Dict[uuid.UUID, WebHostContext]
+    command_processors: typing.Dict[uuid.UUID, DBCommandProcessor]
+    next_saves: typing.Dict[uuid.UUID, float]
+    """time each room is saved next, if it changed"""
+
+    def __init__(self, max_workers: int = 2, load_reports: typing.Optional[multiprocessing.Queue] = None):
+        self.rooms = {}
+        self.command_processors = {}
+        self.next_saves = {}
+        self.load_reports = load_reports
+        self._message_counts: typing.Dict[uuid.UUID, int] = {}
+        self._last_load_report = time.monotonic()
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers, thread_name_prefix="RoomScheduler")
+
+    def add_room(self, ctx: WebHostContext):
+        self.rooms[ctx.room_id] = ctx
+        self.command_processors[ctx.room_id] = DBCommandProcessor(ctx)
+        now = time.time()
+        # save at the expected second, like Context._start_async_saving, so trackers know when to update
+        second = get_saving_second(ctx.seed_name, ctx.auto_save_interval)
+        self.next_saves[ctx.room_id] = now + (second - now) % ctx.auto_save_interval
+
+    def remove_room(self, ctx: WebHostContext):
+        if self.rooms.get(ctx.room_id) is ctx:
+            del self.rooms[ctx.room_id], self.command_processors[ctx.room_id], self.next_saves[ctx.room_id]
+
+    async def run(self):
+        await asyncio.gather(self._process_commands(), self._save_rooms(), self._report_load(),
+                             self._publish_tracker_summaries())
+
+    def get_load(self) -> HosterLoad:
+        """Returns the current load, with the messages per second since the last call."""
+        now = time.monotonic()
+        elapsed = max(now - self._last_load_report, 0.001)
+        self._last_load_report = now
+        message_counts = {room_id: ctx.client_messages for room_id, ctx in self.rooms.items()}
+        messages = sum(count - self._message_counts.get(room_id, 0) for room_id, count in message_counts.items())
+        self._message_counts = message_counts
+        clients = sum(len(ctx.endpoints) for ctx in self.rooms.values())
+        return HosterLoad(clients, messages / elapsed, get_resident_memory())
+
+    async def _report_load(self):
+        if not self.load_reports:
+            return
+        while True:
+            await asyncio.sleep(self.load_report_interval)
+            self.load_reports.put(self.get_load())
+
+    async def _process_commands(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.command_interval)
+            if not self.rooms:
+                continue
+            try:
+                commands = await loop.run_in_executor(self.executor, self._claim_commands, list(self.rooms))
+            except Exception as e:
+                logging.exception(e)
+                continue
+            unprocessed: typing.List[typing.Tuple[uuid.UUID, str]] = []
+            for room_id, command_text in commands:
+                command_processor = self.command_processors.get(room_id)
+                if command_processor:
+                    command_processor(command_text)
+                else:
+                    unprocessed.append((room_id, command_text))
+            if unprocessed:
+                # a room that was removed since the claim leaves its commands to whoever hosts it next
+                try:
+                    await loop.run_in_executor(self.executor, self._return_commands, unprocessed)
+                except Exception as e:
+                    logging.exception(e)
+
+    @staticmethod
+    def _claim_commands(room_ids: typing.List[uuid.UUID]) -> typing.List[typing.Tuple[uuid.UUID, str]]:
+        """Fetches the commands of the rooms and deletes them in the same transaction, so each is run only once.
+        The rows are locked while doing so, another hoster claiming at the same time waits and gets none of them."""
+        with db_session:
+            commands = select(command for command in Command if command.room.id in room_ids) \
+                .order_by(Command.id).for_update()[:]
+            claimed = [(command.room.id, command.commandtext) for command in commands]
+            for command in commands:
+                command.delete()
+            return claimed
+
+    @staticmethod
+    def _return_commands(commands: typing.List[typing.Tuple[uuid.UUID, str]]) -> None:
+        with db_session:
+            for room_id, command_text in commands:
+                Command(room=room_id, commandtext=command_text)
+
+    async def _publish_tracker_summaries(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.tracker_summary_interval)
+            # serialized here, as the summaries are only changed from the event loop
+            summaries = [(room_id, ctx.get_tracker_summary()) for room_id, ctx in self.rooms.items()
+                         if ctx.tracker_summary_dirty]
+            if summaries:
+                try:
+                    await loop.run_in_executor(self.executor, self.write_tracker_summaries, summaries)
+                except Exception as e:
+                    logging.exception(e)
+
+    @staticmethod
+    def write_tracker_summaries(summaries: typing.List[typing.Tuple[uuid.UUID, str]]):
+        with db_session:
+            now = datetime.datetime.utcnow()
+            for room_id, data in summaries:
+                summary = TrackerSummary.get(room=room_id)
+                if summary:
+                    summary.data = data
+                    summary.last_update = now
+                else:
+                    TrackerSummary(room=room_id, data=data, last_update=now)
+            commit()
+
+    async def _save_rooms(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(1)
+            now = time.time()
+            due = []
+            for room_id, next_save in self.next_saves.items():
+                if next_save <= now:
+                    ctx = self.rooms[room_id]
+                    self.next_saves[room_id] = next_save + ctx.auto_save_interval * \
+                        (1 + int((now - next_save) // ctx.auto_save_interval))
+                    # rooms shutting down save themselves one last time
+                    if ctx.saving and ctx.save_dirty and not ctx.exit_event.is_set():
+                        ctx.save_dirty = False
+                        due.append(ctx)
+            if due:
+                await loop.run_in_executor(self.executor, self._save, due)
+
+    @staticmethod
+    def _save(rooms: typing.List[WebHostContext]):
+        try:
+            with contextlib.ExitStack() as locks, db_session:
+                for ctx in rooms:
+                    locks.enter_context(ctx.save_journal.lock)
+                try:
+                    written = [ctx.stage_save() for ctx in rooms]
+                    commit()
+                except Exception:
+                    for ctx in rooms:
+                        ctx.save_journal.reset()
+                    raise
+                for callback in written:
+                    callback()
+        except Exception as e:
+            # retry one room at a time, so one room failing does not keep the others from saving
+            logging.exception(e)
+            for ctx in rooms:
+                try:
+                    ctx._save()
+                except Exception as room_exception:
+                    ctx.logger.exception(room_exception)
+                    ctx.save_dirty = True
+
+
 @cache_argsless
 def get_static_server_data() -> dict:
-    import worlds
+    from world_manifest import get_manifest
+    games = get_manifest()["games"]
     data = {
         "non_hintable_names": {
-            world_name: world.hint_blacklist
-            for world_name, world in worlds.AutoWorldRegister.world_types.items()
+            world_name: frozenset(game["hint_blacklist"])
+            for world_name, game in games.items()
         },
         "gamespackage": {
             world_name: {
                 key: value
-                for key, value in game_package.items()
+                for key, value in game["data_package"].items()
                 if key not in ("item_name_groups", "location_name_groups")
             }
-            for world_name, game_package in worlds.network_data_package["games"].items()
+            for world_name, game in games.items()
         },
         "item_name_groups": {
-            world_name: world.item_name_groups
-            for world_name, world in worlds.AutoWorldRegister.world_types.items()
+            world_name: {name: set(group) for name, group in game["data_package"]["item_name_groups"].items()}
+            for world_name, game in games.items()
         },
         "location_name_groups": {
-            world_name: world.location_name_groups
-            for world_name, world in worlds.AutoWorldRegister.world_types.items()
+            world_name: {name: set(group) for name, group in game["data_package"]["location_name_groups"].items()}
+            for world_name, game in games.items()
         },
     }
 
@@ -215,7 +561,12 @@ def set_up_logging(room_id) -> logging.Logger:
 
 def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
                        cert_file: typing.Optional[str], cert_key_file: typing.Optional[str],
-                       host: str, rooms_to_run: multiprocessing.Queue, rooms_shutting_down: multiprocessing.Queue):
+                       host: str, rooms_to_run: multiprocessing.Queue, rooms_shutting_down: multiprocessing.Queue,
+                       shared_port: int = 0, load_reports: typing.Optional[multiprocessing.Queue] = None,
+                       compression: typing.Optional[typing.Dict[str, int]] = None):
+    """Hosts the rooms put into rooms_to_run. With a shared_port, all of them are served on it, by URL path.
+    With load_reports, the HosterLoad of the process is put into it every few seconds.
+    compression holds the keyword arguments of MultiServer.get_server_extensions."""
     Utils.init_logging(name)
     try:
         import resource
@@ -241,6 +592,17 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
     gc.collect()  # free intermediate objects used during setup
 
     loop = asyncio.get_event_loop()
+    extensions = get_server_extensions(**(compression or {}))
+
+    shared_server: typing.Optional[SharedRoomServer] = None
+    if shared_port:
+        shared_server = SharedRoomServer()
+        loop.run_until_complete(websockets.serve(shared_server, "", shared_port, ssl=ssl_context,
+                                                 compression=None, extensions=extensions))
+        logging.info(f"Hosting rooms of {name} at {host}:{shared_port}")
+
+    scheduler = RoomScheduler(load_reports=load_reports)
+    scheduler_task = loop.create_task(scheduler.run())  # referenced, so it is not garbage collected
 
     async def start_room(room_id):
         with Locker(f"RoomLocker {room_id}"):
@@ -249,27 +611,35 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
                 ctx = WebHostContext(static_server_data, logger)
                 ctx.load(room_id)
                 ctx.init_save()
-                try:
-                    ctx.server = websockets.serve(
-                        functools.partial(server, ctx=ctx), ctx.host, ctx.port, ssl=ssl_context)
-
-                    await ctx.server
-                except OSError:  # likely port in use
-                    ctx.server = websockets.serve(
-                        functools.partial(server, ctx=ctx), ctx.host, 0, ssl=ssl_context)
-
-                    await ctx.server
+                scheduler.add_room(ctx)
                 port = 0
-                for wssocket in ctx.server.ws_server.sockets:
-                    socketname = wssocket.getsockname()
-                    if wssocket.family == socket.AF_INET6:
-                        # Prefer IPv4, as most users seem to not have working ipv6 support
-                        if not port:
+                if shared_server:
+                    ctx.server = shared_server.add_room(ctx)
+                    port = shared_port
+                else:
+                    try:
+                        ctx.server = websockets.serve(
+                            functools.partial(server, ctx=ctx), ctx.host, ctx.port, ssl=ssl_context,
+                            compression=None, extensions=extensions)
+
+                        await ctx.server
+                    except OSError:  # likely port in use
+                        ctx.server = websockets.serve(
+                            functools.partial(server, ctx=ctx), ctx.host, 0, ssl=ssl_context,
+                            compression=None, extensions=extensions)
+
+                        await ctx.server
+                    for wssocket in ctx.server.ws_server.sockets:
+                        socketname = wssocket.getsockname()
+                        if wssocket.family == socket.AF_INET6:
+                            # Prefer IPv4, as most users seem to not have working ipv6 support
+                            if not port:
+                                port = socketname[1]
+                        elif wssocket.family == socket.AF_INET:
                             port = socketname[1]
-                    elif wssocket.family == socket.AF_INET:
-                        port = socketname[1]
                 if port:
-                    ctx.logger.info(f'Hosting game at {host}:{port}')
+                    ctx.logger.info(f'Hosting game at {host}:{port}' +
+                                    (f'/{get_room_path(room_id)}' if shared_server else ''))
                     with db_session:
                         room = Room.get(id=ctx.room_id)
                         room.last_port = port
@@ -298,14 +668,18 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
                     setattr(asyncio.current_task(), "save", None)
             finally:
                 try:
-                    ctx.save_dirty = False  # make sure the saving thread does not write to DB after final wakeup
-                    ctx.exit_event.set()  # make sure the saving thread stops at some point
-                    # NOTE: async saving should probably be an async task and could be merged with shutdown_task
+                    if isinstance(ctx.server, RoomRoute):
+                        ctx.server.close()  # the shared server keeps running
+                    scheduler.remove_room(ctx)
+                    ctx.save_dirty = False
+                    ctx.exit_event.set()
                     with (db_session):
                         # ensure the Room does not spin up again on its own, minute of safety buffer
                         room = Room.get(id=room_id)
                         room.last_activity = datetime.datetime.utcnow() - \
                                              datetime.timedelta(minutes=1, seconds=room.timeout)
+                    if ctx.tracker_summary_dirty:
+                        scheduler.write_tracker_summaries([(ctx.room_id, ctx.get_tracker_summary())])
                     logging.info(f"Shutting down room {room_id} on {name}.")
                 finally:
                     await asyncio.sleep(5)
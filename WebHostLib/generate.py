@@ -1,9 +1,13 @@
 import concurrent.futures
+import contextlib
 import json
+import logging
 import os
 import pickle
 import random
 import tempfile
+import threading
+import time
 import zipfile
 from collections import Counter
 from typing import Any, Dict, List, Optional, Union, Set
@@ -11,7 +15,7 @@ from typing import Any, Dict, List, Optional, Union, Set
 from flask import flash, redirect, render_template, request, session, url_for
 from pony.orm import commit, db_session
 
-from BaseClasses import get_seed, seeddigits
+from BaseClasses import GenerationProgress, get_seed, seeddigits
 from Generate import PlandoOptions, handle_name
 from Main import main as ERmain
 from Utils import __version__
@@ -103,12 +107,62 @@ def start_generation(options: Dict[str, Union[dict, str]], meta: Dict[str, Any])
         return redirect(url_for("view_seed", seed=seed_id))
 
 
+class GenerationProgressWriter(GenerationProgress):
+    """Stores the progress of a queued generation as "progress" in the meta of its Generation, for the wait page.
+    Stages are written when they start, fill counters at most every fill_interval seconds."""
+    fill_interval: float = 1
+
+    def __init__(self, generation_id: UUID) -> None:
+        super().__init__()
+        self.generation_id = generation_id
+        self.last_write = 0.0
+        self._write_lock = threading.Lock()
+
+    def cancel(self) -> None:
+        super().cancel()
+        with self._write_lock:
+            pass  # once this returns, no write is running anymore and none will start
+
+    def report_stage(self, stage: str) -> None:
+        super().report_stage(stage)
+        self.write()
+
+    def report_fill(self, name: str, placed: int, total: int) -> None:
+        super().report_fill(name, placed, total)
+        if time.monotonic() - self.last_write >= self.fill_interval:
+            self.write()
+
+    def get_info(self) -> Dict[str, Any]:
+        info: Dict[str, Any] = {"stage": self.stage}
+        if self.fill:
+            name, placed, total = self.fill
+            info["fill"] = {"name": name, "placed": placed, "total": total}
+        return info
+
+    def write(self) -> None:
+        with self._write_lock:
+            if self.cancelled:
+                return
+            self.last_write = time.monotonic()
+            try:
+                with db_session:
+                    gen = Generation.get(id=self.generation_id)
+                    if gen is not None:
+                        meta = json.loads(gen.meta)
+                        meta["progress"] = self.get_info()
+                        gen.meta = json.dumps(meta)
+            except Exception as e:
+                # progress is only informative, generation continues and writes again on the next report
+                logging.warning(f"Could not write progress of generation {self.generation_id}: {e}")
+
+
 def gen_game(gen_options: dict, meta: Optional[Dict[str, Any]] = None, owner=None, sid=None):
     if not meta:
         meta: Dict[str, Any] = {}
 
     meta.setdefault("server_options", {}).setdefault("hint_cost", 10)
     race = meta.setdefault("generator_options", {}).setdefault("race", False)
+    progress = GenerationProgressWriter(sid) if sid else GenerationProgress()
 
     def task():
         target = tempfile.TemporaryDirectory()
@@ -149,15 +203,18 @@ def gen_game(gen_options: dict, meta: Optional[Dict[str, Any]] = None, owner=Non
             erargs.name[player] = handle_name(erargs.name[player], player, name_counter)
         if len(set(erargs.name.values())) != len(erargs.name):
             raise Exception(f"Names have to be unique. Names: {Counter(erargs.name.values())}")
-        ERmain(erargs, seed, baked_server_options=meta["server_options"])
+        ERmain(erargs, seed, baked_server_options=meta["server_options"], progress=progress)
 
-        return upload_to_db(target.name, sid, owner, race)
+        progress.report_stage("upload")
+        return upload_to_db(target.name, sid, owner, race, progress)
     thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers=1)
     thread = thread_pool.submit(task)
 
     try:
         return thread.result(app.config["JOB_TIME"])
     except concurrent.futures.TimeoutError as e:
+        # makes the generation raise GenerationCancelled at its next stage or fill step, freeing this worker
+        progress.cancel()
         if sid:
             with db_session:
                 gen = Generation.get(id=sid)
@@ -180,6 +237,13 @@ def gen_game(gen_options: dict, meta: Optional[Dict[str, Any]] = None, owner=Non
                     gen.meta = json.dumps(meta)
                     commit()
         raise
+    finally:
+        thread_pool.shutdown(wait=False)
+        if progress.cancelled:
+            done, _ = concurrent.futures.wait((thread,), app.config["JOB_CANCEL_TIME"])
+            if not done:
+                logging.warning(f"Generation {sid} did not stop within {app.config['JOB_CANCEL_TIME']} seconds "
+                                f"of being cancelled.")
 
 
 @app.route('/wait/<suuid:seed>')
@@ -194,14 +258,15 @@ def wait_seed(seed: UUID):
         return "Generation not found."
     elif generation.state == STATE_ERROR:
         return render_template("seedError.html", seed_error=generation.meta)
-    return render_template("waitSeed.html", seed_id=seed_id)
+    return render_template("waitSeed.html", seed_id=seed_id, progress=json.loads(generation.meta).get("progress"))
 
 
-def upload_to_db(folder, sid, owner, race):
+def upload_to_db(folder, sid, owner, race, progress: Optional[GenerationProgress] = None):
     for file in os.listdir(folder):
         file = os.path.join(folder, file)
         if file.endswith(".zip"):
-            with db_session:
+            # a generation that timed out is not committed, even if it finished while it was being cancelled
+            with progress.unless_cancelled() if progress else contextlib.nullcontext(), db_session:
                 with zipfile.ZipFile(file) as zfile:
                     res = upload_zip_to_db(zfile, owner, {"race": race}, sid)
                 if type(res) == "str":
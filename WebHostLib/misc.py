@@ -184,9 +184,10 @@ def discord():
 @cache.cached()
 def get_datapackage():
     """A pretty print version of /api/datapackage"""
-    from worlds import network_data_package
+    from world_manifest import get_manifest
     import json
-    return Response(json.dumps(network_data_package, indent=4), mimetype="text/plain")
+    data_package = {"games": {game: game_data["data_package"] for game, game_data in get_manifest()["games"].items()}}
+    return Response(json.dumps(data_package, indent=4), mimetype="text/plain")
 
 
 @app.route('/index')
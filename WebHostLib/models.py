@@ -26,6 +26,8 @@ class Room(db.Entity):
     commands = Set('Command')
     seed = Required('Seed', index=True)
     multisave = Optional(buffer, lazy=True)
+    save_journal = Set('SaveJournalEntry')
+    tracker_summary = Optional('TrackerSummary', cascade_delete=True)
     show_spoiler = Required(int, default=0)  # 0 -> never, 1 -> after completion, -> 2 always
     timeout = Required(int, default=lambda: 2 * 60 * 60)  # seconds since last activity to shutdown
     tracker = Optional(UUID, index=True)
@@ -33,6 +35,20 @@ class Room(db.Entity):
     last_port = Optional(int, default=lambda: 0)
 
 
+class SaveJournalEntry(db.Entity):
+    # changes to Room.multisave since it was written, in order of id, see MultiServer.SaveJournal
+    id = PrimaryKey(int, auto=True)
+    room = Required(Room, index=True)
+    data = Required(buffer, lazy=True)
+
+
+class TrackerSummary(db.Entity):
+    # per slot counts, written by the hosting room regularly, see WebHostContext.get_tracker_summary
+    room = PrimaryKey(Room)
+    data = Required(LongStr)
+    last_update = Required(datetime, default=lambda: datetime.utcnow())
+
+
 class Seed(db.Entity):
     id = PrimaryKey(UUID, default=uuid4)
     rooms = Set(Room)
@@ -75,8 +75,8 @@ def create_game_played_figure(all_games_data: typing.Dict[datetime.date, typing.
 @app.route('/stats')
 @cache.memoize(timeout=60 * 60)  # regen once per hour should be plenty
 def stats():
-    from worlds import network_data_package
-    known_games = set(network_data_package["games"])
+    from world_manifest import get_manifest
+    known_games = set(get_manifest()["games"])
     plot = figure(title="Games Played Per Day", x_axis_type='datetime', x_axis_label="Date",
                   y_axis_label="Games Played", sizing_mode="scale_both", width=PLOT_WIDTH, height=500)
 
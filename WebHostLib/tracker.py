@@ -1,23 +1,102 @@
 import datetime
 import collections
+import json
+import threading
 from dataclasses import dataclass
-from typing import Any, Callable, Dict, List, Optional, Set, Tuple, NamedTuple, Counter
+from typing import Any, Callable, Dict, Generic, Hashable, List, Mapping, Optional, Set, Tuple, TypeVar, NamedTuple, \
+    Counter
 from uuid import UUID
 from email.utils import parsedate_to_datetime
 
 from flask import render_template, make_response, Response, request
 from werkzeug.exceptions import abort
 
-from MultiServer import Context, get_saving_second
-from NetUtils import ClientStatus, Hint, NetworkItem, NetworkSlot, SlotType
+from MultiServer import Context, decode_save_journal, get_saving_second
+from NetUtils import ClientStatus, Hint, NetworkItem, NetworkSlot, SlotType, get_sphere_index
 from Utils import restricted_loads, KeyedDefaultDict
 from . import app, cache
-from .models import GameDataPackage, Room
+from .models import GameDataPackage, Room, SaveJournalEntry
 
 # Multisave is currently updated, at most, every minute.
 TRACKER_CACHE_TIMEOUT_IN_SECONDS = 60
-
-_multidata_cache = {}
+# Budgets of the decoded multidata and data package caches, in bytes of their estimated decoded size.
+TRACKER_MULTIDATA_CACHE_SIZE = 256 * 1024 * 1024
+TRACKER_DATAPACKAGE_CACHE_SIZE = 64 * 1024 * 1024
+# The decoded size is estimated from the stored size by these factors, as measuring the decoded objects is costly.
+# Measured on a seed of 8 slots of 6 games: its multidata, with the data packages stripped as on upload, decodes to
+# about 25 times its stored size, and the lookup tables of each data package take about 4 to 5.5 times its pickle.
+TRACKER_MULTIDATA_EXPANSION = 25
+TRACKER_DATAPACKAGE_EXPANSION = 5
+
+_Value = TypeVar("_Value")
+
+
+class SizedLRUCache(Generic[_Value]):
+    """Thread-safe least recently used cache, evicting entries once their total size exceeds max_size."""
+    max_size: int
+    size: int
+    _entries: "collections.OrderedDict[Hashable, Tuple[_Value, int]]"
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.size = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable, load: Callable[[], Tuple[_Value, int]]) -> _Value:
+        """Returns the cached value of key, or calls load for a new (value, size) to cache."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                self._entries.move_to_end(key)
+                return entry[0]
+        value, size = load()  # outside the lock, so other keys can be served meanwhile
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = value, size
+                self.size += size
+                while self.size > self.max_size and len(self._entries) > 1:
+                    _, (_, evicted_size) = self._entries.popitem(last=False)
+                    self.size -= evicted_size
+        return value
+
+
+class GameLookup(NamedTuple):
+    """Lookup tables of a data package, shared between all TrackerData using it."""
+    item_id_to_name: Dict[int, str]
+    location_id_to_name: Dict[int, str]
+    item_name_to_id: Dict[str, int]
+    location_name_to_id: Dict[str, int]
+
+
+def _load_multidata(room: Room) -> Tuple[Mapping[str, Any], int]:
+    multidata = room.seed.multidata
+    return Context.decompress(multidata, lazy=True), len(multidata) * TRACKER_MULTIDATA_EXPANSION
+
+
+def _load_game_lookup(checksum: str) -> Tuple[GameLookup, int]:
+    data = GameDataPackage.get(checksum=checksum).data
+    game_package = restricted_loads(data)
+    return GameLookup(
+        KeyedDefaultDict(lambda code: f"Unknown Item (ID: {code})", {
+            id: name for name, id in game_package["item_name_to_id"].items()}),
+        KeyedDefaultDict(lambda code: f"Unknown Location (ID: {code})", {
+            id: name for name, id in game_package["location_name_to_id"].items()}),
+        game_package["item_name_to_id"],
+        game_package["location_name_to_id"],
+    ), len(data) * TRACKER_DATAPACKAGE_EXPANSION
+
+
+# seed id -> decoded multidata, which never changes, so only the multisave has to be read per request
+_multidata_cache: SizedLRUCache[Mapping[str, Any]] = SizedLRUCache(TRACKER_MULTIDATA_CACHE_SIZE)
+# data package checksum -> lookup tables
+_game_lookup_cache: SizedLRUCache[GameLookup] = SizedLRUCache(TRACKER_DATAPACKAGE_CACHE_SIZE)
 _multiworld_trackers: Dict[str, Callable] = {}
 _player_trackers: Dict[str, Callable] = {}
 
@@ -49,16 +128,20 @@ class TrackerData:
     subsequent helper method calls do not need to recompute results during the lifetime of this instance.
     """
     room: Room
-    _multidata: Dict[str, Any]
-    _multisave: Dict[str, Any]
+    _multidata: Mapping[str, Any]
     _tracker_cache: Dict[str, Any]
+    _summary: Dict[TeamPlayer, Dict[str, Any]]
+    """per slot counts and status written by the hosting room, fresher than the multisave,
+    see WebHostContext.tracker_summary. Location and item lists only come from the multisave, which may lag behind."""
 
     def __init__(self, room: Room):
         """Initialize a new RoomMultidata object for the current room."""
         self.room = room
-        self._multidata = Context.decompress(room.seed.multidata)
-        self._multisave = restricted_loads(room.multisave) if room.multisave else {}
+        self._multidata = _multidata_cache.get(room.seed.id, lambda: _load_multidata(room))
         self._tracker_cache = {}
+        self._summary = {
+            (slot["team"], slot["player"]): slot for slot in json.loads(room.tracker_summary.data)["slots"]
+        } if room.tracker_summary else {}
 
         self.item_name_to_id: Dict[str, Dict[str, int]] = {}
         self.location_name_to_id: Dict[str, Dict[str, int]] = {}
@@ -71,15 +154,22 @@ class TrackerData:
             game_name: KeyedDefaultDict(lambda code: f"Unknown Game {game_name} - Location (ID: {code})")
         })
         for game, game_package in self._multidata["datapackage"].items():
-            game_package = restricted_loads(GameDataPackage.get(checksum=game_package["checksum"]).data)
-            self.item_id_to_name[game] = KeyedDefaultDict(lambda code: f"Unknown Item (ID: {code})", {
-                id: name for name, id in game_package["item_name_to_id"].items()})
-            self.location_id_to_name[game] = KeyedDefaultDict(lambda code: f"Unknown Location (ID: {code})", {
-                id: name for name, id in game_package["location_name_to_id"].items()})
+            checksum = game_package["checksum"]
+            game_lookup = _game_lookup_cache.get(checksum, lambda: _load_game_lookup(checksum))
+            self.item_id_to_name[game] = game_lookup.item_id_to_name
+            self.location_id_to_name[game] = game_lookup.location_id_to_name
 
             # Normal lookup tables as well.
-            self.item_name_to_id[game] = game_package["item_name_to_id"]
-            self.location_name_to_id[game] = game_package["item_name_to_id"]
+            self.item_name_to_id[game] = game_lookup.item_name_to_id
+            self.location_name_to_id[game] = game_lookup.location_name_to_id
+
+    @property
+    @_cache_results
+    def _multisave(self) -> Dict[str, Any]:
+        """The multisave is only decoded if a tracker needs more than the summary."""
+        return decode_save_journal(self.room.multisave, [
+            entry.data for entry in self.room.save_journal.order_by(SaveJournalEntry.id)
+        ]) if self.room.multisave else {}
 
     def get_seed_name(self) -> str:
         """Retrieves the seed name."""
@@ -109,15 +199,23 @@ class TrackerData:
         """Retrieves a list of all item codes a given slot starts with."""
         return self._multidata["precollected_items"][player]
 
+    @_cache_results
     def get_player_checked_locations(self, team: int, player: int) -> Set[int]:
         """Retrieves the set of all locations marked complete by this player."""
         return self._multisave.get("location_checks", {}).get((team, player), set())
 
+    def get_player_checked_count(self, team: int, player: int) -> int:
+        """Retrieves the number of locations marked complete by this player."""
+        if (team, player) in self._summary:
+            return self._summary[team, player]["checked"]
+        return len(self.get_player_checked_locations(team, player))
+
     @_cache_results
     def get_player_missing_locations(self, team: int, player: int) -> Set[int]:
         """Retrieves the set of all locations not marked complete by this player."""
         return set(self.get_player_locations(team, player)) - self.get_player_checked_locations(team, player)
 
+    @_cache_results
     def get_player_received_items(self, team: int, player: int) -> List[NetworkItem]:
         """Returns all items received to this player in order of received."""
         return self._multisave.get("received_items", {}).get((team, player, True), [])
@@ -149,6 +247,8 @@ class TrackerData:
 
     def get_player_client_status(self, team: int, player: int) -> ClientStatus:
         """Retrieves the ClientStatus of a particular player."""
+        if (team, player) in self._summary:
+            return ClientStatus(self._summary[team, player]["status"])
         return self._multisave.get("client_game_state", {}).get((team, player), ClientStatus.CLIENT_UNKNOWN)
 
     def get_player_alias(self, team: int, player: int) -> Optional[str]:
@@ -187,7 +287,7 @@ class TrackerData:
     def get_team_locations_checked_count(self) -> Dict[int, int]:
         """Retrieves a dictionary of checked player locations each team has."""
         return {
-            team: sum(len(self.get_player_checked_locations(team, player)) for player in players)
+            team: sum(self.get_player_checked_count(team, player) for player in players)
             for team, players in self.get_all_players().items()
         }
 
@@ -242,7 +342,7 @@ class TrackerData:
     def get_room_locations_complete(self) -> Dict[TeamPlayer, int]:
         """Retrieves a dictionary of all locations complete per player."""
         return {
-            (team, player): len(self.get_player_checked_locations(team, player))
+            (team, player): self.get_player_checked_count(team, player)
             for team, players in self.get_all_players().items() for player in players
         }
 
@@ -275,7 +375,12 @@ class TrackerData:
         """
         last_activity: Dict[TeamPlayer, datetime.timedelta] = {}
         now = datetime.datetime.utcnow()
-        for (team, player), timestamp in self._multisave.get("client_activity_timers", []):
+        if self._summary:
+            timers = [(team_player, slot["last_activity"]) for team_player, slot in self._summary.items()
+                      if slot["last_activity"] is not None]
+        else:
+            timers = self._multisave.get("client_activity_timers", [])
+        for (team, player), timestamp in timers:
             last_activity[team, player] = now - datetime.datetime.utcfromtimestamp(timestamp)
 
         return last_activity
@@ -297,6 +402,15 @@ class TrackerData:
         """ each sphere is { player: { location_id, ... } } """
         return self._multidata.get("spheres", [])
 
+    @_cache_results
+    def get_location_spheres(self) -> Dict[int, Dict[int, int]]:
+        """ { player: { location_id: sphere } }, empty if the seed has no spheres """
+        return get_sphere_index(self.get_spheres())
+
+    def get_player_location_spheres(self, team: int, player: int) -> Dict[int, int]:
+        """Returns the sphere of each location of a player, empty if the seed has no spheres."""
+        return self.get_location_spheres().get(player, {})
+
 
 def _process_if_request_valid(incoming_request, room: Optional[Room]) -> Optional[Response]:
     if not room:
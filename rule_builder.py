@@ -0,0 +1,266 @@
+"""
+Declarative access rules for locations and entrances.
+
+Unlike a lambda, a rule built from these nodes knows which items and regions it reads. CollectionState uses that to skip
+rules whose inputs did not change, and each rule is compiled into a single function the first time it is evaluated.
+
+Example::
+
+    set_rule(multiworld.get_entrance("Boss Door", player), Has("Boss Key", player) & CanReach("Armory", player))
+"""
+
+from __future__ import annotations
+
+import typing
+from typing import Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple, Union
+
+if typing.TYPE_CHECKING:
+    from BaseClasses import CollectionState
+
+__all__ = ["Rule", "RuleDependencies", "Has", "HasAll", "HasAny", "Count", "CanReach", "And", "Or"]
+
+CollectionRule = Callable[["CollectionState"], bool]
+
+
+class RuleDependencies(NamedTuple):
+    """What a Rule reads from a CollectionState."""
+    items: Dict[int, FrozenSet[str]]
+    """item names, by player"""
+    regions: Dict[int, FrozenSet[str]]
+    """names of regions whose reachability is read, by player"""
+    complete: bool
+    """False if the rule also reads something else, like a lambda or the reachability of a location"""
+
+
+class _Compiler:
+    """Collects the names the source of a compiled rule refers to."""
+    players: Set[int]
+    constants: Dict[str, object]
+
+    def __init__(self) -> None:
+        self.players = set()
+        self.constants = {}
+
+    def count(self, item: str, player: int) -> str:
+        """Returns an expression for the count of the item in the state."""
+        if not isinstance(player, int):
+            raise TypeError(f"player has to be an int, not {player!r}")
+        self.players.add(player)
+        return f"items_{player}({item!r}, 0)"
+
+    def constant(self, value: object) -> str:
+        name = f"constant_{len(self.constants)}"
+        self.constants[name] = value
+        return name
+
+    def build(self, expression: str) -> CollectionRule:
+        lines = ["def evaluate(state):"]
+        # item counts are looked up without taking ownership of the counters, see BaseClasses.CopyOnWriteDict
+        lines += [f"    items_{player} = peek(state.prog_items, {player}).get" for player in sorted(self.players)]
+        lines.append(f"    return {expression}")
+        namespace: Dict[str, object] = {"peek": dict.__getitem__, **self.constants}
+        exec(compile("\n".join(lines), "<rule>", "exec"), namespace)
+        return typing.cast(CollectionRule, namespace["evaluate"])
+
+
+class Rule:
+    """Base class of declarative access rules, which can be used anywhere a CollectionRule is expected.
+    Combine them with `&` and `|`, or And and Or."""
+    __slots__ = ("_evaluate", "_dependencies")
+
+    _evaluate: Optional[CollectionRule]
+    _dependencies: Optional[RuleDependencies]
+
+    def __init__(self) -> None:
+        self._evaluate = None
+        self._dependencies = None
+
+    def __call__(self, state: CollectionState) -> bool:
+        evaluate = self._evaluate
+        if evaluate is None:
+            evaluate = self._evaluate = self.compile()
+        return evaluate(state)
+
+    def __and__(self, other: Union[Rule, CollectionRule]) -> And:
+        return And(self, other)
+
+    def __or__(self, other: Union[Rule, CollectionRule]) -> Or:
+        return Or(self, other)
+
+    @property
+    def dependencies(self) -> RuleDependencies:
+        if self._dependencies is None:
+            items: Dict[int, Set[str]] = {}
+            regions: Dict[int, Set[str]] = {}
+            complete = self._collect_dependencies(items, regions)
+            self._dependencies = RuleDependencies({player: frozenset(names) for player, names in items.items()},
+                                                  {player: frozenset(names) for player, names in regions.items()},
+                                                  complete)
+        return self._dependencies
+
+    def compile(self) -> CollectionRule:
+        """Returns a function evaluating this rule, with every node inlined into it."""
+        compiler = _Compiler()
+        return compiler.build(self._expression(compiler))
+
+    def _expression(self, compiler: _Compiler) -> str:
+        """Returns a Python expression evaluating this node, in terms of `state` and names registered in compiler."""
+        raise NotImplementedError
+
+    def _collect_dependencies(self, items: Dict[int, Set[str]], regions: Dict[int, Set[str]]) -> bool:
+        """Adds what this node reads to items and regions. Returns False if it reads anything else."""
+        raise NotImplementedError
+
+
+class Has(Rule):
+    """Requires at least `count` of an item."""
+    __slots__ = ("item", "player", "count")
+
+    def __init__(self, item: str, player: int, count: int = 1) -> None:
+        super().__init__()
+        self.item = item
+        self.player = player
+        self.count = count
+
+    def _expression(self, compiler: _Compiler) -> str:
+        return f"{compiler.count(self.item, self.player)} >= {self.count!r}"
+
+    def _collect_dependencies(self, items: Dict[int, Set[str]], regions: Dict[int, Set[str]]) -> bool:
+        items.setdefault(self.player, set()).add(self.item)
+        return True
+
+    def __repr__(self) -> str:
+        return f"Has({self.item!r}, {self.player}, {self.count})"
+
+
+class _ItemsRule(Rule):
+    __slots__ = ("items", "player")
+
+    items: Tuple[str, ...]
+    player: int
+
+    def __init__(self, items: Iterable[str], player: int) -> None:
+        super().__init__()
+        self.items = tuple(items)
+        self.player = player
+
+    def _collect_dependencies(self, items: Dict[int, Set[str]], regions: Dict[int, Set[str]]) -> bool:
+        items.setdefault(self.player, set()).update(self.items)
+        return True
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({list(self.items)!r}, {self.player})"
+
+
+class HasAll(_ItemsRule):
+    """Requires each of the items at least once."""
+    __slots__ = ()
+
+    def _expression(self, compiler: _Compiler) -> str:
+        if not self.items:
+            return "True"
+        return "(" + " and ".join(f"{compiler.count(item, self.player)} > 0" for item in self.items) + ")"
+
+
+class HasAny(_ItemsRule):
+    """Requires at least one of the items."""
+    __slots__ = ()
+
+    def _expression(self, compiler: _Compiler) -> str:
+        if not self.items:
+            return "False"
+        return "(" + " or ".join(f"{compiler.count(item, self.player)} > 0" for item in self.items) + ")"
+
+
+class Count(_ItemsRule):
+    """Requires at least `count` of the items in total, like CollectionState.has_from_list."""
+    __slots__ = ("count",)
+
+    def __init__(self, items: Iterable[str], player: int, count: int) -> None:
+        super().__init__(items, player)
+        self.count = count
+
+    def _expression(self, compiler: _Compiler) -> str:
+        total = " + ".join(compiler.count(item, self.player) for item in self.items) or "0"
+        return f"({total}) >= {self.count!r}"
+
+    def __repr__(self) -> str:
+        return f"Count({list(self.items)!r}, {self.player}, {self.count})"
+
+
+class CanReach(Rule):
+    """Requires a region, location or entrance to be reachable, like CollectionState.can_reach."""
+    __slots__ = ("spot", "player", "resolution_hint")
+
+    def __init__(self, spot: str, player: int, resolution_hint: str = "Region") -> None:
+        super().__init__()
+        if resolution_hint not in ("Region", "Location", "Entrance"):
+            raise ValueError(f"unknown resolution_hint {resolution_hint!r}")
+        self.spot = spot
+        self.player = player
+        self.resolution_hint = resolution_hint
+
+    def _expression(self, compiler: _Compiler) -> str:
+        if not isinstance(self.player, int):
+            raise TypeError(f"player has to be an int, not {self.player!r}")
+        getter = f"get_{self.resolution_hint.lower()}"
+        return f"state.multiworld.{getter}({self.spot!r}, {self.player}).can_reach(state)"
+
+    def _collect_dependencies(self, items: Dict[int, Set[str]], regions: Dict[int, Set[str]]) -> bool:
+        if self.resolution_hint != "Region":
+            # depends on the access rule of the location or entrance, which may not be a Rule
+            return False
+        regions.setdefault(self.player, set()).add(self.spot)
+        return True
+
+    def __repr__(self) -> str:
+        return f"CanReach({self.spot!r}, {self.player}, {self.resolution_hint!r})"
+
+
+class _CombinedRule(Rule):
+    __slots__ = ("rules",)
+    operator: typing.ClassVar[str]
+    empty: typing.ClassVar[str]
+    """expression of the node without any rules"""
+
+    rules: Tuple[Union[Rule, CollectionRule], ...]
+
+    def __init__(self, *rules: Union[Rule, CollectionRule]) -> None:
+        super().__init__()
+        flattened: List[Union[Rule, CollectionRule]] = []
+        for rule in rules:
+            if type(rule) is type(self):
+                flattened.extend(typing.cast(_CombinedRule, rule).rules)
+            else:
+                flattened.append(rule)
+        self.rules = tuple(flattened)
+
+    def _expression(self, compiler: _Compiler) -> str:
+        if not self.rules:
+            return self.empty
+        expressions = [rule._expression(compiler) if isinstance(rule, Rule) else f"{compiler.constant(rule)}(state)"
+                       for rule in self.rules]
+        return "(" + f" {self.operator} ".join(expressions) + ")"
+
+    def _collect_dependencies(self, items: Dict[int, Set[str]], regions: Dict[int, Set[str]]) -> bool:
+        # not short-circuiting, every child has to add its dependencies
+        complete = [rule._collect_dependencies(items, regions) if isinstance(rule, Rule) else False
+                    for rule in self.rules]
+        return all(complete)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({', '.join(map(repr, self.rules))})"
+
+
+class And(_CombinedRule):
+    """Requires all of the rules. Plain CollectionRule functions are allowed, but their dependencies are unknown."""
+    __slots__ = ()
+    operator = "and"
+    empty = "True"
+
+
+class Or(_CombinedRule):
+    """Requires any of the rules. Plain CollectionRule functions are allowed, but their dependencies are unknown."""
+    __slots__ = ()
+    operator = "or"
+    empty = "False"
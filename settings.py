@@ -586,6 +586,18 @@ class ServerOptions(Group):
         OFF = 0
         ON = 1
 
+    class CompressionThreshold(int):
+        """
+        Messages smaller than this many bytes are sent uncompressed, -1 disables compression
+        Clients can always opt out of compression when connecting
+        """
+
+    class CompressionWindowBits(int):
+        """zlib window size of compressed connections, 9 - 15. Larger compresses better, but uses more memory"""
+
+    class CompressionMemoryLevel(int):
+        """zlib memory level of compressed connections, 1 - 9. Larger is faster, but uses more memory"""
+
     host: Optional[str] = None
     port: int = 38281
     password: Optional[str] = None
@@ -603,6 +615,9 @@ class ServerOptions(Group):
     auto_shutdown: AutoShutdown = AutoShutdown(0)
     compatibility: Compatibility = Compatibility(2)
     log_network: LogNetwork = LogNetwork(0)
+    compression_threshold: CompressionThreshold = CompressionThreshold(256)
+    compression_window_bits: CompressionWindowBits = CompressionWindowBits(12)
+    compression_memory_level: CompressionMemoryLevel = CompressionMemoryLevel(5)
 
 
 class GeneratorOptions(Group):
@@ -662,6 +677,21 @@ class GeneratorOptions(Group):
         start_inventory -> Move remaining items to start_inventory, generate additional filler items to fill locations.
         """
 
+    class RollWorkers(int):
+        """
+        Number of processes to read and roll player files in with Generate, 0 to do it in the generating process.
+        Each player's options are rolled from the seed and their player number, so results are the same either way.
+        """
+
+    class MultidataCompression(str):
+        """
+        How to compress the multidata (.archipelago) file.
+        zlib -> Good compression at moderate speed. (Default)
+        zlib-fast -> Faster than zlib, with larger files.
+        lzma -> Smallest files, but slowest to write.
+        none -> No compression.
+        """
+
     enemizer_path: EnemizerPath = EnemizerPath("EnemizerCLI/EnemizerCLI.Core")  # + ".exe" is implied on Windows
     player_files_path: PlayerFilesPath = PlayerFilesPath("Players")
     players: Players = Players(0)
@@ -671,6 +701,8 @@ class GeneratorOptions(Group):
     race: Race = Race(0)
     plando_options: PlandoOptions = PlandoOptions("bosses, connections, texts")
     panic_method: PanicMethod = PanicMethod("swap")
+    roll_workers: RollWorkers = RollWorkers(0)
+    multidata_compression: MultidataCompression = MultidataCompression("zlib")
 
 
 class SNIOptions(Group):
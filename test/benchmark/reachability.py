@@ -0,0 +1,86 @@
+def run_reachability_benchmark():
+    import argparse
+    import logging
+    import gc
+    import typing
+
+    from time_it import TimeIt
+
+    from Utils import init_logging
+    from BaseClasses import MultiWorld, CollectionState, Item
+    from worlds import AutoWorld
+    from worlds.AutoWorld import call_all
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    class BenchmarkRunner:
+        gen_steps: typing.Tuple[str, ...] = (
+            "generate_early", "create_regions", "create_items", "set_rules", "generate_basic", "pre_fill")
+        rounds: int = 10
+
+        def collect_test(self, multiworld: MultiWorld, items: typing.List[Item], incremental: bool) -> float:
+            """Collects the items one by one into fresh states, updating reachability after each,
+            like a sweep or fill does. With incremental reachability, this includes recording what rules read."""
+            world = multiworld.worlds[1]
+            world.incremental_reachability = incremental
+            mode = "incremental" if incremental else "full"
+            with TimeIt(f"{world.game} {self.rounds} rounds of collecting {len(items)} items with {mode} updates",
+                        logger) as t:
+                for _ in range(self.rounds):
+                    state = CollectionState(multiworld)
+                    for item in items:
+                        state.collect(item, True)
+                        state.update_reachable_regions(1)
+                    for item in items:
+                        state.remove(item)
+                        state.update_reachable_regions(1)
+                gc.collect()
+            return t.dif
+
+        def main(self):
+            total_full = total_incremental = 0.0
+            for game in sorted(AutoWorld.AutoWorldRegister.world_types):
+                try:
+                    multiworld = MultiWorld(1)
+                    multiworld.game[1] = game
+                    multiworld.player_name = {1: "Tester"}
+                    multiworld.set_seed(0)
+                    multiworld.state = CollectionState(multiworld)
+                    args = argparse.Namespace()
+                    for name, option in AutoWorld.AutoWorldRegister.world_types[game].options_dataclass.type_hints.items():
+                        setattr(args, name, {
+                            1: option.from_any(getattr(option, "default"))
+                        })
+                    multiworld.set_options(args)
+                    for step in self.gen_steps:
+                        call_all(multiworld, step)
+
+                    items = [item for item in multiworld.itempool if item.advancement]
+                    if not items or not multiworld.regions.region_cache[1]:
+                        continue
+                    multiworld.random.shuffle(items)
+
+                    gc.collect()
+                    time_full = self.collect_test(multiworld, items, False)
+                    time_incremental = self.collect_test(multiworld, items, True)
+                    total_full += time_full
+                    total_incremental += time_incremental
+                    enabled = "enabled" if type(multiworld.worlds[1]).incremental_reachability else "not enabled"
+                    logger.info(f"{game} took {time_incremental / time_full:.2f} times as long with incremental "
+                                f"reachability ({enabled} for the world).")
+
+                except Exception as e:
+                    logger.exception(e)
+
+            logger.info(f"All games took {total_full:.4f} seconds with full updates and {total_incremental:.4f} "
+                        f"seconds with incremental reachability.")
+
+    runner = BenchmarkRunner()
+    runner.main()
+
+
+if __name__ == "__main__":
+    from path_change import change_home
+    change_home()
+    run_reachability_benchmark()
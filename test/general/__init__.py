@@ -59,6 +59,7 @@ class TestWorld(World):
     item_name_to_id = {}
     location_name_to_id = {}
     hidden = True
+    incremental_reachability = True
 
 
 # add our test world to the data package, so we can test it later
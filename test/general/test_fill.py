@@ -5,7 +5,7 @@ from Options import Accessibility
 from test.general import generate_items, generate_locations, generate_test_multiworld
 from Fill import FillError, balance_multiworld_progression, fill_restrictive, \
     distribute_early_items, distribute_items_restrictive
-from BaseClasses import Entrance, LocationProgressType, MultiWorld, Region, Item, Location, \
+from BaseClasses import Entrance, GenerationCancelled, LocationProgressType, MultiWorld, Region, Item, Location, \
     ItemClassification
 from worlds.generic.Rules import CollectionRule, add_item_rule, locality_rules, set_rule
 
@@ -343,6 +343,20 @@ class TestFillRestrictive(unittest.TestCase):
         self.assertEqual(player2.locations[0].item, player1.prog_items[0])
         self.assertEqual(player2.locations[1].item, player1.prog_items[1])
 
+    def test_single_player_placement(self):
+        """Test that single player placement keeps items in their own world and removes the filled locations"""
+        multiworld = generate_test_multiworld(2)
+        player1 = generate_player_data(multiworld, 1, 2, 2)
+        player2 = generate_player_data(multiworld, 2, 3, 2)
+
+        locations = player2.locations + player1.locations
+        fill_restrictive(multiworld, multiworld.state, locations, player1.prog_items + player2.prog_items,
+                         single_player_placement=True)
+
+        for location in player1.locations + player2.locations[:2]:
+            self.assertEqual(location.player, location.item.player)
+        self.assertEqual([player2.locations[2]], locations)
+
     def test_restrictive_progress(self):
         """Test that various spheres with different requirements can be filled"""
         multiworld = generate_test_multiworld()
@@ -463,6 +477,16 @@ class TestFillRestrictive(unittest.TestCase):
         self.assertEqual(1, len(player1.prog_items))
         self.assertIsNot(loc0.item, player1.prog_items[0], "Filled item was still present in item pool")
 
+    def test_cancelled_fill(self):
+        """Test that a fill stops once the progress of the multiworld got cancelled"""
+        multiworld = generate_test_multiworld()
+        player1 = generate_player_data(multiworld, 1, 2, 2)
+        multiworld.progress.cancel()
+
+        with self.assertRaises(GenerationCancelled):
+            fill_restrictive(multiworld, multiworld.state, player1.locations.copy(), player1.prog_items)
+        self.assertEqual([], multiworld.get_filled_locations())
+
 
 class TestDistributeItemsRestrictive(unittest.TestCase):
     def test_basic_distribute(self):
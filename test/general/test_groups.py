@@ -1,6 +1,8 @@
 from unittest import TestCase
 
+from BaseClasses import CollectionState
 from worlds.AutoWorld import AutoWorldRegister
+from . import setup_solo_multiworld
 
 
 class TestNameGroups(TestCase):
@@ -25,3 +27,27 @@ class TestNameGroups(TestCase):
             with self.subTest(game=game_name):
                 for name, group in world_type.location_name_groups.items():
                     self.assertTrue(group, f"Location name group \"{name}\" of \"{game_name}\" is empty")
+
+    def test_state_group_counts(self) -> None:
+        """
+        Test that counting an item name group in a state gives the same result whether the state holds fewer or more
+        items than the group.
+        """
+        multiworld = setup_solo_multiworld(AutoWorldRegister.world_types["A Link to the Past"])
+        groups = multiworld.worlds[1].item_name_groups
+        no_items = CollectionState(multiworld)
+        few_items = CollectionState(multiworld)
+        for item_name in ("Progressive Sword", "Progressive Sword", "Lamp"):
+            few_items.collect(multiworld.create_item(item_name, 1), True)
+        many_items = multiworld.get_all_state(False)
+        for state in (no_items, few_items, many_items):
+            for name, group in groups.items():
+                with self.subTest(group=name, items=len(state.prog_items[1])):
+                    expected = sum(state.prog_items[1][item_name] for item_name in group)
+                    expected_unique = sum(state.prog_items[1][item_name] > 0 for item_name in group)
+                    self.assertEqual(expected, state.count_group(name, 1))
+                    self.assertEqual(expected_unique, state.count_group_unique(name, 1))
+                    self.assertEqual(expected >= 2, state.has_group(name, 1, 2))
+                    self.assertEqual(expected_unique >= 2, state.has_group_unique(name, 1, 2))
+                    self.assertEqual(bool(group), state.has_group(name, 1, 0))
+                    self.assertEqual(bool(group), state.has_group_unique(name, 1, 0))
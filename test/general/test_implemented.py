@@ -4,7 +4,7 @@ from Fill import distribute_items_restrictive
 from NetUtils import encode
 from worlds.AutoWorld import AutoWorldRegister, call_all
 from worlds import failed_world_loads
-from . import setup_solo_multiworld
+from . import setup_multiworld, setup_solo_multiworld
 
 
 class TestImplemented(unittest.TestCase):
@@ -52,3 +52,18 @@ class TestImplemented(unittest.TestCase):
     def test_no_failed_world_loads(self):
         if failed_world_loads:
             self.fail(f"The following worlds failed to load: {failed_world_loads}")
+
+    def test_mixed_world_determinism(self):
+        """Tests that a multiworld of different games calls them in player order and places items the same way."""
+        games = ("Clique", "Timespinner", "TUNIC", "A Hat in Time", "Clique")
+        world_types = [AutoWorldRegister.world_types[game] for game in games]
+
+        def generate():
+            multiworld = setup_multiworld(world_types, seed=1)
+            players = [item.player for item in multiworld.itempool]
+            self.assertEqual(sorted(players), players, "items should be created one player at a time")
+            distribute_items_restrictive(multiworld)
+            return [(location.player, location.name, location.item.player, location.item.name)
+                    for location in multiworld.get_filled_locations()]
+
+        self.assertEqual(generate(), generate())
@@ -1,8 +1,10 @@
 import unittest
+from typing import Any, Callable
 
-from BaseClasses import CollectionState
+from BaseClasses import CollectionState, Item, ItemClassification, Location, Region
 from worlds.AutoWorld import AutoWorldRegister
-from . import setup_solo_multiworld
+from Fill import swap_location_item
+from . import TestWorld, generate_test_multiworld, setup_solo_multiworld
 
 
 class TestBase(unittest.TestCase):
@@ -69,3 +71,170 @@ class TestBase(unittest.TestCase):
                             locations.add(location)
                     self.assertGreater(len(locations), 0,
                                        msg="Need to be able to reach at least one location to get started.")
+
+    def test_incremental_reachability_matches_full_updates(self):
+        """Ensure worlds enabling incremental reachability reach the same regions as a full update would"""
+        for game_name, world_type in AutoWorldRegister.world_types.items():
+            if not world_type.incremental_reachability or game_name == TestWorld.game:
+                continue
+            with self.subTest("Game", game=game_name):
+                multiworld = setup_solo_multiworld(world_type, seed=0)
+                world = multiworld.worlds[1]
+                items = [item for item in multiworld.itempool if item.advancement]
+                items += [location.item for location in multiworld.get_filled_locations() if location.item.advancement]
+                multiworld.random.shuffle(items)
+                incremental = CollectionState(multiworld)
+                full = CollectionState(multiworld)
+
+                def untracked(function: Callable[..., Any], *args: Any) -> None:
+                    world.incremental_reachability = False
+                    try:
+                        function(*args)
+                    finally:
+                        world.incremental_reachability = True
+
+                def assert_same_regions() -> None:
+                    incremental.update_reachable_regions(1)
+                    untracked(full.update_reachable_regions, 1)
+                    self.assertEqual(full.reachable_regions[1], incremental.reachable_regions[1])
+
+                for item in items:
+                    incremental.collect(item, True)
+                    untracked(full.collect, item, True)
+                    assert_same_regions()
+                multiworld.random.shuffle(items)
+                for item in items:
+                    incremental.remove(item)
+                    untracked(full.remove, item)
+                    assert_same_regions()
+
+class TestIncrementalReachability(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_test_multiworld()
+        menu = self.multiworld.get_region("Menu", 1)
+        self.cave = Region("Cave", 1, self.multiworld)
+        self.lake = Region("Lake", 1, self.multiworld)
+        self.tower = Region("Tower", 1, self.multiworld)
+        self.multiworld.regions += [self.cave, self.lake, self.tower]
+        menu.connect(self.cave, "Cave Door", lambda state: state.has("Lamp", 1))
+        menu.connect(self.lake, "Lake Path", lambda state: state.has("Boots", 1))
+        # not registered as an indirect condition on purpose, the dependency on Cave is recorded while testing
+        self.lake.connect(self.tower, "Tower Gate", lambda state: state.can_reach("Cave", "Region", 1))
+
+    def item(self, name: str) -> Item:
+        return Item(name, ItemClassification.progression, None, 1)
+
+    def test_region_dependency_is_recorded(self) -> None:
+        """Tests that an entrance is retested once a region its rule reads becomes reachable."""
+        state = CollectionState(self.multiworld)
+        state.collect(self.item("Boots"), True)
+        self.assertTrue(self.lake.can_reach(state))
+        self.assertFalse(self.tower.can_reach(state))
+        state.collect(self.item("Lamp"), True)
+        self.assertTrue(self.tower.can_reach(state))
+        self.assertIn(self.multiworld.get_entrance("Tower Gate", 1),
+                      self.multiworld.recorded_indirect_connections[self.cave])
+
+    def test_remove(self) -> None:
+        """Tests that removing an item only loses the regions that depended on it."""
+        self.assert_remove(True)
+
+    def assert_remove(self, tracked: bool) -> None:
+        lamp = self.item("Lamp")
+        boots = self.item("Boots")
+        state = CollectionState(self.multiworld)
+        state.collect(lamp, True)
+        state.collect(boots, True)
+        state.collect(self.item("Junk"), True)
+        self.assertTrue(self.tower.can_reach(state))
+        reachable_regions = state.reachable_regions[1]
+
+        state.remove(self.item("Junk"))
+        self.assertTrue(self.tower.can_reach(state))
+        if tracked:
+            self.assertIs(reachable_regions, state.reachable_regions[1], "unrelated removal should keep reachability")
+
+        state.remove(lamp)
+        self.assertFalse(self.cave.can_reach(state))
+        self.assertTrue(self.lake.can_reach(state))
+        self.assertFalse(self.tower.can_reach(state))
+
+        state.collect(lamp, True)
+        self.assertTrue(self.tower.can_reach(state))
+
+    def test_copy(self) -> None:
+        """Tests that a copy keeps tracking the items collected into it."""
+        state = CollectionState(self.multiworld)
+        state.collect(self.item("Boots"), True)
+        self.assertTrue(self.lake.can_reach(state))
+        copied = state.copy()
+        copied.collect(self.item("Lamp"), True)
+        self.assertTrue(self.tower.can_reach(copied))
+        self.assertFalse(self.cave.can_reach(state))
+
+    def test_copy_on_write(self) -> None:
+        """Tests that a copy and its original share state until one of them changes it."""
+        state = CollectionState(self.multiworld)
+        state.collect(self.item("Boots"), True)
+        self.assertTrue(self.lake.can_reach(state))
+        copied = state.copy()
+        self.assertTrue(self.lake.can_reach(copied))
+
+        copied.collect(self.item("Lamp"), True)
+        self.assertTrue(self.tower.can_reach(copied))
+        self.assertFalse(self.cave.can_reach(state))
+        self.assertEqual(0, state.count("Lamp", 1))
+
+        state.remove(self.item("Boots"))
+        self.assertFalse(self.lake.can_reach(state))
+        self.assertTrue(self.lake.can_reach(copied))
+
+        # changed without collect, like a rule checking what an item would unlock
+        copied = state.copy()
+        copied.prog_items[1]["Lamp"] += 1
+        self.assertTrue(self.cave.can_reach(copied))
+        self.assertFalse(self.cave.can_reach(state))
+
+        location = Location(1, "Chest", None, self.cave)
+        copied.collect(self.item("Lamp"), True, location)
+        self.assertIn(location, copied.locations_checked)
+        self.assertNotIn(location, state.locations_checked)
+
+    def test_untracked_world(self) -> None:
+        """Tests that worlds opting out of incremental reachability still get correct results."""
+        self.multiworld.worlds[1].incremental_reachability = False
+        # without recording, the region dependency has to be declared
+        self.multiworld.register_indirect_condition(self.cave, self.multiworld.get_entrance("Tower Gate", 1))
+        self.assert_remove(False)
+
+    def test_sphere_analysis(self) -> None:
+        """Tests that the sphere analysis is reused until a placement changes."""
+        menu = self.multiworld.get_region("Menu", 1)
+        chest = Location(1, "Chest", None, menu)
+        cave_chest = Location(1, "Cave Chest", None, self.cave)
+        menu.locations.append(chest)
+        self.cave.locations.append(cave_chest)
+        self.multiworld.push_item(chest, self.item("Lamp"), False)
+        self.multiworld.push_item(cave_chest, self.item("Boots"), False)
+
+        analysis = self.multiworld.analyze_spheres()
+        self.assertEqual([{chest}, {cave_chest}], analysis.spheres)
+        self.assertEqual([{chest}, {cave_chest}], list(self.multiworld.get_spheres()))
+        self.assertIs(analysis, self.multiworld.analyze_spheres())
+        self.assertTrue(self.multiworld.fulfills_accessibility())
+
+        swap_location_item(chest, cave_chest)
+        self.assertEqual([{chest}, set(), {cave_chest}], list(self.multiworld.get_spheres()))
+        self.assertIsNot(analysis, self.multiworld.sphere_analysis)
+        self.assertFalse(self.multiworld.fulfills_accessibility())
+
+    def test_sphere_analysis_progression_sweeps(self) -> None:
+        """Tests that sweeps over progression only don't reuse the sphere analysis, which also counts filler."""
+        menu = self.multiworld.get_region("Menu", 1)
+        chest = Location(1, "Chest", None, menu)
+        menu.locations.append(chest)
+        self.multiworld.push_item(chest, Item("Coin", ItemClassification.filler, None, 1), False)
+        self.multiworld.completion_condition[1] = lambda state: state.has("Coin", 1)
+
+        self.assertEqual([{chest}], list(self.multiworld.get_spheres()))
+        self.assertFalse(self.multiworld.can_beat_game())
@@ -0,0 +1,111 @@
+import unittest
+
+from BaseClasses import CollectionState, Item, ItemClassification, Location, PendingLocations, Region
+from rule_builder import And, CanReach, Count, Has, HasAll, HasAny, Or
+from worlds.generic.Rules import add_rule
+from . import generate_test_multiworld
+
+
+class TestRuleBuilder(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_test_multiworld(2)
+        self.menu = self.multiworld.get_region("Menu", 1)
+        self.cave = Region("Cave", 1, self.multiworld)
+        self.multiworld.regions.append(self.cave)
+        self.menu.connect(self.cave, "Cave Door", Has("Lamp", 1))
+        self.state = CollectionState(self.multiworld)
+
+    def collect(self, name: str, player: int = 1) -> None:
+        self.state.collect(Item(name, ItemClassification.progression, None, player), True)
+
+    def test_evaluation(self) -> None:
+        """Tests that each node evaluates like the CollectionState method it mirrors."""
+        self.collect("Sword")
+        self.collect("Key")
+        self.collect("Key")
+        self.collect("Shield", 2)
+        rules = {
+            Has("Key", 1, 2): True,
+            Has("Key", 1, 3): False,
+            Has("Shield", 1): False,
+            HasAll(["Sword", "Key"], 1): True,
+            HasAll(["Sword", "Shield"], 1): False,
+            HasAny(["Shield", "Sword"], 1): True,
+            HasAny(["Shield"], 1): False,
+            Count(["Sword", "Key", "Shield"], 1, 3): True,
+            Count(["Sword", "Shield"], 1, 2): False,
+            HasAll([], 1): True,
+            HasAny([], 1): False,
+            CanReach("Menu", 1): True,
+            CanReach("Cave", 1): False,
+            Has("Shield", 2) & Has("Sword", 1): True,
+            Has("Shield", 2) & Has("Sword", 2): False,
+            Has("Shield", 1) | Has("Key", 1, 2): True,
+            Or(Has("Shield", 1), lambda state: False): False,
+            And(): True,
+            Or(): False,
+        }
+        for rule, expected in rules.items():
+            with self.subTest(rule=rule):
+                self.assertEqual(expected, rule(self.state))
+
+        self.collect("Lamp")
+        self.assertTrue(CanReach("Cave", 1)(self.state))
+
+    def test_dependencies(self) -> None:
+        """Tests that a rule reports everything it reads."""
+        rule = Has("Sword", 1) & (HasAny(["Lamp", "Torch"], 1) | CanReach("Cave", 1)) & Count(["Heart"], 2, 3)
+        self.assertEqual({1: {"Sword", "Lamp", "Torch"}, 2: {"Heart"}}, rule.dependencies.items)
+        self.assertEqual({1: {"Cave"}}, rule.dependencies.regions)
+        self.assertTrue(rule.dependencies.complete)
+        self.assertFalse(And(rule, lambda state: True).dependencies.complete)
+        self.assertFalse(CanReach("Chest", 1, "Location").dependencies.complete)
+
+    def test_add_rule(self) -> None:
+        """Tests that combining two declarative rules keeps them declarative."""
+        entrance = self.multiworld.get_entrance("Cave Door", 1)
+        add_rule(entrance, Has("Boots", 1))
+        self.assertIsInstance(entrance.access_rule, And)
+        self.assertEqual({1: {"Lamp", "Boots"}}, entrance.access_rule.dependencies.items)
+
+    def test_entrance_dependencies(self) -> None:
+        """Tests that entrances with declarative rules get their dependencies without recording them."""
+        tower = Region("Tower", 1, self.multiworld)
+        self.multiworld.regions.append(tower)
+        self.menu.connect(tower, "Tower Gate", CanReach("Cave", 1))
+        self.assertFalse(tower.can_reach(self.state))
+        gate = self.multiworld.get_entrance("Tower Gate", 1)
+        self.assertEqual({self.cave}, gate.access_dependencies.regions)
+        self.assertIn(gate, self.multiworld.recorded_indirect_connections[self.cave])
+        self.collect("Lamp")
+        self.assertTrue(tower.can_reach(self.state))
+
+    def test_pending_locations(self) -> None:
+        """Tests that locations with declarative rules are only evaluated again once something they read changed."""
+        evaluated = []
+
+        class RecordingHas(Has):
+            def __call__(self, state: CollectionState) -> bool:
+                evaluated.append(self)
+                return super().__call__(state)
+
+        chest = Location(1, "Chest", None, self.menu)
+        chest.access_rule = RecordingHas("Key", 1)
+        cave_chest = Location(1, "Cave Chest", None, self.cave)
+        cave_chest.access_rule = RecordingHas("Key", 1)
+        plain = Location(1, "Plain", None, self.menu)
+        plain.access_rule = lambda state: state.has("Lamp", 1)
+        pending = PendingLocations([chest, cave_chest, plain])
+
+        self.assertEqual(set(), pending.pop_reachable(self.state))
+        self.assertEqual(2, len(evaluated))
+        self.collect("Junk")
+        self.assertEqual(set(), pending.pop_reachable(self.state))
+        self.assertEqual(2, len(evaluated), "nothing the rules read changed")
+        self.collect("Key")
+        self.assertEqual({chest}, pending.pop_reachable(self.state))
+        self.assertEqual(4, len(evaluated))
+        self.assertEqual({cave_chest, plain}, set(pending))
+        self.collect("Lamp")
+        self.assertEqual({cave_chest, plain}, pending.pop_reachable(self.state))
+        self.assertEqual(0, len(pending))
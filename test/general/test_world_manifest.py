@@ -0,0 +1,63 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+import world_manifest
+from worlds import AutoWorldRegister, manifest, network_data_package, world_sources
+
+
+class TestWorldManifest(unittest.TestCase):
+    def test_manifest_matches_worlds(self) -> None:
+        """Tests that the manifest holds the same data as loading the worlds."""
+        source_paths = {world_source.path for world_source in world_sources}
+        for game, world in AutoWorldRegister.world_types.items():
+            if game not in manifest["games"]:
+                continue  # registered after worlds was imported, like test worlds
+            with self.subTest(game=game):
+                game_manifest = manifest["games"][game]
+                data_package = world.get_data_package_data()
+                for key in ("item_name_to_id", "location_name_to_id", "item_name_groups", "location_name_groups"):
+                    # dicts, as the order, and so the checksum, of some worlds depends on hash randomization
+                    self.assertEqual(data_package[key], game_manifest["data_package"][key])
+                self.assertEqual(sorted(world.hint_blacklist), game_manifest["hint_blacklist"])
+                self.assertEqual(list(world.options_dataclass.type_hints), list(game_manifest["options"]))
+                self.assertIn(game_manifest["source"], source_paths)
+        self.assertEqual(set(manifest["sources"]), source_paths)
+
+    def test_groups_kept(self) -> None:
+        """Tests that the groups in the manifest survive MultiServer removing them from network_data_package."""
+        from MultiServer import Context
+        Context("localhost", 0, "", "", 0, 0, False)
+        for game, game_manifest in manifest["games"].items():
+            with self.subTest(game=game):
+                self.assertIsNot(network_data_package["games"][game], game_manifest["data_package"])
+                self.assertIn("item_name_groups", game_manifest["data_package"])
+                self.assertIn("location_name_groups", game_manifest["data_package"])
+
+    def test_stamps(self) -> None:
+        """Tests that the stamp of a world source changes with its files."""
+        with TemporaryDirectory() as folder:
+            world_folder = os.path.join(folder, "world")
+            os.makedirs(os.path.join(world_folder, "__pycache__"))
+            with open(os.path.join(world_folder, "__init__.py"), "w") as f:
+                f.write("")
+            sources = [(world_folder, False, False)]
+            stamps = world_manifest.get_source_stamps(sources)
+            with open(os.path.join(world_folder, "__pycache__", "__init__.pyc"), "w") as f:
+                f.write("")
+            self.assertEqual(stamps, world_manifest.get_source_stamps(sources))
+            with open(os.path.join(world_folder, "data.json"), "w") as f:
+                f.write("{}")
+            self.assertNotEqual(stamps, world_manifest.get_source_stamps(sources))
+
+    def test_load(self) -> None:
+        """Tests that a cached manifest is only used while all world sources are unchanged."""
+        with TemporaryDirectory() as folder, \
+                mock.patch("world_manifest.cache_path", lambda *path: os.path.join(folder, *path)):
+            self.assertIsNone(world_manifest.load_manifest(manifest["sources"]))
+            world_manifest.write_manifest(manifest)
+            self.assertEqual(manifest, world_manifest.load_manifest(manifest["sources"]))
+            self.assertIsNone(world_manifest.load_manifest({**manifest["sources"], "new_world": ""}))
+            with mock.patch("world_manifest.manifest_version", world_manifest.manifest_version + 1):
+                self.assertIsNone(world_manifest.load_manifest(manifest["sources"]))
@@ -92,3 +92,91 @@ class TestGenerateMain(unittest.TestCase):
             user_path.cached_path = user_path_backup
 
         self.assertOutput(self.output_tempdir.name)
+
+    def test_invalid_multidata_compression(self):
+        from settings import get_settings
+        generator_settings = get_settings().generator
+        original_compression = generator_settings.multidata_compression
+        generator_settings.multidata_compression = generator_settings.MultidataCompression("zstd")
+        try:
+            sys.argv = [sys.argv[0], '--seed', '0',
+                        '--player_files_path', str(self.abs_input_dir),
+                        '--outputpath', self.output_tempdir.name]
+            with self.assertRaisesRegex(ValueError, "zstd.*allowed values are: none, zlib, zlib-fast, lzma"):
+                Main.main(*Generate.main())
+        finally:
+            generator_settings.multidata_compression = original_compression
+
+        self.assertEqual([], list(Path(self.output_tempdir.name).glob('*')))
+
+
+class TestGenerateRolls(unittest.TestCase):
+    """Tests rolling of player files by Generate.py main"""
+
+    def setUp(self):
+        self.original_argv = sys.argv.copy()
+        self.input_tempdir = TemporaryDirectory(prefix='AP_in_')
+        self.output_tempdir = TemporaryDirectory(prefix='AP_out_')
+
+    def tearDown(self):
+        self.input_tempdir.cleanup()
+        self.output_tempdir.cleanup()
+        sys.argv = self.original_argv
+
+    def write_player_file(self, name: str, content: str) -> None:
+        with open(os.path.join(self.input_tempdir.name, name), "w") as f:
+            f.write(content)
+
+    def generate(self, roll_workers: int):
+        sys.argv = [sys.argv[0], '--seed', '0',
+                    '--player_files_path', self.input_tempdir.name,
+                    '--outputpath', self.output_tempdir.name,
+                    '--roll_workers', str(roll_workers)]
+        return Generate.main()
+
+    def test_roll_workers(self):
+        """Test that rolling in worker processes gives the same results as rolling one player after the other"""
+        for i in range(3):
+            self.write_player_file(f"Player{i}.yaml",
+                                   f"name: Player{i}\n"
+                                   f"game: Archipelago\n"
+                                   f"Archipelago:\n"
+                                   f"  progression_balancing: random\n"
+                                   f"---\n"
+                                   f"name: Player{i}b\n"
+                                   f"game: Archipelago\n"
+                                   f"Archipelago:\n"
+                                   f"  accessibility: random\n")
+        erargs, seed = self.generate(0)
+        worker_erargs, worker_seed = self.generate(2)
+
+        self.assertEqual(seed, worker_seed)
+        self.assertEqual(6, len(worker_erargs.name))
+        for option in ("name", "game", "progression_balancing", "accessibility"):
+            self.assertEqual({player: str(value) for player, value in getattr(erargs, option).items()},
+                             {player: str(value) for player, value in getattr(worker_erargs, option).items()})
+
+    def test_invalid_files(self):
+        """Test that all invalid player files are reported, whether they fail to read or to roll"""
+        self.write_player_file("Valid.yaml", "name: Valid\ngame: Archipelago\nArchipelago: {}\n")
+        self.write_player_file("Unreadable.yaml", "name: [Unreadable\n")
+        self.write_player_file("Unknown.yaml", "name: Unknown\ngame: Unknown Game\n")
+        for roll_workers in (0, 2):
+            with self.subTest(roll_workers=roll_workers), \
+                    self.assertRaisesRegex(ValueError, "Files Unreadable.yaml, Unknown.yaml are invalid"):
+                self.generate(roll_workers)
+
+
+class TestReferencedGames(unittest.TestCase):
+    def test_referenced_games(self):
+        known_games = {"A Link to the Past", "Clique", "Timespinner"}
+        yamls = [
+            {"game": "Clique", "name": "Player1", "Clique": {}},
+            {"game": {"A Link to the Past": 1, "Clique": 0}, "A Link to the Past": {},
+             "triggers": [{"option_category": "A Link to the Past", "option_name": "goal", "option_result": "ganon",
+                           "options": {None: {"game": "Timespinner"}}}]},
+            {"game": "Unknown Game", "description": "Clique"},
+        ]
+        self.assertEqual({"A Link to the Past", "Clique", "Timespinner", "Unknown Game"},
+                         Generate.get_referenced_games(yamls, known_games))
+        self.assertIsNone(Generate.get_referenced_games([{"game": ["Clique"]}], known_games))
@@ -1,5 +1,24 @@
+import asyncio
+import io
+import os
+import pickle
+import tempfile
 import unittest
-from MultiServer import Context, ServerCommandProcessor
+import weakref
+import zipfile
+import zlib
+from unittest import mock
+
+from websockets.extensions.permessage_deflate import ClientPerMessageDeflateFactory
+from websockets.frames import Frame, Opcode
+
+from MultiServer import Client, ClientMessageProcessor, Context, ServerCommandProcessor, decode_save_file, \
+    get_encoded_game_data, get_server_extensions, process_client_cmd, register_location_checks, release_player, \
+    save_file_magic
+from NetUtils import Endpoint, Hint, NetworkItem, NetworkSlot, SlotType, binary_protocol_available, binary_protocol_tag, \
+    decode, decode_frame, encode
+from Utils import MultidataSections, VersionException, iter_multidata_sections, map_file, multidata_compressors, \
+    write_multidata
 
 
 class TestResolvePlayerName(unittest.TestCase):
@@ -38,3 +57,438 @@ class TestResolvePlayerName(unittest.TestCase):
         assert p.resolve_player("ABC") == (1, 2, "abc"), "case insensitive resolves when 1 match"
         assert p.resolve_player("abcd") == (1, 3, "abCD"), "case insensitive resolves when 1 match"
         assert not p.resolve_player("aB"), "partial name shouldn't resolve to player"
+
+
+class TestMultidata(unittest.TestCase):
+    multidata = {"seed_name": "12345", "slot_data": {1: {"goal": 2}}, "locations": {1: {100: (200, 1, 0)}}}
+
+    def test_round_trip(self) -> None:
+        for compression in multidata_compressors:
+            with self.subTest(compression=compression):
+                file = io.BytesIO()
+                write_multidata(file, self.multidata, compression)
+                data = file.getvalue()
+                self.assertEqual(list(self.multidata), [name for name, payload in iter_multidata_sections(data)])
+                self.assertEqual(self.multidata, Context.decompress(data))
+
+    def test_previous_format(self) -> None:
+        data = bytes([3]) + zlib.compress(pickle.dumps(self.multidata), 9)
+        self.assertEqual(self.multidata, Context.decompress(data))
+
+    def test_unknown_format(self) -> None:
+        with self.assertRaises(VersionException):
+            Context.decompress(bytes([5]) + zlib.compress(pickle.dumps(self.multidata)))
+        file = io.BytesIO()
+        write_multidata(file, self.multidata)
+        with self.assertRaises(VersionException):
+            Context.decompress(file.getvalue()[:1] + bytes([255]) + file.getvalue()[2:])
+
+
+class TestLazyLoad(unittest.TestCase):
+    multidata = {
+        "minimum_versions": {"server": (0, 0, 0), "clients": {}},
+        "version": (0, 0, 0),
+        "slot_info": {1: NetworkSlot("Player1", "Archipelago", SlotType.player)},
+        "connect_names": {"Player1": (0, 1)},
+        "locations": {1: {}},
+        "slot_data": {1: {"goal": 2}},
+        "er_hint_data": {1: {"5": "Cave"}},
+        "precollected_items": {1: []},
+        "precollected_hints": {1: set()},
+        "seed_name": "12345",
+        "datapackage": {},
+    }
+
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "AP_12345.archipelago")
+        with open(self.path, "wb") as f:
+            write_multidata(f, self.multidata)
+
+    def assert_loaded(self, ctx: Context) -> None:
+        self.assertEqual({"slot_data", "er_hint_data"}, set(ctx.deferred_attributes))
+        self.assertEqual({"goal": 2}, ctx.read_data["slot_data_1"]())
+        self.assertEqual({1: {5: "Cave"}}, ctx.er_hint_data)
+        self.assertEqual({}, ctx.deferred_attributes)
+        self.assertEqual({1: {"goal": 2}}, ctx.slot_data)
+        self.assertEqual("12345", ctx.seed_name)
+
+    def test_lazy_decompress(self) -> None:
+        with open(self.path, "rb") as f:
+            data = f.read()
+        self.assertIsInstance(Context.decompress(data, lazy=True), MultidataSections)
+        self.assertIsInstance(Context.decompress(data), dict)
+        self.assertIsInstance(Context.decompress(bytes([3]) + zlib.compress(pickle.dumps({})), lazy=True), dict)
+
+    def test_loader_frees_data(self) -> None:
+        view = map_file(self.path)
+        mapping = weakref.ref(view.obj)
+        loader = MultidataSections(view).loader("slot_data")
+        del view
+        self.assertIsNone(mapping(), "loader kept the whole mapping alive")
+        self.assertEqual({1: {"goal": 2}}, loader())
+
+    def test_load_file(self) -> None:
+        ctx = Context("", 0, "", "", 0, 0, False)
+        ctx.load(self.path, lazy=True)
+        self.assert_loaded(ctx)
+
+    def test_load_zip(self) -> None:
+        for compress_type in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            with self.subTest(compress_type=compress_type):
+                zip_path = self.path[:-len(".archipelago")] + ".zip"
+                with zipfile.ZipFile(zip_path, "w") as zf:
+                    zf.writestr("AP_12345_Spoiler.txt", "spoiler")
+                    zf.write(self.path, os.path.basename(self.path), compress_type=compress_type)
+                ctx = Context("", 0, "", "", 0, 0, False)
+                ctx.load(zip_path, lazy=True)
+                self.assert_loaded(ctx)
+
+    def test_deferred_attribute_not_loaded(self) -> None:
+        ctx = Context("", 0, "", "", 0, 0, False)
+        self.assertFalse(hasattr(ctx, "slot_data"))
+        self.assertIsNone(getattr(ctx, "slot_data", None))
+        self.assertEqual({}, ctx.er_hint_data)
+
+    def test_load_eager(self) -> None:
+        ctx = Context("", 0, "", "", 0, 0, False)
+        ctx.load(self.path)
+        self.assertEqual({}, ctx.deferred_attributes)
+        self.assertEqual({1: {5: "Cave"}}, ctx.er_hint_data)
+        self.assertEqual({"goal": 2}, ctx.read_data["slot_data_1"]())
+
+
+class TestSaveJournal(unittest.TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "AP_12345.archipelago")
+        with open(path, "wb") as f:
+            write_multidata(f, TestLazyLoad.multidata)
+        self.ctx = Context("", 0, "", "", 0, 0, False)
+        self.ctx.load(path)
+        self.save_filename = self.ctx.save_filename = os.path.join(directory.name, "AP_12345.apsave")
+
+    def read_save(self) -> bytes:
+        with open(self.save_filename, "rb") as f:
+            return f.read()
+
+    def assert_saved(self) -> int:
+        """Saves and asserts that the save file contains the state of the context. Returns the size of the file."""
+        self.assertTrue(self.ctx._save())
+        data = self.read_save()
+        self.assertEqual(self.ctx.get_save(), decode_save_file(data))
+        return len(data)
+
+    def test_journal(self) -> None:
+        snapshot_size = self.assert_saved()
+        self.assertTrue(self.read_save().startswith(save_file_magic))
+
+        journal = self.ctx.save_journal
+        self.ctx.location_checks[0, 1].add(5)
+        journal.changed("location_checks", (0, 1))
+        self.ctx.received_items.setdefault((0, 1, True), []).append(NetworkItem(7, 5, 1, 0))
+        journal.changed("received_items", (0, 1, True))
+        self.ctx.add_hint(0, 1, Hint(1, 1, 6, 7, False))
+        self.ctx.stored_data["key"] = [1]
+        journal.changed("stored_data", "key")
+        size = self.assert_saved()
+        self.assertGreater(size, snapshot_size)
+        self.assertEqual(size, self.assert_saved(), "saving without changes writes nothing")
+
+        self.ctx.location_checks[0, 1].add(6)
+        journal.changed("location_checks", (0, 1))
+        self.assertEqual({1}, self.ctx.find_hints(0, 1, [6]))
+        self.ctx.received_items[0, 1, True].append(NetworkItem(8, 6, 1, 0))
+        journal.changed("received_items", (0, 1, True))
+        self.ctx.stored_data["key"].append(2)
+        journal.changed("stored_data", "key")
+        self.ctx.client_game_state[0, 1] = 30
+        journal.changed("client_game_state")
+        self.assert_saved()
+
+        while journal.journal_size <= journal.snapshot_size:
+            self.ctx.hints_used[0, 1] += 1
+            journal.changed("hints_used")
+            self.assert_saved()
+        size = self.assert_saved()
+        self.assertLess(size, len(save_file_magic) + snapshot_size * 2, "journal was compacted into a snapshot")
+
+        loaded = Context("", 0, "", "", 0, 0, False)
+        loaded.connect_names = self.ctx.connect_names
+        loaded.set_save(decode_save_file(self.read_save()))
+        self.assertEqual({5, 6}, loaded.location_checks[0, 1])
+        self.assertEqual([1, 2], loaded.stored_data["key"])
+        self.assertEqual({Hint(1, 1, 6, 7, True)}, loaded.hints[0, 1])
+
+    def test_changed_sections(self) -> None:
+        """Tests that saves after the snapshot only get and write the sections that were marked as changed."""
+        self.assert_saved()
+        sections = []
+
+        def get_save(names):
+            sections.append(names)
+            return self.ctx.get_save(names)
+
+        self.assertEqual({}, self.ctx.save_journal.get_changes(get_save))
+        self.ctx.location_checks[0, 1].add(5)
+        self.ctx.save_journal.changed("location_checks", (0, 1))
+        self.ctx.hints_used[0, 1] += 1
+        self.ctx.save_journal.changed("hints_used")
+        self.assertEqual({"location_checks": {(0, 1): {5}}, "hints_used": {(0, 1): 1}},
+                         self.ctx.save_journal.get_changes(get_save))
+        self.assertEqual([set(), {"location_checks", "hints_used"}], sections)
+
+    def test_previous_format(self) -> None:
+        self.ctx.location_checks[0, 1].add(5)
+        with open(self.save_filename, "wb") as f:
+            f.write(zlib.compress(pickle.dumps(self.ctx.get_save())))
+        self.assertEqual(self.ctx.get_save(), decode_save_file(self.read_save()))
+        self.assert_saved()
+        self.assertTrue(self.read_save().startswith(save_file_magic))
+
+    def test_partial_record(self) -> None:
+        self.assert_saved()
+        self.ctx.location_checks[0, 1].add(5)
+        self.ctx.save_journal.changed("location_checks", (0, 1))
+        savedata = self.ctx.get_save()
+        self.assert_saved()
+        with open(self.save_filename, "ab") as f:
+            f.write(b"\xff\x00\x00\x00partial")
+        self.assertEqual(savedata, decode_save_file(self.read_save()))
+
+
+class TestOutbox(unittest.TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "AP_12345.archipelago")
+        multidata = {
+            **TestLazyLoad.multidata,
+            "slot_info": {1: NetworkSlot("Player1", "Archipelago", SlotType.player),
+                          2: NetworkSlot("Player2", "Archipelago", SlotType.player)},
+            "connect_names": {"Player1": (0, 1), "Player2": (0, 2)},
+            "locations": {1: {location: (location, 1 + location % 2, 0) for location in range(1, 11)}, 2: {}},
+            "slot_data": {1: {}, 2: {}},
+            "precollected_items": {1: [], 2: []},
+            "precollected_hints": {1: set(), 2: set()},
+        }
+        with open(path, "wb") as f:
+            write_multidata(f, multidata)
+        self.ctx = Context("", 0, "", "", 0, 0, False)
+        self.ctx.load(path)
+        self.ctx.save = lambda: None
+        self.clients = {}
+        for slot in (1, 2):
+            client = Client(mock.Mock(open=True), self.ctx)
+            client.auth, client.team, client.slot, client.items_handling = True, 0, slot, 0b111
+            self.ctx.endpoints.append(client)
+            self.ctx.clients[0][slot].append(client)
+            self.clients[slot] = client
+
+    def run_tick(self, function) -> list:
+        """Runs function in an event loop and returns the frames sent by broadcast, as (sockets, messages)."""
+        async def tick():
+            function()
+            await asyncio.sleep(0)
+
+        with mock.patch("MultiServer.websockets.broadcast") as broadcast:
+            asyncio.run(tick())
+        self.raw_frames = [call.args for call in broadcast.call_args_list]
+        return [(sockets, decode_frame(frame)) for sockets, frame in self.raw_frames]
+
+    def test_release(self) -> None:
+        """Verify that a release sends each client a single frame, with its items and location checks merged."""
+        frames = self.run_tick(lambda: release_player(self.ctx, 0, 1))
+        self.assertEqual(2, len(frames))
+        frames = {sockets[0]: msgs for sockets, msgs in frames}
+        for client in self.clients.values():
+            msgs = frames[client.socket]
+            self.assertEqual(11, [msg["cmd"] for msg in msgs].count("PrintJSON"), "release notice and 10 sends")
+            received = [msg for msg in msgs if msg["cmd"] == "ReceivedItems"]
+            self.assertEqual(1, len(received))
+            self.assertEqual(5, len(received[0]["items"]))
+            self.assertEqual(5, client.send_index)
+        room_updates = [msg for msg in frames[self.clients[1].socket] if msg["cmd"] == "RoomUpdate"]
+        self.assertEqual(1, len(room_updates))
+        self.assertEqual(set(range(1, 11)), set(room_updates[0]["checked_locations"]))
+        changed_keys = self.ctx.save_journal.changed_keys
+        self.assertEqual({(0, 1)}, changed_keys["location_checks"])
+        self.assertEqual({(0, 1, True), (0, 2, False), (0, 2, True)}, changed_keys["received_items"])
+
+    def test_getitem(self) -> None:
+        """Verify that a cheated item reaches clients of every items handling, and the on_items_received hook."""
+        self.ctx.item_cheat = True
+        with mock.patch.object(self.ctx, "on_items_received") as on_items_received:
+            self.run_tick(lambda: ClientMessageProcessor(self.ctx, self.clients[1])("!getitem Nothing"))
+        item = NetworkItem(-1, -1, 1)
+        on_items_received.assert_called_once_with(0, 1, (item,))
+        self.assertEqual([item], self.ctx.received_items[0, 1, False])
+        self.assertEqual([item], self.ctx.received_items[0, 1, True])
+
+    def test_shared_frame(self) -> None:
+        """Verify that clients receiving the same messages share one frame, and only receivers are visited."""
+        self.clients[2].send_index = 0
+        frames = self.run_tick(lambda: register_location_checks(self.ctx, 0, 2, [1]))
+        self.assertEqual([], frames, "location is not in the world of player 2")
+
+        frames = self.run_tick(lambda: self.ctx.broadcast_text_all("Hello"))
+        self.assertEqual(1, len(frames))
+        self.assertEqual(2, len(frames[0][0]))
+        self.assertEqual("Hello", frames[0][1][0]["data"][0]["text"])
+
+    @unittest.skipUnless(binary_protocol_available, "binary protocol needs orjson")
+    def test_binary_connect(self) -> None:
+        """Verify that the Connect of a CommonClient using the binary protocol is accepted, with its version intact."""
+        from CommonClient import CommonContext
+        from Utils import Version, version_tuple
+
+        async def connect() -> list:
+            client_ctx = CommonContext()
+            client_ctx.auth, client_ctx.game, client_ctx.items_handling = "Player1", "Archipelago", 0b111
+            client_ctx.tags = {binary_protocol_tag}
+            client_ctx.server = Endpoint(mock.Mock(open=True, closed=False, send=mock.AsyncMock()))
+            client_ctx.server.binary = True
+            await client_ctx.send_connect()
+            frame = client_ctx.server.socket.send.call_args.args[0]
+            self.assertIsInstance(frame, bytes)
+            self.ctx.minimum_client_versions[1] = Version(0, 0, 0)
+            client = Client(mock.Mock(open=True, send=mock.AsyncMock()), self.ctx)
+            self.ctx.endpoints.append(client)
+            for msg in decode_frame(frame):
+                await process_client_cmd(self.ctx, client, msg)
+            self.assertIsInstance(client.version, Version)
+            self.assertEqual(version_tuple, client.version)
+            return [msg for call in client.socket.send.call_args_list for msg in decode_frame(call.args[0])]
+
+        with mock.patch("MultiServer.websockets.broadcast"):
+            msgs = asyncio.run(connect())
+        self.assertIn("Connected", [msg["cmd"] for msg in msgs])
+
+    def test_connect_order(self) -> None:
+        """Verify that a joining client gets Connected before the messages announcing its join."""
+        from Utils import Version, version_tuple
+
+        sent = []
+        client = Client(mock.Mock(open=True), self.ctx)
+        client.socket.send = mock.AsyncMock(side_effect=lambda frame: sent.extend(decode_frame(frame)))
+        self.ctx.endpoints.append(client)
+        self.ctx.minimum_client_versions[1] = Version(0, 0, 0)
+
+        def broadcast(sockets, frame) -> None:
+            if client.socket in sockets:
+                sent.extend(decode_frame(frame))
+
+        async def connect() -> None:
+            await process_client_cmd(self.ctx, client, {
+                "cmd": "Connect", "password": None, "name": "Player1", "version": version_tuple, "tags": [],
+                "items_handling": 0b111, "uuid": "test", "game": "Archipelago"})
+            await asyncio.sleep(0)
+
+        with mock.patch("MultiServer.websockets.broadcast", broadcast):
+            asyncio.run(connect())
+        commands = [msg["cmd"] for msg in sent]
+        self.assertEqual("Connected", commands[0])
+        self.assertIn("PrintJSON", commands)
+
+    def test_binary_protocol(self) -> None:
+        """Verify that clients asking for the binary protocol get binary frames with the same content."""
+        self.clients[2].tags = [binary_protocol_tag]
+        frames = {sockets[0]: msgs for sockets, msgs in self.run_tick(lambda: release_player(self.ctx, 0, 1))}
+        raw_frames = {sockets[0]: frame for sockets, frame in self.raw_frames}
+        self.assertIsInstance(raw_frames[self.clients[1].socket], str)
+        self.assertIsInstance(raw_frames[self.clients[2].socket], bytes)
+        self.assertEqual([msg for msg in frames[self.clients[1].socket] if msg["cmd"] == "PrintJSON"],
+                         [msg for msg in frames[self.clients[2].socket] if msg["cmd"] == "PrintJSON"])
+        received = [msg for msg in frames[self.clients[2].socket] if msg["cmd"] == "ReceivedItems"]
+        self.assertEqual(self.ctx.received_items[0, 2, True], received[0]["items"])
+        self.assertIsInstance(received[0]["items"][0], NetworkItem)
+
+    def test_found_hint(self) -> None:
+        """Verify that checking a location marks its hints as found for every slot that has them."""
+        hint = Hint(2, 1, 4, 4, False)
+        self.assertTrue(self.ctx.add_hint(0, 1, hint))
+        self.assertTrue(self.ctx.add_hint(0, 2, hint))
+        self.assertFalse(self.ctx.add_hint(0, 2, hint))
+        self.run_tick(lambda: register_location_checks(self.ctx, 0, 1, [3]))
+        self.assertEqual({hint}, self.ctx.hints[0, 2])
+
+        with mock.patch.object(self.ctx, "on_changed_hints") as on_changed_hints:
+            self.run_tick(lambda: register_location_checks(self.ctx, 0, 1, [4]))
+        self.assertEqual({(0, 1), (0, 2)}, {call.args for call in on_changed_hints.call_args_list})
+        for slot in (1, 2):
+            self.assertEqual({hint._replace(found=True)}, self.ctx.hints[0, slot])
+        self.assertEqual({}, self.ctx.unfound_hints)
+
+
+class TestSpheres(unittest.TestCase):
+    def test_get_sphere(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "AP_12345.archipelago")
+        with open(path, "wb") as f:
+            write_multidata(f, {**TestLazyLoad.multidata, "spheres": [{1: {1, 2}}, {1: {3}}, {1: {4, 5}}]})
+        ctx = Context("", 0, "", "", 0, 0, False)
+        self.assertEqual(-1, ctx.get_sphere(1, 1), "spheres are not available")
+        ctx.load(path)
+        self.assertEqual(0, ctx.get_sphere(1, 2))
+        self.assertEqual(2, ctx.get_sphere(1, 5))
+        self.assertEqual({1: 0, 2: 0, 3: 1, 4: 2, 5: 2}, ctx.get_player_spheres(1))
+        self.assertEqual({}, ctx.get_player_spheres(2))
+        with self.assertRaises(KeyError):
+            ctx.get_sphere(1, 6)
+
+
+class TestDataPackage(unittest.TestCase):
+    def test_encode_data_package(self) -> None:
+        """Verify that the cached encoding of DataPackage matches encoding the message directly."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "AP_12345.archipelago")
+        with open(path, "wb") as f:
+            write_multidata(f, TestLazyLoad.multidata)
+        ctx = Context("", 0, "", "", 0, 0, False)
+        ctx.load(path)
+        self.assertEqual({"Archipelago"}, ctx.room_info_games)
+        self.assertIn("Archipelago", ctx.room_info_checksums)
+
+        expected = decode(encode([{"cmd": "DataPackage",
+                                   "data": {"games": {"Archipelago": ctx.gamespackage["Archipelago"]}}}]))
+        for binary in (False, True):
+            with self.subTest(binary=binary):
+                self.assertEqual(expected, decode_frame(ctx.encode_data_package(["Archipelago"], binary)))
+                self.assertIs(get_encoded_game_data(ctx.gamespackage["Archipelago"], binary),
+                              get_encoded_game_data(ctx.gamespackage["Archipelago"], binary))
+        self.assertEqual([{"cmd": "DataPackage", "data": {"games": {}}}], decode(ctx.encode_data_package([])))
+
+
+class TestCompression(unittest.TestCase):
+    def negotiate(self, **kwargs):
+        client_factory = ClientPerMessageDeflateFactory(client_max_window_bits=True)
+        server_factory, = get_server_extensions(**kwargs)
+        params, server = server_factory.process_request_params(client_factory.get_request_params(), [])
+        return server, client_factory.process_response_params(params, [])
+
+    def test_threshold(self) -> None:
+        server, client = self.negotiate(compression_threshold=64, compression_window_bits=10)
+        self.assertEqual(10, server.local_max_window_bits)
+        small = Frame(Opcode.TEXT, b'[{"cmd": "Bounced"}]')
+        large = Frame(Opcode.TEXT, encode([{"cmd": "PrintJSON", "data": [{"text": "text"}] * 20}]).encode())
+        for frame in (small, large, small, large):
+            encoded = server.encode(frame)
+            self.assertEqual(frame is large, encoded.rsv1)
+            self.assertEqual(frame.data, client.decode(encoded).data)
+        self.assertLess(len(server.encode(large).data), len(large.data))
+
+    def test_fragmented(self) -> None:
+        server, client = self.negotiate(compression_threshold=64)
+        frames = [Frame(Opcode.TEXT, b"[" * 10, fin=False), Frame(Opcode.CONT, b"]" * 100)]
+        self.assertEqual([False, False], [server.encode(frame).rsv1 for frame in frames])
+        frames = [Frame(Opcode.TEXT, b"[" * 100, fin=False), Frame(Opcode.CONT, b"]" * 10)]
+        encoded = [server.encode(frame) for frame in frames]
+        self.assertEqual([True, False], [frame.rsv1 for frame in encoded])
+        self.assertEqual([frame.data for frame in frames], [client.decode(frame).data for frame in encoded])
+
+    def test_disabled(self) -> None:
+        self.assertEqual([], get_server_extensions(compression_threshold=-1))
@@ -1,6 +1,7 @@
 import io
 import json
 import yaml
+from uuid import UUID
 
 from . import TestBase
 
@@ -43,3 +44,84 @@ class TestAPIGenerate(TestBase):
         json_data = response.get_json()
         self.assertTrue(json_data["text"].startswith("Generation of seed "))
         self.assertTrue(json_data["text"].endswith(" started successfully."))
+
+    def queue_generation(self) -> UUID:
+        options = {
+            "Tester1":
+                {
+                    "game": "Archipelago",
+                    "name": "Tester",
+                    "Archipelago": {}
+                }
+        }
+        response = self.client.post(
+            "/api/generate",
+            data=json.dumps({"weights": options}),
+            content_type='application/json'
+        )
+        return UUID(response.get_json()["detail"])
+
+    def test_generation_progress(self) -> None:
+        from BaseClasses import GenerationCancelled
+        from WebHostLib.generate import GenerationProgressWriter
+
+        generation_id = self.queue_generation()
+        progress = GenerationProgressWriter(generation_id)
+        progress.fill_interval = 0
+        progress.report_stage("fill")
+        progress.report_fill("Progression", 1000, 2500)
+
+        response = self.client.get(f"/api/status/{self.app.url_map.converters['suuid'].to_url(None, generation_id)}")
+        self.assertEqual(202, response.status_code)
+        self.assertEqual({"stage": "fill", "fill": {"name": "Progression", "placed": 1000, "total": 2500}},
+                         response.get_json()["progress"])
+        response = self.client.get(f"/wait/{self.app.url_map.converters['suuid'].to_url(None, generation_id)}")
+        self.assertIn("Current step: Fill", response.text)
+        self.assertIn("1000/2500 items placed", response.text)
+
+        progress.cancel()
+        with self.assertRaises(GenerationCancelled):
+            progress.report_stage("post_fill")
+        response = self.client.get(f"/api/status/{self.app.url_map.converters['suuid'].to_url(None, generation_id)}")
+        self.assertEqual("fill", response.get_json()["progress"]["stage"], "cancelled progress was still written")
+
+    def test_generation_timeout(self) -> None:
+        from pony.orm import db_session
+        from Utils import restricted_loads
+        from WebHostLib.generate import gen_game
+        from WebHostLib.models import Generation, Seed, STATE_ERROR
+
+        generation_id = self.queue_generation()
+        with db_session:
+            generation = Generation.get(id=generation_id)
+            options = restricted_loads(generation.options)
+            meta = json.loads(generation.meta)
+            owner = generation.owner
+
+        job_time = self.app.config["JOB_TIME"]
+        self.app.config["JOB_TIME"] = 0
+        try:
+            self.assertIsNone(gen_game(options, meta=meta, sid=generation_id, owner=owner))
+        finally:
+            self.app.config["JOB_TIME"] = job_time
+
+        with db_session:
+            generation = Generation.get(id=generation_id)
+            self.assertEqual(STATE_ERROR, generation.state)
+            self.assertIn("Allowed time for Generation exceeded", json.loads(generation.meta)["error"])
+            self.assertIsNone(Seed.get(id=generation_id), "cancelled generation was still uploaded")
+
+    def test_cancelled_upload(self) -> None:
+        import os
+        from tempfile import TemporaryDirectory
+        from uuid import uuid4
+        from BaseClasses import GenerationCancelled, GenerationProgress
+        from WebHostLib.generate import upload_to_db
+
+        progress = GenerationProgress()
+        progress.cancel()
+        with TemporaryDirectory() as folder:
+            with open(os.path.join(folder, "AP_Cancelled.zip"), "wb"):
+                pass
+            with self.assertRaises(GenerationCancelled, msg="generation cancelled during its upload was committed"):
+                upload_to_db(folder, None, uuid4(), False, progress)
@@ -160,6 +160,209 @@ class TestHostFakeRoom(TestBase):
             self.assertIn("/connect ", response_text)
             self.assertIn(":12345", response_text)
 
+    def test_host_room_shared_port(self) -> None:
+        """Verify that rooms on a hoster with a shared port are connected to by path."""
+        from pony.orm import db_session
+        from WebHostLib.customserver import get_room_path
+        from WebHostLib.models import Room
+
+        with db_session:
+            room: Room = Room.get(id=self.room_id)
+            room.last_port = 12345
+
+        self.app.config["SHARED_ROOM_PORT"] = 12345
+        self.addCleanup(self.app.config.__setitem__, "SHARED_ROOM_PORT", 0)
+        with self.app.app_context(), self.app.test_request_context():
+            response = self.client.get(url_for("host_room", room=self.room_id))
+            response_text = response.get_data(True)
+            self.assertIn(f":12345/{get_room_path(self.room_id)}'", response_text)
+            self.assertIn(f"path /{get_room_path(self.room_id)} selects this room", response_text)
+
+    def test_shared_room_server_routing(self) -> None:
+        """Verify that connections to a shared port are only accepted for rooms hosted on it."""
+        import asyncio
+        from unittest import mock
+        from WebHostLib import customserver
+
+        shared_server = customserver.SharedRoomServer()
+        ctx = mock.Mock(room_id=self.room_id, endpoints=[])
+        route = shared_server.add_room(ctx)
+        websocket = mock.AsyncMock()
+        with mock.patch.object(customserver, "server") as server:
+            asyncio.run(shared_server(websocket, "/" + customserver.get_room_path(self.room_id)))
+            server.assert_called_once_with(websocket, "/" + customserver.get_room_path(self.room_id), ctx)
+            route.ws_server.close()
+            asyncio.run(shared_server(websocket, "/" + customserver.get_room_path(self.room_id)))
+            server.assert_called_once()
+        websocket.close.assert_awaited_once_with(4004, "Room not found")
+
+    def test_room_scheduler_commands(self) -> None:
+        """Verify that commands are claimed for the given rooms only, and only once."""
+        from pony.orm import db_session
+        from WebHostLib.customserver import RoomScheduler
+        from WebHostLib.models import Command, Room
+
+        with db_session:
+            room: Room = Room.get(id=self.room_id)
+            other_room = Room(seed=room.seed, owner=room.owner)
+            Command(room=room, commandtext="/first")
+            Command(room=other_room, commandtext="/other")
+            Command(room=room, commandtext="/second")
+
+        self.assertEqual([(self.room_id, "/first"), (self.room_id, "/second")],
+                         RoomScheduler._claim_commands([self.room_id]))
+        self.assertEqual([], RoomScheduler._claim_commands([self.room_id]))
+        self.assertEqual([(other_room.id, "/other")], RoomScheduler._claim_commands([other_room.id]))
+        with db_session:
+            Room.get(id=other_room.id).delete()
+
+    def test_room_scheduler_removed_room_commands(self) -> None:
+        """Verify that commands of a room removed while they were claimed are left for the next hoster of the room."""
+        import asyncio
+        from unittest import mock
+        from pony.orm import db_session
+        from WebHostLib.customserver import RoomScheduler
+        from WebHostLib.models import Command, Room
+
+        with db_session:
+            Command(room=Room.get(id=self.room_id), commandtext="/exit")
+        commands = RoomScheduler._claim_commands([self.room_id])
+        scheduler = RoomScheduler(max_workers=1)
+        scheduler.command_interval = 0.01
+        scheduler.rooms[self.room_id] = mock.Mock(room_id=self.room_id)
+        scheduler.command_processors[self.room_id] = command_processor = mock.Mock()
+        claimed = []
+
+        def claim_then_remove(room_ids):
+            scheduler.rooms.pop(self.room_id, None)
+            scheduler.command_processors.pop(self.room_id, None)
+            claimed.append(room_ids)
+            return commands
+
+        async def run():
+            with mock.patch.object(scheduler, "_claim_commands", claim_then_remove), \
+                    mock.patch.object(scheduler, "_return_commands") as return_commands:
+                task = asyncio.create_task(scheduler._process_commands())
+                while not claimed:
+                    await asyncio.sleep(0.01)
+                await asyncio.sleep(0.05)
+                task.cancel()
+            return_commands.assert_called_once_with(commands)
+
+        asyncio.run(run())
+        scheduler.executor.shutdown()
+        command_processor.assert_not_called()
+        RoomScheduler._return_commands(commands)
+        self.assertEqual(commands, RoomScheduler._claim_commands([self.room_id]))
+
+    def test_room_scheduler_save(self) -> None:
+        """Verify that rooms are saved together, and one at a time if that fails."""
+        import threading
+        from unittest import mock
+        from WebHostLib.customserver import RoomScheduler
+
+        rooms = [mock.Mock(save_journal=mock.Mock(lock=threading.Lock())) for _ in range(2)]
+        RoomScheduler._save(rooms)
+        for ctx in rooms:
+            ctx.stage_save.return_value.assert_called_once()
+            ctx._save.assert_not_called()
+
+        rooms[0].stage_save.side_effect = ValueError("can't be saved")
+        with self.assertLogs(level="ERROR"):
+            RoomScheduler._save(rooms)
+        for ctx in rooms:
+            ctx.save_journal.reset.assert_called_once()
+            ctx._save.assert_called_once()
+
+    def test_rooms_to_start(self) -> None:
+        """Verify that the autohost only picks up rooms that became active since its last poll."""
+        from datetime import datetime, timedelta
+        from pony.orm import db_session
+        from WebHostLib.autolauncher import get_rooms_to_start
+        from WebHostLib.models import Room
+
+        with db_session:
+            room: Room = Room.get(id=self.room_id)
+            room.last_activity = datetime.utcnow() - timedelta(seconds=room.timeout + 60)
+        poll_time = datetime.utcnow()
+        with db_session:
+            self.assertNotIn(self.room_id, [room.id for room in get_rooms_to_start(poll_time - timedelta(days=3))])
+
+        with self.app.app_context(), self.app.test_request_context():
+            self.client.get(url_for("host_room", room=self.room_id))
+        with db_session:
+            self.assertIn(self.room_id, [room.id for room in get_rooms_to_start(poll_time)])
+            self.assertNotIn(self.room_id, [room.id for room in get_rooms_to_start(datetime.utcnow())])
+
+    def test_start_rooms_pending(self) -> None:
+        """Verify that an active room found while its hoster still runs it gets started once the hoster let it go."""
+        from datetime import datetime, timedelta
+        from pony.orm import db_session
+        from WebHostLib.autolauncher import MultiworldInstance, start_rooms
+        from WebHostLib.models import Room
+
+        hoster = MultiworldInstance(self.app.config, 0)
+        hoster.room_ids.add(self.room_id)  # still shutting down
+        pending_room_ids = set()
+        with db_session:
+            room: Room = Room.get(id=self.room_id)
+            room.last_activity = datetime.utcnow()
+        with db_session:
+            start_rooms([hoster], datetime.utcnow() - timedelta(seconds=5), pending_room_ids)
+        self.assertEqual({self.room_id}, pending_room_ids)
+        self.assertTrue(hoster.rooms_to_start.empty())
+
+        hoster.room_ids.clear()  # shut down, but no new activity since the last poll
+        with db_session:
+            start_rooms([hoster], datetime.utcnow() + timedelta(seconds=5), pending_room_ids)
+        self.assertEqual(set(), pending_room_ids)
+        self.assertEqual(self.room_id, hoster.rooms_to_start.get(timeout=5))
+        self.assertIn(self.room_id, hoster.room_ids)
+
+        hoster.room_ids.clear()
+        pending_room_ids.add(self.room_id)
+        with db_session:
+            room: Room = Room.get(id=self.room_id)
+            room.last_activity = datetime.utcnow() - timedelta(seconds=room.timeout + 60)
+        with db_session:
+            start_rooms([hoster], datetime.utcnow() + timedelta(seconds=5), pending_room_ids)
+        self.assertEqual(set(), pending_room_ids, "room past its timeout was kept pending")
+        self.assertTrue(hoster.rooms_to_start.empty())
+
+    def test_room_scheduler_load(self) -> None:
+        """Verify that the load of a hoster counts clients and messages of its rooms."""
+        from unittest import mock
+        from WebHostLib.customserver import RoomScheduler
+
+        scheduler = RoomScheduler(max_workers=1)
+        ctx = mock.Mock(room_id=self.room_id, endpoints=[object(), object()], client_messages=0)
+        scheduler.rooms[self.room_id] = ctx
+        scheduler.get_load()
+        ctx.client_messages = 50
+        scheduler._last_load_report -= 10
+        load = scheduler.get_load()
+        self.assertEqual(2, load.clients)
+        self.assertAlmostEqual(5, load.messages_per_second, places=1)
+        self.assertGreaterEqual(load.rss, 0)
+
+    def test_place_room(self) -> None:
+        """Verify that rooms stay on their hoster, and new ones go to the least loaded hoster that is not draining."""
+        from WebHostLib.autolauncher import MultiworldInstance, place_room
+        from WebHostLib.customserver import HosterLoad
+
+        hosters = [MultiworldInstance(self.app.config, x) for x in range(3)]
+        hosters[0].load = HosterLoad(100, 50.0, 0)
+        hosters[1].load = HosterLoad(10, 5.0, 0)
+        hosters[2].load = HosterLoad(0, 0.0, 0)
+        hosters[2].draining = True
+        self.assertIs(hosters[1], place_room(hosters, self.room_id))
+        hosters[0].room_ids.add(self.room_id)
+        self.assertIs(hosters[0], place_room(hosters, self.room_id))
+
+        hosters[0].room_ids.clear()
+        hosters[1].start_room(uuid4(), players=300)
+        self.assertIs(hosters[0], place_room(hosters, self.room_id))
+
     def test_host_room_own_post(self) -> None:
         """Verify command from owner gets queued for the server and response is redirect."""
         from pony.orm import db_session, select
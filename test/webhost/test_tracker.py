@@ -0,0 +1,162 @@
+import io
+import pickle
+from uuid import uuid4
+
+from . import TestBase
+
+
+class TestTrackerCache(TestBase):
+    def test_sized_lru_cache(self) -> None:
+        """Tests that the cache evicts the least recently used entries once over its size."""
+        from WebHostLib.tracker import SizedLRUCache
+
+        loads = []
+
+        def load(key: str, size: int):
+            def loader():
+                loads.append(key)
+                return key.upper(), size
+            return loader
+
+        cache = SizedLRUCache(10)
+        self.assertEqual("A", cache.get("a", load("a", 4)))
+        self.assertEqual("B", cache.get("b", load("b", 4)))
+        self.assertEqual("A", cache.get("a", load("a", 4)))
+        self.assertEqual(["a", "b"], loads)
+        cache.get("c", load("c", 4))  # over size, evicting b as a was used since
+        self.assertEqual(8, cache.size)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        cache.get("d", load("d", 20))  # larger than the cache, but still kept until the next entry
+        self.assertEqual(["d"], list(cache._entries))
+        self.assertEqual(20, cache.size)
+
+    def test_tracker_data_shared(self) -> None:
+        """Tests that TrackerData of the same seed share decoded multidata and data package lookups."""
+        from pony.orm import db_session
+        from Utils import write_multidata
+        from WebHostLib.models import GameDataPackage, Room, Seed
+        from WebHostLib.tracker import TRACKER_DATAPACKAGE_EXPANSION, TRACKER_MULTIDATA_EXPANSION, TrackerData, \
+            _game_lookup_cache, _multidata_cache
+
+        checksum = uuid4().hex
+        game_package = {"item_name_to_id": {"Sword": 1}, "location_name_to_id": {"Chest": 2}}
+        file = io.BytesIO()
+        write_multidata(file, {"seed_name": "Tracked", "datapackage": {"Game": {"checksum": checksum}}})
+        owner = uuid4()
+        with db_session:
+            GameDataPackage(checksum=checksum, data=pickle.dumps(game_package))
+            seed = Seed(multidata=file.getvalue(), owner=owner)
+            rooms = [Room(seed=seed, owner=owner, tracker=uuid4()) for _ in range(2)]
+            first, second = (TrackerData(room) for room in rooms)
+            self.assertEqual("Tracked", second.get_seed_name())
+            self.assertIs(first._multidata, second._multidata)
+            self.assertIn(seed.id, _multidata_cache)
+            self.assertIn(checksum, _game_lookup_cache)
+            # weighed by their estimated decoded size
+            self.assertEqual(len(file.getvalue()) * TRACKER_MULTIDATA_EXPANSION, _multidata_cache._entries[seed.id][1])
+            self.assertEqual(len(pickle.dumps(game_package)) * TRACKER_DATAPACKAGE_EXPANSION,
+                             _game_lookup_cache._entries[checksum][1])
+            self.assertIs(first.item_id_to_name["Game"], second.item_id_to_name["Game"])
+            self.assertEqual("Sword", second.item_id_to_name["Game"][1])
+            self.assertEqual({"Chest": 2}, second.location_name_to_id["Game"])
+            for room in rooms:
+                room.delete()
+            seed.delete()
+            GameDataPackage[checksum].delete()
+
+    def test_tracker_summary(self) -> None:
+        """Tests that the room keeps its tracker summary up to date, and trackers and the api read it."""
+        import asyncio
+        import json
+        import logging
+        from unittest import mock
+        from flask import url_for
+        from pony.orm import db_session
+        from MultiServer import register_location_checks
+        from NetUtils import ClientStatus, NetworkItem, NetworkSlot, SlotType
+        from Utils import write_multidata
+        from WebHostLib.customserver import RoomScheduler, WebHostContext, get_static_server_data
+        from WebHostLib.models import Room, Seed
+        from WebHostLib.tracker import TrackerData
+
+        file = io.BytesIO()
+        write_multidata(file, {
+            "minimum_versions": {"server": (0, 0, 0), "clients": {}},
+            "version": (0, 0, 0),
+            "slot_info": {1: NetworkSlot("Player1", "Archipelago", SlotType.player),
+                          2: NetworkSlot("Player2", "Archipelago", SlotType.player)},
+            "connect_names": {"Player1": (0, 1), "Player2": (0, 2)},
+            "locations": {1: {location: (location, 2, 0) for location in range(1, 11)}, 2: {}},
+            "slot_data": {1: {}, 2: {}},
+            "er_hint_data": {},
+            "precollected_items": {1: [], 2: [7]},
+            "precollected_hints": {1: set(), 2: set()},
+            "seed_name": "12345",
+            "datapackage": {},
+        })
+        owner = uuid4()
+        with db_session:
+            room = Room(seed=Seed(multidata=file.getvalue(), owner=owner), owner=owner, tracker=uuid4())
+            room_id, tracker = room.id, room.tracker
+
+        async def play() -> WebHostContext:
+            ctx = WebHostContext(get_static_server_data(), logging.getLogger())
+            ctx.load(room_id)
+            ctx.init_save()
+            register_location_checks(ctx, 0, 1, [1, 2, 3])
+            ctx.client_game_state[0, 2] = ClientStatus.CLIENT_GOAL
+            ctx.on_client_status_change(0, 2)
+            await asyncio.sleep(0)
+            return ctx
+
+        with mock.patch("MultiServer.websockets.broadcast"):
+            ctx = asyncio.run(play())
+        self.assertTrue(ctx.tracker_summary_dirty)
+        self.assertEqual({"checked": 3, "total": 10, "received": 0, "status": ClientStatus.CLIENT_UNKNOWN,
+                          "last_activity": ctx.client_activity_timers[0, 1].timestamp()},
+                         ctx.tracker_summary[0, 1])
+        self.assertEqual(3, ctx.tracker_summary[0, 2]["received"])
+        RoomScheduler.write_tracker_summaries([(room_id, ctx.get_tracker_summary())])
+        self.assertFalse(ctx.tracker_summary_dirty)
+
+        # only slots that changed are serialized again
+        ctx.tracker_summary_json[0, 1] = "{}"
+        ctx.client_game_state[0, 2] = ClientStatus.CLIENT_PLAYING
+        ctx.on_client_status_change(0, 2)
+        self.assertEqual({(0, 2)}, ctx.tracker_summary_changed)
+        self.assertEqual('{"slots": [{}, ' + json.dumps({"team": 0, "player": 2, **ctx.tracker_summary[0, 2]}) + "]}",
+                         ctx.get_tracker_summary())
+        ctx.tracker_summary_changed.add((0, 1))
+        ctx.client_game_state[0, 2] = ClientStatus.CLIENT_GOAL
+        ctx.on_client_status_change(0, 2)
+        RoomScheduler.write_tracker_summaries([(room_id, ctx.get_tracker_summary())])
+
+        with db_session:
+            tracker_data = TrackerData(Room[room_id])
+            self.assertEqual({(0, 1): 3, (0, 2): 0}, tracker_data.get_room_locations_complete())
+            self.assertEqual(ClientStatus.CLIENT_GOAL, tracker_data.get_player_client_status(0, 2))
+            self.assertIn((0, 1), tracker_data.get_room_last_activity())
+            self.assertNotIn("_multisave", tracker_data._tracker_cache, "multisave was not needed for counts")
+
+        # location and item lists are not part of the summary, they come from the multisave
+        ctx._save()
+        with db_session:
+            tracker_data = TrackerData(Room[room_id])
+            self.assertEqual({1, 2, 3}, tracker_data.get_player_checked_locations(0, 1))
+            self.assertEqual(set(range(4, 11)), tracker_data.get_player_missing_locations(0, 1))
+            self.assertEqual([NetworkItem(location, location, 1, 0) for location in (1, 2, 3)],
+                             tracker_data.get_player_received_items(0, 2))
+            self.assertEqual({7: 1, 1: 1, 2: 1, 3: 1}, tracker_data.get_player_inventory_counts(0, 2))
+
+        with self.app.app_context(), self.app.test_request_context():
+            response = self.client.get(url_for("api.tracker_slot_summary", tracker=tracker, team=0, player=1))
+            self.assertEqual(3, response.json["checked"])
+            response = self.client.get(url_for("api.tracker_summary", tracker=uuid4()))
+            self.assertEqual(404, response.status_code)
+            response = self.client.get(url_for("get_multiworld_tracker", tracker=tracker))
+            self.assertEqual(200, response.status_code)
+            self.assertIn(b"Player1", response.data)
+
+        with db_session:
+            Room[room_id].seed.delete()  # deletes its rooms, and their summaries, as well
@@ -0,0 +1,165 @@
+"""
+On-disk cache of the metadata of all worlds, so tools that only need game names and data packages
+don't have to import game code. worlds/__init__.py writes it after loading all world sources,
+and it stays valid as long as the Archipelago version and the files of every world source stay the same.
+"""
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import sys
+import typing
+
+from Utils import __version__, cache_path, local_path, user_path
+
+if typing.TYPE_CHECKING:
+    from worlds import GamesPackage
+
+__all__ = [
+    "WorldManifest",
+    "GameManifest",
+    "get_world_folders",
+    "find_world_sources",
+    "get_source_stamps",
+    "load_manifest",
+    "write_manifest",
+    "get_manifest",
+    "restrict_world_loading",
+]
+
+manifest_version = 1
+
+
+class GameManifest(typing.TypedDict):
+    source: str
+    """path of the world source registering the game, as in worlds.WorldSource.path"""
+    data_package: GamesPackage
+    hint_blacklist: typing.List[str]
+    options: typing.Dict[str, str]
+    """option name -> display name"""
+
+
+class WorldManifest(typing.TypedDict):
+    version: str
+    sources: typing.Dict[str, str]
+    """world source path -> stamp of its files"""
+    games: typing.Dict[str, GameManifest]
+
+
+# found without importing it, which would load all worlds
+local_folder: str = os.path.dirname(importlib.util.find_spec("worlds").origin)
+
+load_only: typing.Optional[typing.Set[str]] = None
+"""if set before worlds is first imported, only world sources registering these games are loaded"""
+
+
+def get_world_folders() -> typing.Tuple[typing.Optional[str], str]:
+    """Returns the user world folder, None if it can't be created, and the built-in world folder."""
+    user_folder: typing.Optional[str] = \
+        user_path("worlds") if user_path() != local_path() else user_path("custom_worlds")
+    try:
+        os.makedirs(user_folder, exist_ok=True)
+    except OSError:  # can't access/write?
+        user_folder = None
+    return user_folder, local_folder
+
+
+def find_world_sources() -> typing.List[typing.Tuple[str, bool, bool]]:
+    """Returns (path, is_zip, relative) of potential world containers, currently folders and .apworld's"""
+    user_folder, local_folder = get_world_folders()
+    sources: typing.List[typing.Tuple[str, bool, bool]] = []
+    for folder in (folder for folder in (user_folder, local_folder) if folder):
+        relative = folder == local_folder
+        for entry in os.scandir(folder):
+            # prevent loading of __pycache__ and allow _* for non-world folders, disable files/folders starting with "."
+            if not entry.name.startswith(("_", ".")):
+                file_name = entry.name if relative else os.path.join(folder, entry.name)
+                if entry.is_dir():
+                    if os.path.isfile(os.path.join(entry.path, '__init__.py')):
+                        sources.append((file_name, False, relative))
+                    elif os.path.isfile(os.path.join(entry.path, '__init__.pyc')):
+                        sources.append((file_name, False, relative))
+                    else:
+                        logging.warning(f"excluding {entry.name} from world sources because it has no __init__.py")
+                elif entry.is_file() and entry.name.endswith(".apworld"):
+                    sources.append((file_name, True, relative))
+    return sources
+
+
+def _get_stamp(path: str) -> str:
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+    stamp = hashlib.sha1()
+    for root, dirs, files in os.walk(path):
+        dirs[:] = sorted(directory for directory in dirs if directory != "__pycache__")
+        for file in sorted(files):
+            file_path = os.path.join(root, file)
+            stat = os.stat(file_path)
+            stamp.update(f"{os.path.relpath(file_path, path)}:{stat.st_mtime_ns}:{stat.st_size}\n".encode())
+    return stamp.hexdigest()
+
+
+def get_source_stamps(sources: typing.Iterable[typing.Tuple[str, bool, bool]]) -> typing.Dict[str, str]:
+    """Returns world source path -> stamp, which changes whenever a file of the source is modified."""
+    return {path: _get_stamp(os.path.join(local_folder, path) if relative else path)
+            for path, is_zip, relative in sources}
+
+
+def get_manifest_version() -> str:
+    return f"{__version__}:{manifest_version}"
+
+
+def load_manifest(stamps: typing.Optional[typing.Dict[str, str]] = None) -> typing.Optional[WorldManifest]:
+    """Returns the cached manifest, or None if there is none or any world source changed since it was written."""
+    if stamps is None:
+        stamps = get_source_stamps(find_world_sources())
+    try:
+        with open(cache_path("world_manifest.json"), "rb") as f:
+            manifest: WorldManifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get("version") != get_manifest_version() \
+            or manifest.get("sources") != stamps:
+        return None
+    return manifest
+
+
+def write_manifest(manifest: WorldManifest) -> None:
+    path = cache_path("world_manifest.json")
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(temp_path, path)  # atomic, so concurrent readers never see half a manifest
+    except OSError as e:
+        logging.warning(f"Could not write world manifest: {e}")
+
+
+_manifest: typing.Optional[WorldManifest] = None
+
+
+def get_manifest() -> WorldManifest:
+    """Returns the manifest of all worlds, only importing worlds if the cached one is missing or outdated."""
+    global _manifest
+    if _manifest is None:
+        if "worlds" in sys.modules:
+            import worlds
+            _manifest = worlds.manifest
+        else:
+            _manifest = load_manifest()
+            if _manifest is None:
+                import worlds
+                _manifest = worlds.manifest
+    return _manifest
+
+
+def restrict_world_loading(games: typing.Iterable[str]) -> None:
+    """Makes the first import of worlds only load the world sources of games and the generic world.
+    Does nothing if worlds is already imported, or if the cached manifest doesn't know where one of the games is."""
+    global load_only
+    load_only = {"Archipelago", *games}
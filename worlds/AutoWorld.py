@@ -174,6 +174,7 @@ def call_single(multiworld: "MultiWorld", method_name: str, player: int, *args:
 
 
 def call_all(multiworld: "MultiWorld", method_name: str, *args: Any) -> None:
+    multiworld.progress.report_stage(method_name)
     world_types: Set[AutoWorldRegister] = set()
     for player in multiworld.player_ids:
         prev_item_count = len(multiworld.itempool)
@@ -289,6 +290,12 @@ class World(metaclass=AutoWorldRegister):
     hidden: ClassVar[bool] = False
     """Hide World Type from various views. Does not remove functionality."""
 
+    incremental_reachability: ClassVar[bool] = False
+    """Allow CollectionState to only retest blocked entrances whose access rules read items or regions that changed.
+    Enable this only if entrance rules depend on nothing else, for example no data kept by a LogicMixin and no items
+    placed at locations that are read without worlds.generic.Rules.location_item_name.
+    test.general.test_reachability compares the results against full updates for every world that enables it."""
+
     web: ClassVar[WebWorld] = WebWorld()
     """see WebWorld for options"""
 
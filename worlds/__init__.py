@@ -9,14 +9,11 @@ import time
 import dataclasses
 from typing import Dict, List, TypedDict
 
-from Utils import local_path, user_path
+import world_manifest
+from world_manifest import WorldManifest, find_world_sources, get_source_stamps, get_world_folders, load_manifest, \
+    write_manifest
 
-local_folder = os.path.dirname(__file__)
-user_folder = user_path("worlds") if user_path() != local_path() else user_path("custom_worlds")
-try:
-    os.makedirs(user_folder, exist_ok=True)
-except OSError:  # can't access/write?
-    user_folder = None
+user_folder, local_folder = get_world_folders()
 
 __all__ = {
     "network_data_package",
@@ -27,6 +24,7 @@ __all__ = {
     "GamesPackage",
     "DataPackage",
     "failed_world_loads",
+    "manifest",
 }
 
 
@@ -100,26 +98,23 @@ class WorldSource:
 
 
 # find potential world containers, currently folders and zip-importable .apworld's
-world_sources: List[WorldSource] = []
-for folder in (folder for folder in (user_folder, local_folder) if folder):
-    relative = folder == local_folder
-    for entry in os.scandir(folder):
-        # prevent loading of __pycache__ and allow _* for non-world folders, disable files/folders starting with "."
-        if not entry.name.startswith(("_", ".")):
-            file_name = entry.name if relative else os.path.join(folder, entry.name)
-            if entry.is_dir():
-                if os.path.isfile(os.path.join(entry.path, '__init__.py')):
-                    world_sources.append(WorldSource(file_name, relative=relative))
-                elif os.path.isfile(os.path.join(entry.path, '__init__.pyc')):
-                    world_sources.append(WorldSource(file_name, relative=relative))
-                else:
-                    logging.warning(f"excluding {entry.name} from world sources because it has no __init__.py")
-            elif entry.is_file() and entry.name.endswith(".apworld"):
-                world_sources.append(WorldSource(file_name, is_zip=True, relative=relative))
-
-# import all submodules to trigger AutoWorldRegister
+found_world_sources = find_world_sources()
+world_sources: List[WorldSource] = [WorldSource(path, is_zip, relative)
+                                    for path, is_zip, relative in found_world_sources]
 world_sources.sort()
-for world_source in world_sources:
+source_stamps = get_source_stamps(found_world_sources)
+del found_world_sources
+
+# with an up-to-date manifest, loading can be restricted to the world sources of some games
+cached_manifest = load_manifest(source_stamps)
+sources_to_load = world_sources
+if cached_manifest and world_manifest.load_only is not None and \
+        all(game in cached_manifest["games"] for game in world_manifest.load_only):
+    paths_to_load = {cached_manifest["games"][game]["source"] for game in world_manifest.load_only}
+    sources_to_load = [world_source for world_source in world_sources if world_source.path in paths_to_load]
+
+# import submodules to trigger AutoWorldRegister
+for world_source in sources_to_load:
     world_source.load()
 
 # Build the data package for each game.
@@ -129,3 +124,34 @@ network_data_package: DataPackage = {
     "games": {world_name: world.get_data_package_data() for world_name, world in AutoWorldRegister.world_types.items()},
 }
 
+
+def build_manifest() -> WorldManifest:
+    module_sources = {os.path.basename(world_source.path).rsplit(".", 1)[0]: world_source.path
+                      for world_source in world_sources}
+    return {
+        "version": world_manifest.get_manifest_version(),
+        "sources": source_stamps,
+        "games": {
+            world_name: {
+                "source": module_sources[world.__module__.split(".")[1]],
+                # a copy, as MultiServer removes the groups from network_data_package
+                "data_package": dict(network_data_package["games"][world_name]),
+                "hint_blacklist": sorted(world.hint_blacklist),
+                "options": {option_key: getattr(option, "display_name", option_key)
+                            for option_key, option in world.options_dataclass.type_hints.items()},
+            }
+            for world_name, world in AutoWorldRegister.world_types.items()
+        },
+    }
+
+
+manifest: WorldManifest
+"""metadata of all worlds, including those not loaded due to world_manifest.restrict_world_loading"""
+if cached_manifest:
+    manifest = cached_manifest
+else:
+    manifest = build_manifest()
+    if not failed_world_loads:  # a world may fail due to a missing requirement, so don't cache its absence
+        write_manifest(manifest)
+del cached_manifest, sources_to_load
+
@@ -3,6 +3,7 @@ import logging
 import typing
 
 from BaseClasses import LocationProgressType, MultiWorld, Location, Region, Entrance
+from rule_builder import And, Or, Rule
 
 if typing.TYPE_CHECKING:
     import BaseClasses
@@ -105,6 +106,9 @@ def add_rule(spot: typing.Union["BaseClasses.Location", "BaseClasses.Entrance"],
     # empty rule, replace instead of add
     if old_rule is spot.__class__.access_rule:
         spot.access_rule = rule if combine == "and" else old_rule
+    elif isinstance(rule, Rule) and isinstance(old_rule, Rule):
+        # stay declarative, so what the combined rule reads is still known
+        spot.access_rule = And(rule, old_rule) if combine == "and" else Or(rule, old_rule)
     else:
         if combine == "and":
             spot.access_rule = lambda state: rule(state) and old_rule(state)
@@ -162,6 +166,9 @@ def item_name_in_locations(item: str, player: int,
 
 def location_item_name(state: "BaseClasses.CollectionState", location: str, player: int) -> \
         typing.Optional[typing.Tuple[str, int]]:
+    if state.access_recorder:
+        # placed items are not tracked by CollectionState, so an entrance reading them has to be retested every time
+        state.access_recorder.untrackable()
     location = state.multiworld.get_location(location, player)
     if location.item is None:
         return None
@@ -39,6 +39,7 @@ class SubnauticaWorld(World):
     """
     game = "Subnautica"
     web = SubnaticaWeb()
+    incremental_reachability = True
 
     item_name_to_id = {data.name: item_id for item_id, data in items.item_table.items()}
     location_name_to_id = all_locations
@@ -39,6 +39,7 @@ class TimespinnerWorld(World):
     option_definitions = timespinner_options
     game = "Timespinner"
     topology_present = True
+    incremental_reachability = True
     web = TimespinnerWebWorld()
     required_client_version = (0, 4, 2)
 
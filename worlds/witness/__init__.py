@@ -48,6 +48,7 @@ class WitnessWorld(World):
     """
     game = "The Witness"
     topology_present = False
+    incremental_reachability = True
     web = WitnessWebWorld()
 
     options_dataclass = TheWitnessOptions